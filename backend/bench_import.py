@@ -0,0 +1,194 @@
+"""
+Import throughput benchmark.
+
+Generates synthetic TWIC-sized PGN files seeded from tata_games.json and times
+TWICService.parse_pgn end to end into a throwaway SQLite database. Every size
+runs in a fresh interpreter so peak RSS is measured per run. Results are
+printed (and optionally written) as JSON so releases can be compared.
+
+    python bench_import.py                          # 10k and 100k games
+    python bench_import.py --sizes 10000 2000000 --workers 0 --output bench.json
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+from services.pgn_scanner import scan_games
+
+TATA_GAMES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tata_games.json")
+DEFAULT_SIZES = [10_000, 100_000]
+RESULTS = ("1-0", "0-1", "1/2-1/2")
+
+SURNAMES = ["Carlsen", "Nakamura", "Caruana", "Firouzja", "Gukesh", "Praggnanandhaa", "Abdusattorov",
+            "Giri", "Erigaisi", "Wei", "Ding", "Nepomniachtchi", "So", "Aronian", "Rapport", "Keymer"]
+INITIALS = "ABCDEFGHIJKLMNOPRSTVW"
+
+def load_seed_games(path=TATA_GAMES):
+    """(headers, movetext) for every seed game (the Tata seeds are unannotated mainlines)"""
+    with open(path) as f:
+        games = json.load(f)
+    seeds = []
+    for g in games:
+        for scanned in scan_games(io.BytesIO(g["pgn"].encode("utf-8"))):
+            movetext = scanned.pgn.split("\n\n", 1)[1] if "\n\n" in scanned.pgn else ""
+            seeds.append((scanned.headers, movetext.strip()))
+    return seeds
+
+def synthetic_game(rng, seeds, index):
+    """One PGN game: a seed game with new players, event, date and round and a shortened movetext"""
+    headers, movetext = seeds[index % len(seeds)]
+    tokens = movetext.split()
+    if tokens and tokens[-1] in RESULTS + ("*",):
+        tokens = tokens[:-1]
+    # Keep 60-100% of the moves, cut on a move number so the text stays well-formed
+    keep = max(1, int(len(tokens) * rng.uniform(0.6, 1.0)))
+    while keep < len(tokens) and not tokens[keep][0].isdigit():
+        keep += 1
+    result = rng.choice(RESULTS)
+    moves = " ".join(tokens[:keep] + [result])
+
+    white = f"{rng.choice(SURNAMES)},{rng.choice(INITIALS)}.{index % 997}"
+    black = f"{rng.choice(SURNAMES)},{rng.choice(INITIALS)}.{(index * 7) % 991}"
+    day = date(2000, 1, 1) + timedelta(days=index // 50)
+    tags = [
+        ("Event", f"Synthetic Open {index // 500}"),
+        ("Site", headers.get("Site", "?")),
+        ("Date", day.strftime("%Y.%m.%d")),
+        ("Round", f"{index % 500 // 10 + 1}.{index % 10 + 1}"),
+        ("White", white),
+        ("Black", black),
+        ("Result", result),
+        ("WhiteElo", str(rng.randint(2000, 2850))),
+        ("BlackElo", str(rng.randint(2000, 2850))),
+        ("ECO", headers.get("ECO", "")),
+    ]
+    header_text = "\n".join(f'[{name} "{value}"]' for name, value in tags)
+    # Wrap like TWIC does, roughly 80 columns
+    lines, line = [], ""
+    for token in moves.split():
+        if line and len(line) + len(token) + 1 > 79:
+            lines.append(line)
+            line = token
+        else:
+            line = f"{line} {token}" if line else token
+    lines.append(line)
+    return f"{header_text}\n\n" + "\n".join(lines) + "\n\n"
+
+def generate_pgn(path, games, seed=0):
+    """Write `games` synthetic games to path; returns the file size in bytes"""
+    rng = random.Random(seed)
+    seeds = load_seed_games()
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(games):
+            f.write(synthetic_game(rng, seeds, i))
+    return os.path.getsize(path)
+
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def run_single(games, workers, fast_scan, batch_size, seed):
+    """Generate, import and measure one size in this process; returns a result dict"""
+    from sqlalchemy import create_engine
+    from services.twic_service import TWICService, IMPORT_BATCH_SIZE
+
+    with tempfile.TemporaryDirectory(prefix="macbase-bench-") as tmp:
+        pgn_path = os.path.join(tmp, "bench.pgn")
+        started = time.perf_counter()
+        pgn_bytes = generate_pgn(pgn_path, games, seed)
+        generate_sec = time.perf_counter() - started
+
+        db_path = os.path.join(tmp, "bench.db")
+        engine = create_engine(f"sqlite:///{db_path}")
+        service = TWICService(download_dir=tmp, db_dir=tmp, bind=engine)
+
+        started = time.perf_counter()
+        success, msg = service.parse_pgn(
+            pgn_path, 1, batch_size=batch_size or IMPORT_BATCH_SIZE,
+            fast_scan=fast_scan, workers=workers or None, resume=False,
+        )
+        import_sec = time.perf_counter() - started
+        engine.dispose()
+        db_bytes = sum(os.path.getsize(p) for p in (db_path, f"{db_path}-wal") if os.path.exists(p))
+
+    if not success:
+        raise RuntimeError(msg)
+    return {
+        "games": games,
+        "workers": workers if workers else os.cpu_count(),
+        "fast_scan": fast_scan,
+        "pgn_mb": round(pgn_bytes / 1024 / 1024, 1),
+        "generate_sec": round(generate_sec, 2),
+        "import_sec": round(import_sec, 2),
+        "games_per_sec": round(games / import_sec, 1) if import_sec > 0 else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "peak_worker_rss_mb": peak_rss_mb(resource.RUSAGE_CHILDREN),
+        "db_mb": round(db_bytes / 1024 / 1024, 1),
+        "message": msg,
+    }
+
+def git_revision():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark PGN import throughput")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Games per run (10k to 2M)")
+    parser.add_argument("--workers", type=int, default=1, help="Parser processes, 0 = one per CPU")
+    parser.add_argument("--full-parse", action="store_true", help="Run every game through python-chess (fast_scan=False)")
+    parser.add_argument("--batch-size", type=int, default=0, help="Rows per insert batch, 0 = IMPORT_BATCH_SIZE")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.single:
+        result = run_single(args.sizes[0], args.workers, not args.full_parse, args.batch_size, args.seed)
+        print(json.dumps(result))
+        return 0
+
+    results = []
+    for games in args.sizes:
+        cmd = [sys.executable, os.path.abspath(__file__), "--single", "--sizes", str(games),
+               "--workers", str(args.workers), "--batch-size", str(args.batch_size), "--seed", str(args.seed)]
+        if args.full_parse:
+            cmd.append("--full-parse")
+        print(f"Benchmarking {games} games...", file=sys.stderr)
+        out = subprocess.run(cmd, capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        if out.returncode != 0:
+            print(out.stderr, file=sys.stderr)
+            return out.returncode
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    report = {
+        "benchmark": "pgn_import",
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,13 +9,12 @@ if getattr(sys, 'frozen', False):
     sys.stdout = open(log_path, 'w', buffering=1)
     sys.stderr = sys.stdout
 
-from fastapi import FastAPI, HTTPException, Depends, Query, BackgroundTasks, Request
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 import uvicorn
 import os
-import requests
 from bs4 import BeautifulSoup
 from datetime import datetime
 import re
@@ -23,7 +22,7 @@ import concurrent.futures
 from sqlalchemy.orm import Session
 from sqlalchemy import func, not_, or_, and_
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict
+from typing import List, Optional
 from eco_lookup import ECO_DICT
 from pydantic import BaseModel
 import io
@@ -43,14 +42,47 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
-from services.twic_service import TWICService
-from services.database import SessionLocal, Game, ExcludedIssue, RepertoireFolder, RepertoireGame, init_db
+from services.twic_service import TWICService, file_checkpoint_key, twic_checkpoint_key, TWIC_ZIP_PATH
+from services.database import SessionLocal, ReadSessionLocal, Game, Player, IssueStat, ExcludedIssue, RepertoireFolder, RepertoireGame, init_db
+from services.event_catalog import event_names, events_with_prefix
+from services.import_jobs import ImportJobQueue
+from services.maintenance import (
+    needs_dedupe, dedupe_games, needs_player_link, link_players, needs_position_index, index_positions,
+    needs_compaction, compact_games, delete_issue_games, needs_vacuum, reclaim_space,
+)
+from services.pgn_store import game_pgn, pack_pgn, PGN_SOURCE_COLUMNS
+from services.pgn_scanner import scan_games
+from services.uploads import receive_upload, upload_source_tag
+from services.search import name_search_ids
+from services.pagination import paginate, next_cursor, encode_cursor, decode_cursor, DEFAULT_SORT, SORT_ORDERS
+from services.game_counts import counted_games, capped_count
+from services.positions import fen_key, position_key, position_game_ids, explorer_moves, decode_move
+from services.players import name_prefix_filter, normalize_player_name
+from services.eco import parse_eco_ranges
 
 @app.on_event("startup")
 def on_startup():
     init_db()
+    import_jobs.start()
+    # Databases from before duplicate detection get their games hashed (and deduplicated) once
+    if needs_dedupe():
+        import_jobs.enqueue("dedupe")
+    # ... and games from before the players table get their white_id / black_id filled in
+    if needs_player_link():
+        import_jobs.enqueue("players")
+    # ... and games not in the position index yet (older databases, interrupted jobs) get indexed
+    if needs_position_index():
+        import_jobs.enqueue("positions")
+    # ... and games stored before compressed PGN storage get converted
+    if needs_compaction():
+        import_jobs.enqueue("compact")
+
+@app.on_event("shutdown")
+def on_shutdown():
+    import_jobs.shutdown(wait=False)
 
 # Safe import for Pro Logic
 try:
@@ -68,6 +100,14 @@ def get_db():
     finally:
         db.close()
 
+def get_read_db():
+    """Session from the read-only pool, for endpoints that only browse"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
 twic_service = TWICService()
 
 # Cache for TWIC issues to avoid scraping on every request
@@ -77,20 +117,22 @@ _twic_issues_cache = {
     "fetched_at": None
 }
 
-# Global dictionary to track import status: { issue_number: { "status": "processing", "progress": "...", "message": "..." } }
-import_status: Dict[int, Dict] = {}
+# Seconds a cached TWIC issue page is trusted before it is revalidated
+ISSUE_PAGE_MAX_AGE = 7 * 24 * 3600
+
+# Uploaded files wait here until their import job has run
+UPLOAD_DIR = os.path.join(os.path.expanduser("~"), ".macbase", "data", "uploads")
+
+# How many TWIC imports may run at the same time; the rest wait in the job queue
+MAX_CONCURRENT_IMPORTS = 2
 
 def get_issue_events(issue_num):
     """Fetch and parse events from a specific TWIC issue page"""
     try:
-        url = f"https://theweekinchess.com/html/twic{issue_num}.html"
-        headers = {
-             "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        }
-        response = requests.get(url, headers=headers, timeout=5)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, "html.parser")
+        # Published issue pages don't change, so a cached copy is reused for a week before revalidating
+        html = twic_service.http.get_text(f"/html/twic{issue_num}.html", timeout=5, max_age=ISSUE_PAGE_MAX_AGE)
+
+        soup = BeautifulSoup(html, "html.parser")
         # Try to find the Contents section
         text = soup.get_text()
         
@@ -117,13 +159,19 @@ def get_issue_events(issue_num):
         return []
 
 
+def issue_flags(db):
+    """({issue: games imported}, {excluded issues}) from issue_stats, without counting games"""
+    imported = {r.twic_issue: r.games for r in db.query(IssueStat.twic_issue, IssueStat.games).filter(IssueStat.twic_issue.isnot(None))}
+    excluded = {r[0] for r in db.query(ExcludedIssue.twic_issue)}
+    return imported, excluded
+
 @app.get("/api/twic-issues")
 def get_twic_issues(limit: int = 15):
     """Fetch latest TWIC issues from theweekinchess.com"""
     global _twic_issues_cache
     if PRO_AVAILABLE:
         try:
-            return pro_logic.get_twic_issues_pro(limit, _twic_issues_cache, TWIC_CACHE_DURATION, SessionLocal, Game, ExcludedIssue, import_status, get_issue_events)
+            return pro_logic.get_twic_issues_pro(limit, _twic_issues_cache, TWIC_CACHE_DURATION, SessionLocal, Game, ExcludedIssue, import_jobs.active_by_issue(), get_issue_events)
         except Exception as e:
             print(f"Pro TWIC logic failed: {e}")
             # Fallback to basic scraper logic or promotion
@@ -135,15 +183,15 @@ def get_twic_issues(limit: int = 15):
         cache_age = (datetime.now() - _twic_issues_cache["fetched_at"]).total_seconds()
         if cache_age < TWIC_CACHE_DURATION:
             data = _twic_issues_cache["data"]
+            import_status = import_jobs.active_by_issue()
             # Inject imported status
             db = SessionLocal()
             try:
+                imported, excluded = issue_flags(db)
                 for issue in data[:limit]:
                     issue_num = issue["issue"]
-                    exists = db.query(Game).filter(Game.twic_issue == issue_num).first()
-                    excluded = db.query(ExcludedIssue).filter(ExcludedIssue.twic_issue == issue_num).first()
-                    issue["imported"] = exists is not None
-                    issue["excluded"] = excluded is not None
+                    issue["imported"] = issue_num in imported
+                    issue["excluded"] = issue_num in excluded
                     
                     status_info = import_status.get(issue_num)
                     if status_info and status_info.get("status") == "processing":
@@ -157,14 +205,10 @@ def get_twic_issues(limit: int = 15):
                 db.close()
     
     try:
-        # Scrape TWIC archive page
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        }
-        response = requests.get("https://theweekinchess.com/twic", headers=headers, timeout=8)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, "html.parser")
+        # Scrape TWIC archive page (revalidated with ETag/Last-Modified, so an unchanged page is a 304)
+        html = twic_service.http.get_text("/twic", timeout=8)
+
+        soup = BeautifulSoup(html, "html.parser")
         
         # Find the issues table - it's a standard HTML table with columns:
         # TWIC, Date, Read, PGN, CBV, Games, Stories
@@ -198,7 +242,7 @@ def get_twic_issues(limit: int = 15):
                                 "issue": issue_num,
                                 "date": date_str if date_str else "Unknown",
                                 "games": games_count,
-                                "pgn_url": f"https://theweekinchess.com/zips/twic{issue_num}g.zip",
+                                "pgn_url": twic_service.http.url(f"{TWIC_ZIP_PATH}twic{issue_num}g.zip"),
                                 "events": [] # Will be populated for top issues
                             })
                             seen_issues.add(issue_num)
@@ -224,19 +268,17 @@ def get_twic_issues(limit: int = 15):
         # Before returning, update cache and append any DB items not found on page
         db = SessionLocal()
         try:
-            db_imported = [r[0] for r in db.query(Game.twic_issue).distinct().all()]
-            db_excluded = [r[0] for r in db.query(ExcludedIssue.twic_issue).all()]
-            all_managed = set(db_imported) | set(db_excluded)
+            imported, excluded = issue_flags(db)
+            all_managed = set(imported) | excluded
             
             scraped_nums = {i["issue"] for i in issues}
             for m_num in all_managed:
                 if m_num not in scraped_nums:
-                    db_count = db.query(Game).filter(Game.twic_issue == m_num).count()
                     issues.append({
                         "issue": m_num,
                         "date": "Managed",
-                        "games": db_count,
-                        "pgn_url": f"https://theweekinchess.com/zips/twic{m_num}g.zip",
+                        "games": imported.get(m_num, 0),
+                        "pgn_url": twic_service.http.url(f"{TWIC_ZIP_PATH}twic{m_num}g.zip"),
                         "events": ["In Local Database"],
                         "is_managed": True
                     })
@@ -264,13 +306,11 @@ def get_twic_issues(limit: int = 15):
                     processed_issues[0]["promo_msg"] = "Upgrade to Pro to unlock 1,500+ historical TWIC issues."
 
             # Return and inject status
+            import_status = import_jobs.active_by_issue()
             for issue in processed_issues:
                 issue_num = issue["issue"]
-                exists = db.query(Game).filter(Game.twic_issue == issue_num).first()
-                excluded = db.query(ExcludedIssue).filter(ExcludedIssue.twic_issue == issue_num).first()
-                
-                issue["imported"] = exists is not None
-                issue["excluded"] = excluded is not None
+                issue["imported"] = issue_num in imported
+                issue["excluded"] = issue_num in excluded
                 
                 status_info = import_status.get(issue_num)
                 if status_info and status_info.get("status") == "processing":
@@ -291,109 +331,213 @@ def get_twic_issues(limit: int = 15):
             return _twic_issues_cache["data"][:limit]
         raise HTTPException(status_code=503, detail=f"Could not fetch TWIC issues: {str(e)}")
 
-# Background task for importing TWIC
-def import_twic_task(issue_number: int):
-    global import_status
-    import_status[issue_number] = {"status": "processing", "progress": "Starting...", "message": "Initializing import"}
-    
+def import_progress(ctx):
+    """progress_callback for TWICService imports that reports into a job"""
+    def parse_progress(count, games_per_sec=None):
+        progress = f"Importing... {count} games"
+        if games_per_sec:
+            progress += f" ({games_per_sec:.0f}/s)"
+        # Raises ImportCancelled once the job is cancelled, stopping the import after this batch
+        ctx.report(progress, games=count, games_per_sec=games_per_sec)
+    return parse_progress
+
+# Job runner for importing TWIC
+def run_twic_import(job, ctx):
+    # Download the zip, then parse its PGN in a process pool; only the compressed
+    # archive is kept on disk (stream_import with workers=1 parses as it downloads)
+    ctx.report("Downloading...", force=True)
+    success, msg = twic_service.stream_import(job.twic_issue, progress_callback=import_progress(ctx), workers=None)
+    if success:
+        import_jobs.enqueue("positions") # Index the new games' positions in the background
+    return success, msg
+
+# Job runner for uploaded PGN / zip / gz files
+def run_upload_import(job, ctx):
+    if not job.file_path or not os.path.exists(job.file_path):
+        return False, "Uploaded file is missing, upload it again"
     try:
-        def set_progress(msg):
-            import_status[issue_number]["progress"] = msg
-
-        # 1. Download
-        success, msg = twic_service.download_twic(issue_number, progress_callback=set_progress)
-        if not success:
-            import_status[issue_number] = {"status": "error", "progress": "Failed", "message": msg}
-            return
-
-        # 2. Parse
-        pgn_filename = f"twic{issue_number}.pgn"
-        pgn_path = os.path.join(twic_service.download_dir, pgn_filename)
-        
-        if not os.path.exists(pgn_path):
-            import_status[issue_number] = {"status": "error", "progress": "Failed", "message": f"PGN file not found: {pgn_filename}"}
-            return
-
-        def parse_progress(count):
-            import_status[issue_number]["progress"] = f"Importing... {count} games"
-            
-        success, msg = twic_service.parse_pgn(pgn_path, issue_number, progress_callback=parse_progress)
-        
-        if success:
-            import_status[issue_number] = {"status": "success", "progress": "Completed", "message": msg}
-        else:
-            import_status[issue_number] = {"status": "error", "progress": "Failed", "message": msg}
-            
-    except Exception as e:
-        import_status[issue_number] = {"status": "error", "progress": "Error", "message": str(e)}
+        ctx.report("Importing...", force=True)
+        success, msg = twic_service.import_file(job.file_path, job.source, progress_callback=import_progress(ctx), workers=None)
+        if success and not ctx.cancelled():
+            import_jobs.enqueue("positions")
+        return success, msg
+    finally:
+        # Only a restart resumes an upload, and that never gets here: whether the
+        # games are in or the job failed or was cancelled, drop the copy and its checkpoint
+        twic_service.clear_checkpoint(file_checkpoint_key(job.file_path))
+        os.remove(job.file_path)
+
+def run_dedupe(job, ctx):
+    checked, removed = dedupe_games(report=lambda n, dupes: ctx.report(f"Checked {n} games, {dupes} duplicates removed", games=n))
+    return True, f"Checked {checked} games, removed {removed} duplicates"
+
+def run_link_players(job, ctx):
+    linked = link_players(report=lambda n: ctx.report(f"Linked players for {n} games", games=n))
+    return True, f"Linked players for {linked} games"
+
+def run_compact(job, ctx):
+    converted = compact_games(report=lambda n: ctx.report(f"Compressed {n} games", games=n))
+    return True, f"Compressed {converted} games"
+
+def run_delete_issue(job, ctx):
+    issue_number = job.twic_issue
+    ctx.report("Deleting...", force=True)
+    # One batch per transaction, so imports and browsing aren't locked out meanwhile
+    count = delete_issue_games(issue_number, report=lambda n: ctx.report(f"Deleted {n} games", games=n))
+    # A later re-import should start from the top rather than resume
+    twic_service.clear_checkpoint(twic_checkpoint_key(issue_number))
+    file_msg = remove_issue_files(issue_number)
+    if needs_vacuum():
+        import_jobs.enqueue("vacuum")
+    return True, f"Deleted {count} games{file_msg} from issue {issue_number}"
+
+def run_vacuum(job, ctx):
+    freed = reclaim_space(report=lambda n: ctx.report(f"Freed {n} pages", games=n))
+    return True, f"Returned {freed} free pages to the disk"
+
+def run_index_positions(job, ctx):
+    indexed = index_positions(report=lambda n: ctx.report(f"Indexed positions for {n} games", games=n))
+    return True, f"Indexed positions for {indexed} games"
+
+import_jobs = ImportJobQueue(
+    {"twic": run_twic_import, "upload": run_upload_import, "dedupe": run_dedupe, "players": run_link_players,
+     "positions": run_index_positions, "compact": run_compact, "delete": run_delete_issue, "vacuum": run_vacuum},
+    max_workers=MAX_CONCURRENT_IMPORTS,
+)
 
+def check_issue_allowed(issue_number: int):
+    """Community Core only supports importing the 3 most recent issues; returns an error message otherwise"""
+    if PRO_AVAILABLE:
+        return None
+    # We look at the cache safely
+    top_issues = (_twic_issues_cache.get("data") or [])[:3]
+    top_nums = [i["issue"] for i in top_issues]
+    if issue_number not in top_nums:
+        return f"Issue {issue_number} is a Pro feature. Community Core only supports the 3 most recent issues."
+    return None
+
+class BatchImportRequest(BaseModel):
+    start: int
+    end: int
+
+@app.post("/api/fetch-twic/batch")
+def fetch_twic_batch(request: BatchImportRequest):
+    """Queue imports for every issue in [start, end]; they run a few at a time"""
+    first, last = sorted((request.start, request.end))
+    if last - first >= 2000:
+        raise HTTPException(status_code=400, detail="Batch too large (max 2000 issues)")
+
+    queued, skipped = [], []
+    for issue_number in range(first, last + 1):
+        if check_issue_allowed(issue_number):
+            skipped.append(issue_number)
+            continue
+        job, created = import_jobs.enqueue("twic", twic_issue=issue_number)
+        if created:
+            queued.append(job["id"])
+
+    message = f"Queued {len(queued)} imports for TWIC {first}-{last}"
+    if skipped:
+        message += f" ({len(skipped)} issues require Pro)"
+    return {"status": "started", "message": message, "job_ids": queued, "skipped": skipped}
 
 @app.post("/api/fetch-twic/{issue_number}")
-def fetch_twic(issue_number: int, background_tasks: BackgroundTasks):
+def fetch_twic(issue_number: int):
     # Protection for Community Core: Only allow importing of recent issues
-    if not PRO_AVAILABLE:
-        # Check if this is one of the top 3 issues
-        # We look at the cache safely
-        top_issues = (_twic_issues_cache.get("data") or [])[:3]
-        top_nums = [i["issue"] for i in top_issues]
-        
-        if issue_number not in top_nums:
-            return {
-                "status": "error", 
-                "message": f"Issue {issue_number} is a Pro feature. Community Core only supports the 3 most recent issues."
-            }
+    error = check_issue_allowed(issue_number)
+    if error:
+        return {"status": "error", "message": error}
 
-    # Check if already processing
-    if issue_number in import_status and import_status[issue_number]["status"] == "processing":
-        return {"status": "processing", "message": f"Import for {issue_number} is already in progress"}
+    job, created = import_jobs.enqueue("twic", twic_issue=issue_number)
+    if not created:
+        busy = "being deleted" if job["kind"] == "delete" else "already being imported"
+        return {"status": "processing", "message": f"TWIC {issue_number} is {busy}", "job_id": job["id"]}
 
-    # Start background task
-    background_tasks.add_task(import_twic_task, issue_number)
-    
-    return {"status": "started", "message": f"Background import started for TWIC {issue_number}"}
+    return {"status": "started", "message": f"Background import queued for TWIC {issue_number}", "job_id": job["id"]}
+
+@app.post("/api/import/upload")
+async def upload_pgn(request: Request):
+    """
+    Import a local .pgn, .zip or .gz file sent as multipart/form-data (field 'file',
+    optional 'source' tag). The body is streamed to disk and imported by a queued job.
+    """
+    try:
+        upload = await receive_upload(request, UPLOAD_DIR)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    source = upload.fields.get("source") or upload_source_tag(upload.filename)
+    job, created = import_jobs.enqueue("upload", source=source, file_path=upload.path)
+    if not created:
+        os.remove(upload.path) # Not queued, so nothing would ever import or remove it
+        return {"status": "processing", "message": f"An import for {source} is already in progress", "job_id": job["id"]}
+    return {"status": "started", "message": f"Import queued for {upload.filename}", "job_id": job["id"], "source": source}
 
 @app.get("/api/import-status/{issue_number}")
 def get_import_status(issue_number: int):
-    status = import_status.get(issue_number)
-    if not status:
+    job = import_jobs.latest_for_issue(issue_number)
+    if not job:
         return {"status": "idle", "progress": "", "message": ""}
-    return status
+    return job
+
+@app.post("/api/maintenance/dedupe")
+def start_dedupe():
+    """Hash games that predate duplicate detection and remove the duplicates found"""
+    job, created = import_jobs.enqueue("dedupe")
+    status = "started" if created else "processing"
+    return {"status": status, "message": "Duplicate scan queued" if created else "Duplicate scan already running", "job_id": job["id"]}
+
+@app.get("/api/import-jobs")
+def list_import_jobs(limit: int = 50, status: str = None):
+    return import_jobs.list(limit=limit, status=status)
+
+@app.get("/api/import-jobs/{job_id}")
+def get_import_job(job_id: int):
+    job = import_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.delete("/api/import-jobs/{job_id}")
+def cancel_import_job(job_id: int):
+    job = import_jobs.cancel(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"status": "success", "message": f"Cancellation requested for job {job_id}", "job": job}
 
 @app.delete("/api/issues/{issue_number}")
-def delete_issue(issue_number: int, db: Session = Depends(get_db)):
-    """Delete all games associated with a specific TWIC issue and remove the PGN file"""
-    # 1. Delete from DB
-    games = db.query(Game).filter(Game.twic_issue == issue_number)
-    count = games.count()
-    
-    games.delete(synchronize_session=False)
-    db.commit()
-
-    # 2. Delete file from disk
+def delete_issue(issue_number: int):
+    """Queue deleting all games of a TWIC issue and its PGN file; progress shows up like an import's"""
+    job, created = import_jobs.enqueue("delete", twic_issue=issue_number)
+    if not created:
+        busy = "already being deleted" if job["kind"] == "delete" else "still importing"
+        return {"status": "processing", "message": f"TWIC {issue_number} is {busy}", "job_id": job["id"]}
+    return {"status": "started", "message": f"Deleting TWIC {issue_number}", "job_id": job["id"]}
+
+def remove_issue_files(issue_number):
+    """Delete the downloaded files of an issue; returns the message suffix for the job"""
     # Construct filename based on issue number (e.g., twic1500.pgn)
     pgn_filename = f"twic{issue_number}.pgn"
     pgn_path = os.path.join(twic_service.download_dir, pgn_filename)
     
+    # Streamed imports only keep the zip, older imports left the extracted PGN (or both)
+    zip_path = os.path.join(twic_service.download_dir, f"twic{issue_number}g.zip")
+    removed = []
     file_msg = ""
-    if os.path.exists(pgn_path):
-        try:
-            os.remove(pgn_path)
-            file_msg = " and PGN file removed"
-        except Exception as e:
-            file_msg = f" but failed to remove file: {e}"
-    else:
-        # Check for zip file too? Usually we expand it. 
-        # But let's check for the zip just in case
-        zip_filename = f"twic{issue_number}g.zip"
-        zip_path = os.path.join(twic_service.download_dir, zip_filename)
-        if os.path.exists(zip_path):
-             try:
-                os.remove(zip_path)
-                file_msg = " and ZIP file removed"
-             except:
-                pass
-
-    return {"status": "success", "message": f"Deleted {count} games{file_msg} from issue {issue_number}"}
+    for label, path in (("PGN", pgn_path), ("ZIP", zip_path)):
+        if os.path.exists(path):
+            try:
+                os.remove(path)
+                removed.append(label)
+            except Exception as e:
+                file_msg = f" but failed to remove file: {e}"
+    if removed and not file_msg:
+        file_msg = f" and {' and '.join(removed)} file removed"
+    # Leftovers of an interrupted download
+    for leftover in (f"{zip_path}.part", f"{zip_path}.validator"):
+        if os.path.exists(leftover):
+            os.remove(leftover)
+    return file_msg
 
 @app.post("/api/issues/{issue_number}/exclude")
 def exclude_issue(issue_number: int, db: Session = Depends(get_db)):
@@ -425,7 +569,10 @@ def update_game(game_id: int, pgn: str = Query(...), db: Session = Depends(get_d
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
     
-    game.pgn = pgn
+    scanned = next(scan_games(io.BytesIO(pgn.encode("utf-8"))), None)
+    columns = {name: getattr(game, name) for name in PGN_SOURCE_COLUMNS}
+    game.pgn_z = pack_pgn(scanned.headers if scanned else {}, pgn, columns)
+    game.pgn = None
     # Automatically tag as commented if any analysis is added
     if "{" in pgn or "(" in pgn:
         game.is_commented = 1
@@ -434,26 +581,62 @@ def update_game(game_id: int, pgn: str = Query(...), db: Session = Depends(get_d
         
     # Always tag as personal if user saves via this endpoint
     game.is_personal = 1
-        
+    indexed = game.position_count is not None
+
     db.commit()
+    # Changed moves take the game out of the position index (see positions.py), index it again
+    if indexed and game.position_count is None:
+        import_jobs.enqueue("positions")
     return {"status": "success", "message": "Analysis saved to database"}
 
-@app.get("/api/games")
-def get_games(
-    skip: int = 0, 
-    limit: int = 50, 
-    player: str = None, 
-    min_elo: int = None, 
-    max_elo: int = None, 
+# Columns /api/games returns by default: the headers the list shows, no PGN text
+GAME_SUMMARY_FIELDS = [
+    "id", "event", "site", "date", "round", "white", "black", "result", "eco", "opening",
+    "white_elo", "black_elo", "twic_issue", "source", "is_commented", "is_personal",
+]
+GAME_FIELDS = [c.name for c in Game.__table__.columns if c.name not in ("pgn_z", "moves", "duplicate_checked")] # pgn is rebuilt from pgn_z
+
+def game_columns(names):
+    """Columns to select for `names`; the pgn field needs the compressed text and the header columns"""
+    needed = list(names)
+    if "pgn" in names:
+        needed += [name for name in ["pgn_z"] + PGN_SOURCE_COLUMNS if name not in needed]
+    return [Game.__table__.c[name] for name in needed]
+
+def game_dict(row, names):
+    return {name: game_pgn(row) if name == "pgn" else getattr(row, name) for name in names}
+
+def game_fields(fields=None):
+    """Column names for a `fields=` parameter: comma-separated names, 'all', or the summary by default"""
+    if not fields:
+        return list(GAME_SUMMARY_FIELDS)
+    if fields == "all":
+        return list(GAME_FIELDS)
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in names if f not in GAME_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return ["id"] + [f for f in names if f != "id"] # id is always included
+
+def eco_code_filter(ranges):
+    """One BETWEEN per merged range on the indexed eco_code"""
+    return or_(*[Game.eco_code.between(low, high) for low, high in ranges])
+
+def filter_games(
+    query,
+    player: str = None,
+    min_elo: int = None,
+    max_elo: int = None,
     eco: str = None,
+    eco_range: str = None,
     event: str = None,
     twic_issue: int = None,
+    source: str = None,
+    player_id: int = None,
     commented_only: bool = False,
     personal_only: bool = False,
-    db: Session = Depends(get_db)
 ):
-    query = db.query(Game)
-
+    """The Database page filters, shared by /api/games and /api/games/count"""
     if commented_only:
         query = query.filter(Game.is_commented == 1)
         
@@ -461,70 +644,283 @@ def get_games(
         query = query.filter(Game.is_personal == 1)
     
     if player:
-        # Search both white and black
-        search = f"%{player}%"
-        query = query.filter((Game.white.ilike(search)) | (Game.black.ilike(search)))
+        # Search both white and black through the trigram index (case and diacritic insensitive)
+        ids = name_search_ids(("white", "black"), player)
+        if ids is not None:
+            query = query.filter(Game.id.in_(ids))
+        else:
+            search = f"%{player}%"
+            query = query.filter((Game.white.ilike(search)) | (Game.black.ilike(search)))
     
+    if player_id:
+        query = query.filter((Game.white_id == player_id) | (Game.black_id == player_id))
+
     if min_elo:
         query = query.filter((Game.white_elo >= min_elo) | (Game.black_elo >= min_elo))
         
     if max_elo:
         query = query.filter((Game.white_elo <= max_elo) | (Game.black_elo <= max_elo))
         
+    if eco_range:
+        try:
+            query = query.filter(eco_code_filter(parse_eco_ranges(eco_range)))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
     if eco:
         import json
         try:
             # Check if eco is a JSON encoded list of prefixes
             eco_list = json.loads(eco)
-            if isinstance(eco_list, list):
-                conditions = [Game.eco.startswith(prefix) for prefix in eco_list]
-                query = query.filter(or_(*conditions))
-            else:
-                 query = query.filter(Game.eco.ilike(f"{eco}%"))
+            if not isinstance(eco_list, list):
+                eco_list = [eco]
         except json.JSONDecodeError:
-            query = query.filter(Game.eco.ilike(f"{eco}%"))
+            eco_list = [eco]
+        try:
+            # Prefixes become ranges on the indexed eco_code: ["B5", "B6"] -> B50-B69
+            query = query.filter(eco_code_filter(parse_eco_ranges([str(p) for p in eco_list])))
+        except ValueError:
+            query = query.filter(or_(*[Game.eco.ilike(f"{prefix}%") for prefix in eco_list]))
         
     if event:
-        query = query.filter(Game.event.ilike(f"%{event}%"))
+        ids = name_search_ids(("event",), event)
+        if ids is not None:
+            query = query.filter(Game.id.in_(ids))
+        else:
+            query = query.filter(Game.event.ilike(f"%{event}%"))
     
     if twic_issue:
         query = query.filter(Game.twic_issue == twic_issue)
 
-    # Sort by ID descending (newest games first by import order)
-    # Date sorting removed temporarily as it may cause issues with mixed formats
-    # query = query.order_by(Game.date.desc(), Game.id.desc())
-    query = query.order_by(Game.id.desc())
-    
-    print(f"DEBUG: SQL Query: {query}")
-    games = query.offset(skip).limit(limit).all()
-    print(f"DEBUG: Found {len(games)} games (skip={skip}, limit={limit})")
-    if not games and skip == 0:
-         # Fallback to check if ANY games exist without sorting
-         count = db.query(Game).count()
-         print(f"DEBUG: Total games in DB (no filters): {count}")
-    return games
+    if source:
+        query = query.filter(Game.source == source)
+
+    return query
+
+@app.get("/api/games")
+def get_games(
+    response: Response,
+    skip: int = 0, 
+    limit: int = 50, 
+    cursor: str = None,
+    sort: str = DEFAULT_SORT,
+    player: str = None, 
+    min_elo: int = None, 
+    max_elo: int = None, 
+    eco: str = None,
+    eco_range: str = None,
+    event: str = None,
+    twic_issue: int = None,
+    source: str = None,
+    player_id: int = None,
+    commented_only: bool = False,
+    personal_only: bool = False,
+    fields: str = None,
+    db: Session = Depends(get_read_db)
+):
+    names = game_fields(fields)
+    # The sort column is needed for the next cursor even when it isn't requested
+    sort_column = SORT_ORDERS.get(sort, SORT_ORDERS[DEFAULT_SORT])[0].key
+    selected = names if sort_column in names else names + [sort_column]
+    query = filter_games(
+        db.query(*game_columns(selected)),
+        player=player, min_elo=min_elo, max_elo=max_elo, eco=eco, eco_range=eco_range, event=event,
+        twic_issue=twic_issue, source=source, player_id=player_id,
+        commented_only=commented_only, personal_only=personal_only,
+    )
+
+    # Default sort is by ID descending (newest games first by import order).
+    # Pages continue from the cursor in X-Next-Cursor; `skip` is kept for old clients
+    try:
+        query = paginate(query, sort, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if skip and not cursor:
+        query = query.offset(skip)
+
+    games = query.limit(limit).all()
+    cursor_out = next_cursor(games, sort, limit)
+    if cursor_out:
+        response.headers["X-Next-Cursor"] = cursor_out
+    return [game_dict(g, names) for g in games]
+
+@app.get("/api/games/count")
+def count_games(
+    player: str = None, 
+    min_elo: int = None, 
+    max_elo: int = None, 
+    eco: str = None,
+    eco_range: str = None,
+    event: str = None,
+    twic_issue: int = None,
+    source: str = None,
+    player_id: int = None,
+    commented_only: bool = False,
+    personal_only: bool = False,
+    db: Session = Depends(get_read_db)
+):
+    """
+    How many games match the /api/games filters: {"count", "exact"}. Whole
+    issues and uploads are read from issue_stats; other filters are counted up
+    to COUNT_EXACT_LIMIT and estimated past it (exact is false then).
+    """
+    filters = dict(
+        player=player, min_elo=min_elo, max_elo=max_elo, eco=eco, eco_range=eco_range, event=event,
+        twic_issue=twic_issue, source=source, player_id=player_id,
+        commented_only=commented_only, personal_only=personal_only,
+    )
+    active = {name for name, value in filters.items() if value}
+    if active <= {"twic_issue"} or active == {"source"}:
+        return {"count": counted_games(db, twic_issue=twic_issue, source=source), "exact": True}
+    count, exact = capped_count(filter_games(db.query(Game.id), **filters), total=counted_games(db))
+    return {"count": count, "exact": exact}
+
+POSITION_SEARCH_MAX_LIMIT = 500
+
+@app.get("/api/positions/search")
+def search_positions(
+    response: Response,
+    fen: str,
+    limit: int = 50,
+    cursor: str = None,
+    db: Session = Depends(get_read_db)
+):
+    """
+    Games whose mainline reached the position in `fen`, newest first, with the
+    ply it was first reached at. Further pages continue from X-Next-Cursor.
+    Games still waiting for the position index job are not found yet.
+    """
+    limit = max(1, min(limit, POSITION_SEARCH_MAX_LIMIT))
+    try:
+        key = fen_key(fen)
+        before_id = None
+        if cursor:
+            cursor_key, before_id = decode_cursor(cursor, "position")
+            if cursor_key != key:
+                raise ValueError("Cursor belongs to another position")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    hits = position_game_ids(db.connection(), key, before_id, limit)
+    if len(hits) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor("position", key, hits[-1].game_id)
+    plies = {hit.game_id: hit.ply for hit in hits}
+    if not plies:
+        return []
+    games = (
+        db.query(*[Game.__table__.c[name] for name in GAME_SUMMARY_FIELDS])
+        .filter(Game.id.in_(plies))
+        .order_by(Game.id.desc())
+        .all()
+    )
+    return [{**{name: getattr(g, name) for name in GAME_SUMMARY_FIELDS}, "ply": plies[g.id]} for g in games]
+
+@app.get("/api/explorer")
+def opening_explorer(
+    fen: str,
+    min_elo: int = None,
+    max_elo: int = None,
+    from_year: int = None,
+    to_year: int = None,
+    db: Session = Depends(get_read_db)
+):
+    """
+    Moves played from the position in `fen` with game counts, results and the
+    average Elo of the player making the move. Elo filters apply to the game's
+    average Elo in steps of 100.
+    """
+    try:
+        board = chess.Board(fen)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    moves = []
+    for row in explorer_moves(db.connection(), position_key(board), min_elo, max_elo, from_year, to_year):
+        move = decode_move(row.move)
+        if not board.is_legal(move):
+            continue # Zobrist collision with another position
+        moves.append({
+            "uci": move.uci(),
+            "san": board.san(move),
+            "games": row.games,
+            "white": row.white_wins,
+            "draws": row.draws,
+            "black": row.black_wins,
+            "score": round((row.white_wins + row.draws / 2) / row.games * 100, 1), # From White's side
+            "avg_elo": round(row.elo_sum / row.elo_games) if row.elo_games else None,
+        })
+    return {"fen": board.fen(), "games": sum(m["games"] for m in moves), "moves": moves}
+
+@app.get("/api/games/{game_id}")
+def get_game(game_id: int, fields: str = "all", db: Session = Depends(get_read_db)):
+    """One game with its PGN (every column by default), for opening it from a list"""
+    names = game_fields(fields)
+    game = db.query(*game_columns(names)).filter(Game.id == game_id).first()
+    if not game:
+        raise HTTPException(status_code=404, detail="Game not found")
+    return game_dict(game, names)
+
+@app.get("/api/players")
+def search_players(q: str = "", limit: int = 20, db: Session = Depends(get_read_db)):
+    """Players whose name starts with q (case and accent insensitive), by name, with their game counts"""
+    key = normalize_player_name(q)
+    if not key:
+        return []
+    # A range on the players.normalized index, then counts for just the players returned
+    players = (
+        db.query(Player)
+        .filter(name_prefix_filter(Player.normalized, key))
+        .order_by(Player.normalized)
+        .limit(limit)
+        .all()
+    )
+    ids = [p.id for p in players]
+    games = {}
+    for column in (Game.white_id, Game.black_id):
+        for player_id, n in db.query(column, func.count(Game.id)).filter(column.in_(ids)).group_by(column):
+            games[player_id] = games.get(player_id, 0) + n
+    return [{"id": p.id, "name": p.name, "fide_id": p.fide_id, "games": games.get(p.id, 0)} for p in players]
+
+@app.get("/api/players/{player_id}")
+def get_player(player_id: int, db: Session = Depends(get_read_db)):
+    """A player with their score by colour, counted on the white_id / black_id indexes"""
+    player = db.query(Player).filter(Player.id == player_id).first()
+    if not player:
+        raise HTTPException(status_code=404, detail="Player not found")
+
+    def score(column, win):
+        rows = db.query(Game.result, func.count(Game.id)).filter(column == player_id).group_by(Game.result).all()
+        counts = dict(rows)
+        return {
+            "games": sum(counts.values()),
+            "wins": counts.get(win, 0),
+            "draws": counts.get("1/2-1/2", 0),
+            "losses": counts.get("0-1" if win == "1-0" else "1-0", 0),
+        }
+
+    return {
+        "id": player.id,
+        "name": player.name,
+        "fide_id": player.fide_id,
+        "white": score(Game.white_id, "1-0"),
+        "black": score(Game.black_id, "0-1"),
+    }
 
 @app.get("/api/stats")
-def get_stats(db: Session = Depends(get_db)):
-    # Get list of excluded issue numbers
-    excluded_issues = db.query(ExcludedIssue.twic_issue).all()
-    excluded_ids = [e[0] for e in excluded_issues]
-    
-    # Get breakdown of unexcluded issues
-    from sqlalchemy import func
-    breakdown_query = db.query(Game.twic_issue, func.count(Game.id)).group_by(Game.twic_issue)
-    if excluded_ids:
-        breakdown_query = breakdown_query.filter(Game.twic_issue.notin_(excluded_ids))
-    
-    breakdown_results = breakdown_query.all()
-    # Format: "issue-1574: 39228, issue-1628: 6014"
-    breakdown_str = ", ".join([f"issue-{r[0]}: {r[1]}" for r in sorted(breakdown_results, key=lambda x: x[0], reverse=True)])
-    
-    query = db.query(Game)
-    if excluded_ids:
-        query = query.filter(Game.twic_issue.notin_(excluded_ids))
-        
-    total_games = query.count()
+def get_stats(db: Session = Depends(get_read_db)):
+    # Served from issue_stats (one row per issue or upload), not by counting games
+    excluded_ids = {e[0] for e in db.query(ExcludedIssue.twic_issue)}
+    counts = {}
+    for stat in db.query(IssueStat.twic_issue, IssueStat.games):
+        if stat.twic_issue not in excluded_ids:
+            counts[stat.twic_issue] = counts.get(stat.twic_issue, 0) + stat.games
+
+    # Format: "issue-1574: 39228, issue-1628: 6014, uploads: 1200"
+    breakdown_str = ", ".join([
+        f"issue-{issue}: {n}" if issue is not None else f"uploads: {n}"
+        for issue, n in sorted(counts.items(), key=lambda x: x[0] or 0, reverse=True)
+    ])
+    total_games = sum(counts.values())
     
     return {
         "total_games": total_games,
@@ -635,10 +1031,15 @@ def parse_pgn_api(request: PgnRequest):
     }
 
 @app.get("/api/events")
-def get_events(db: Session = Depends(get_db)):
-    """Get all distinct events from the database for filter dropdown"""
-    events = db.query(Game.event).distinct().order_by(Game.event).all()
-    return [e[0] for e in events if e[0]]
+def get_events(prefix: str = None, limit: int = None, db: Session = Depends(get_read_db)):
+    """
+    Distinct events for the filter dropdown, from the events catalog. With
+    `prefix`, names starting with it (ignoring case and accents) for autocomplete.
+    """
+    if prefix:
+        return events_with_prefix(db.connection(), prefix, limit or 20)
+    names = event_names(db.connection())
+    return names[:limit] if limit else names
 
 from fastapi import WebSocket, WebSocketDisconnect
 import asyncio
@@ -1077,6 +1478,11 @@ if os.path.exists(frontend_dist):
         return FileResponse(os.path.join(frontend_dist, "index.html"))
 
 if __name__ == "__main__":
+    import multiprocessing
+    # Parallel PGN imports use a process pool; frozen (PyInstaller) builds must
+    # let the worker processes bootstrap before starting the app.
+    multiprocessing.freeze_support()
+
     import threading
     import webbrowser
     import time
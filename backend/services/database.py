@@ -1,47 +1,189 @@
 
-from sqlalchemy import create_engine, Column, Integer, String, Text, Date, ForeignKey
+from sqlalchemy import create_engine, event, text, Column, Index, Integer, BigInteger, String, Text, Float, ForeignKey, LargeBinary
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 import os
+import sqlite3
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 
+from .search import register_sqlite_functions, ensure_search_index, set_trigger_sync
+from .eco import ECO_CODE_BACKFILL
+from .dates import DATE_KEY_BACKFILL, DATE_PRECISION_BACKFILL
+from .positions import ensure_position_index, position_index_current
+from .issue_stats import ensure_issue_stats
+from .event_catalog import ensure_event_catalog
+from .pgn_store import register_pgn_functions
+
 # Use a permanent location in the user's home directory so it's not tied to App Bundle
 USER_DIR = Path.home() / ".macbase"
 USER_DIR.mkdir(parents=True, exist_ok=True)
 
 DATABASE_URL = f"sqlite:///{USER_DIR}/macbase.db"
 
+# Pragmas for every connection. WAL lets the API read while an import writes
+# (readers see the last commit instead of waiting on the write lock); with WAL,
+# synchronous=NORMAL only risks the last commits on power loss, not corruption.
+# The cache and mmap sizes can be set with MACBASE_SQLITE_* environment variables.
+CONNECTION_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": int(os.environ.get("MACBASE_SQLITE_MMAP_SIZE", 256 * 1024 * 1024)),
+    "cache_size": int(os.environ.get("MACBASE_SQLITE_CACHE_SIZE", -64000)), # negative = KiB
+    "temp_store": os.environ.get("MACBASE_SQLITE_TEMP_STORE", "MEMORY"),
+}
+
+# Connections in the reader pool, for the API's read-only endpoints
+READER_POOL_SIZE = int(os.environ.get("MACBASE_SQLITE_READERS", 4))
+
+def apply_connection_pragmas(dbapi_connection, connection_record=None):
+    """SQLAlchemy 'connect' listener for CONNECTION_PRAGMAS"""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        for name, value in CONNECTION_PRAGMAS.items():
+            dbapi_connection.execute(f"PRAGMA {name} = {value}")
+
+def set_query_only(dbapi_connection, connection_record=None):
+    """'connect' listener that makes a connection refuse writes"""
+    dbapi_connection.execute("PRAGMA query_only = ON")
+
+# Every SQLite connection gets the pragmas and the SQL functions the triggers call
+event.listen(Engine, "connect", apply_connection_pragmas)
+event.listen(Engine, "connect", register_sqlite_functions)
+event.listen(Engine, "connect", register_pgn_functions)
+
+# Read-write engine: imports and background jobs (serialized by import_write_lock), and API writes
 engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Read-only pool for the browsing endpoints, so they never queue behind a writer's connection
+reader_engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False}, pool_size=READER_POOL_SIZE)
+event.listen(reader_engine, "connect", set_query_only)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=reader_engine)
+
 Base = declarative_base()
 
 class Game(Base):
     __tablename__ = "games"
+    # Games the positions job still has to replay, see maintenance.index_positions
+    __table_args__ = (
+        Index("ix_games_unreplayed", "id", sqlite_where=text("position_count IS NULL OR moves IS NULL")),
+        Index("ix_games_date_key", "date_key", "id"), # ORDER BY date_key DESC, id DESC for the date sort
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     event = Column(String, index=True)
     site = Column(String)
     date = Column(String) # Storing as string YYYY.MM.DD standard in chess
+    date_key = Column(Integer, nullable=False, default=0, server_default="0") # YYYYMMDD, unknown parts as 00, see dates.date_key
+    date_precision = Column(Integer, nullable=False, default=0, server_default="0") # dates.DATE_UNKNOWN / DATE_YEAR / DATE_MONTH / DATE_DAY
     round = Column(String)
     white = Column(String, index=True)
     black = Column(String, index=True)
+    white_id = Column(Integer, ForeignKey("players.id"), nullable=True, index=True)
+    black_id = Column(Integer, ForeignKey("players.id"), nullable=True, index=True)
     result = Column(String)
     eco = Column(String)
+    eco_code = Column(Integer, nullable=True, index=True) # ECO as 0 (A00) to 499 (E99), see eco.eco_to_code
     opening = Column(String, nullable=True)  # Opening name from PGN header
-    white_elo = Column(Integer, nullable=True)
-    black_elo = Column(Integer, nullable=True)
-    pgn = Column(Text) # storing the full PGN text for analysis
+    white_elo = Column(Integer, nullable=True, index=True) # Indexed for the Elo sort orders
+    black_elo = Column(Integer, nullable=True, index=True)
+    pgn = Column(Text) # Full PGN text, only for games stored before pgn_z
+    pgn_z = Column(LargeBinary, nullable=True) # Compressed non-column headers + movetext, see pgn_store.game_pgn
     twic_issue = Column(Integer, index=True) # To track which issue this came from
+    source = Column(String, nullable=True, index=True) # 'twic:<issue>' or 'upload:<name>' for uploaded files
     is_commented = Column(Integer, default=0, index=True) # 0 = no, 1 = yes
     is_personal = Column(Integer, default=0, index=True) # 1 = user analyzed this game
+    content_hash = Column(String, nullable=True, unique=True, index=True) # Players + date + round + bare movetext, see pgn_scanner.content_hash
+    duplicate_checked = Column(Integer, nullable=True) # 1 = kept duplicate without a content_hash, see maintenance.dedupe_games
+    position_count = Column(Integer, nullable=True, index=True) # Positions in the position index, NULL until indexed
+    moves = Column(LargeBinary, nullable=True) # Mainline as 16-bit move codes, see move_codes.py; NULL until the positions job ran
+
+class GamePosition(Base):
+    __tablename__ = "game_positions"
+    # Clustered on (hash, game_id), see positions.py; the game_id index serves deletes
+    __table_args__ = (Index("ix_game_positions_game_id", "game_id"), {"sqlite_with_rowid": False})
+
+    hash = Column(BigInteger, primary_key=True, autoincrement=False) # positions.position_key
+    game_id = Column(Integer, primary_key=True, autoincrement=False)
+    ply = Column(Integer) # First ply the position was reached at
+    move = Column(Integer, nullable=True) # Move then played from it, positions.encode_move; NULL at the end of the game
+
+class OpeningMove(Base):
+    __tablename__ = "opening_moves"
+    # Explorer counters, see positions.py; clustered so one position is one range scan
+    __table_args__ = {"sqlite_with_rowid": False}
+
+    hash = Column(BigInteger, primary_key=True, autoincrement=False)
+    move = Column(Integer, primary_key=True, autoincrement=False)
+    year = Column(Integer, primary_key=True, autoincrement=False) # 0 if unknown
+    elo_band = Column(Integer, primary_key=True, autoincrement=False) # Average Elo rounded down to 100, 0 if unrated
+    games = Column(Integer, default=0)
+    white_wins = Column(Integer, default=0)
+    draws = Column(Integer, default=0)
+    black_wins = Column(Integer, default=0)
+    elo_sum = Column(Integer, default=0) # Elo of the player making the move, over elo_games games
+    elo_games = Column(Integer, default=0)
+
+class Player(Base):
+    __tablename__ = "players"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String) # Canonical spelling, as first imported
+    normalized = Column(String, unique=True, index=True) # Matching key, see players.normalize_player_name
+    fide_id = Column(Integer, nullable=True, index=True)
+
+class IssueStat(Base):
+    __tablename__ = "issue_stats"
+
+    source = Column(String, primary_key=True) # Same as games.source, '' for games without one
+    twic_issue = Column(Integer, nullable=True, index=True)
+    games = Column(Integer, default=0)
+    first_id = Column(Integer, nullable=True) # Lowest and highest game id of the source
+    last_id = Column(Integer, nullable=True)
+    imported_at = Column(String) # ISO date of the last batch imported
+
+class EventName(Base):
+    __tablename__ = "events"
+
+    name = Column(String, primary_key=True) # As written in the PGN Event tag
+    folded = Column(String, index=True) # search.fold_text(name), for prefix lookups
+    games = Column(Integer, default=0)
 
 class ExcludedIssue(Base):
     __tablename__ = "excluded_issues"
     id = Column(Integer, primary_key=True, index=True)
     twic_issue = Column(Integer, unique=True, index=True)
 
+class ImportJob(Base):
+    __tablename__ = "import_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, default="twic") # What the job runs, e.g. 'twic'
+    twic_issue = Column(Integer, nullable=True, index=True)
+    source = Column(String, nullable=True) # Source tag for 'upload' jobs
+    file_path = Column(String, nullable=True) # Uploaded file to import
+    status = Column(String, default="queued", index=True) # queued, processing, success, error, cancelled
+    progress = Column(String, default="")
+    message = Column(String, default="")
+    games = Column(Integer, default=0) # Games imported so far
+    games_per_sec = Column(Float, nullable=True)
+    cancel_requested = Column(Integer, default=0)
+    created_at = Column(String) # ISO date strings
+    started_at = Column(String, nullable=True)
+    finished_at = Column(String, nullable=True)
+
+class ImportCheckpoint(Base):
+    __tablename__ = "import_checkpoints"
+
+    source = Column(String, primary_key=True) # e.g. 'twic:1620'
+    byte_offset = Column(Integer, default=0) # End of the last committed game in the PGN
+    games = Column(Integer, default=0) # Games read up to byte_offset
+    completed = Column(Integer, default=0)
+    updated_at = Column(String)
+
 class RepertoireFolder(Base):
     __tablename__ = "repertoire_folders"
 
@@ -70,5 +212,97 @@ class RepertoireGame(Base):
     tags = Column(String, nullable=True) # Comma separated tags (e.g., 'Opening:B01,Tactic')
     created_at = Column(String)
 
-def init_db():
-    Base.metadata.create_all(bind=engine)
+# Pragmas applied to the bulk import connection only, restored once the import is done.
+# synchronous=OFF trades crash-durability of the in-flight batch for raw insert speed;
+# a failed import is simply re-run.
+IMPORT_PRAGMAS = {
+    "synchronous": "OFF",
+    "cache_size": -200000,  # negative = KiB, so ~200MB of page cache
+    "temp_store": "MEMORY",
+}
+
+# Serializes bulk writers (concurrent import jobs) so they queue up in-process
+# instead of waiting on SQLite's busy timeout.
+import_write_lock = threading.Lock()
+
+def enable_incremental_vacuum(conn):
+    """
+    Switch a database to auto_vacuum=INCREMENTAL, so maintenance.reclaim_space
+    can shrink the file a step at a time. The mode only takes effect through a
+    VACUUM, which rewrites the whole file: instant for a new database, one long
+    write for an existing one.
+    """
+    conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.exec_driver_sql("VACUUM")
+
+def init_db(bind=None):
+    bind = bind or engine
+    with bind.connect() as conn:
+        if conn.exec_driver_sql("SELECT 1 FROM sqlite_master LIMIT 1").first() is None:
+            enable_incremental_vacuum(conn)
+    Base.metadata.create_all(bind=bind)
+    migrate_schema(bind)
+    with bind.begin() as conn:
+        ensure_search_index(conn)
+        ensure_issue_stats(conn)
+        ensure_event_catalog(conn)
+    # init_db runs before every import: only a changed definition is written, atomically
+    # (pysqlite doesn't open a transaction for DDL) and with the other writers held off
+    with bind.connect() as conn:
+        current = position_index_current(conn)
+    if not current:
+        with import_write_lock, bind.begin() as conn:
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            ensure_position_index(conn)
+
+# SQL to fill a column for existing rows right after migrate_schema adds it
+COLUMN_BACKFILLS = {
+    ("games", "source"): "UPDATE games SET source = 'twic:' || twic_issue WHERE twic_issue IS NOT NULL",
+    ("games", "eco_code"): ECO_CODE_BACKFILL,
+    ("games", "date_key"): DATE_KEY_BACKFILL,
+    ("games", "date_precision"): DATE_PRECISION_BACKFILL,
+    # Positions indexed before the explorer have no moves, index those games again
+    ("game_positions", "move"): "UPDATE games SET position_count = NULL",
+}
+
+def migrate_schema(bind):
+    """
+    create_all only creates missing tables. Add columns that were introduced
+    after a table was created, then any indexes missing from existing tables.
+    """
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table.name})")}
+            missing = [c for c in table.columns if c.name not in existing]
+            for column in missing:
+                col_type = column.type.compile(dialect=conn.dialect)
+                conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}")
+                backfill = COLUMN_BACKFILLS.get((table.name, column.name))
+                if backfill:
+                    conn.exec_driver_sql(backfill)
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+@contextmanager
+def bulk_import_connection(bind=None, pragmas=None):
+    """
+    Yield a Core connection tuned for bulk inserts; pragmas are reset on exit.
+    The search index insert trigger is off on this connection, so callers
+    must index what they insert (see search.index_games_after).
+    """
+    pragmas = IMPORT_PRAGMAS if pragmas is None else pragmas
+    with (bind or engine).connect() as conn:
+        previous = {}
+        for name, value in pragmas.items():
+            previous[name] = conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+            conn.exec_driver_sql(f"PRAGMA {name} = {value}")
+        set_trigger_sync(conn, False)
+        conn.commit()
+        try:
+            yield conn
+        finally:
+            conn.rollback()
+            for name, value in previous.items():
+                conn.exec_driver_sql(f"PRAGMA {name} = {value}")
+            set_trigger_sync(conn, True)
+            conn.commit()
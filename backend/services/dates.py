@@ -0,0 +1,50 @@
+# PGN dates as sortable integers: '2024.03.15' -> 20240315.
+# games.date is free text and often partly unknown ('2024.??.??'), so sorting on
+# it mixed formats. games.date_key is indexed with id for the date sort order;
+# unknown months and days become 00, so '2024.03.??' (20240300) sorts before
+# every known day of March 2024. Games without a year get 0 and sort last; the
+# column is never NULL, which keeps the keyset condition a plain index range.
+
+# games.date_precision: how much of the date was known
+DATE_UNKNOWN = 0
+DATE_YEAR = 1
+DATE_MONTH = 2
+DATE_DAY = 3
+
+def _digits(text):
+    return all(c in "0123456789" for c in text)
+
+def _part(text, low, high):
+    """Two-digit month / day in [low, high], None otherwise"""
+    if len(text) == 2 and _digits(text) and low <= int(text) <= high:
+        return int(text)
+    return None
+
+def date_key(date):
+    """(key, precision) for a PGN date: '2024.03.??' -> (20240300, DATE_MONTH), unknown -> (0, DATE_UNKNOWN)"""
+    date = date or ""
+    year = date[:4]
+    if len(year) != 4 or not _digits(year) or year == "0000":
+        return 0, DATE_UNKNOWN
+    month = _part(date[5:7], 1, 12)
+    if month is None:
+        return int(year) * 10000, DATE_YEAR
+    day = _part(date[8:10], 1, 31)
+    if day is None:
+        return int(year) * 10000 + month * 100, DATE_MONTH
+    return int(year) * 10000 + month * 100 + day, DATE_DAY
+
+# Fill date_key / date_precision for rows stored before the columns existed, same mapping as date_key
+_MONTH_SQL = "(substr(date, 6, 2) GLOB '[0-9][0-9]' AND CAST(substr(date, 6, 2) AS INTEGER) BETWEEN 1 AND 12)"
+_DAY_SQL = "(substr(date, 9, 2) GLOB '[0-9][0-9]' AND CAST(substr(date, 9, 2) AS INTEGER) BETWEEN 1 AND 31)"
+DATE_KEY_BACKFILL = (
+    "UPDATE games SET date_key = CASE WHEN substr(date, 1, 4) GLOB '[0-9][0-9][0-9][0-9]' AND substr(date, 1, 4) != '0000' THEN "
+    "CAST(substr(date, 1, 4) AS INTEGER) * 10000 "
+    f"+ CASE WHEN {_MONTH_SQL} THEN CAST(substr(date, 6, 2) AS INTEGER) * 100 "
+    f"+ CASE WHEN {_DAY_SQL} THEN CAST(substr(date, 9, 2) AS INTEGER) ELSE 0 END ELSE 0 END "
+    "ELSE 0 END"
+)
+DATE_PRECISION_BACKFILL = (
+    f"UPDATE games SET date_precision = CASE WHEN date_key < 10000 THEN {DATE_UNKNOWN} "
+    f"WHEN date_key % 100 != 0 THEN {DATE_DAY} WHEN date_key % 10000 != 0 THEN {DATE_MONTH} ELSE {DATE_YEAR} END"
+)
@@ -0,0 +1,68 @@
+import re
+
+# ECO codes as sortable integers: A00 -> 0, A99 -> 99, B00 -> 100 ... E99 -> 499.
+# games.eco_code is indexed, so an opening family like B20-B99 is one index range
+# scan instead of a LIKE or a chain of OR'ed prefix matches on the text column.
+
+ECO_RE = re.compile(r"^([A-E])(\d\d)")
+ECO_PREFIX_RE = re.compile(r"^([A-E])(\d{0,2})$")
+
+def eco_to_code(eco):
+    """'B90' -> 190, None for anything that isn't an ECO code"""
+    match = ECO_RE.match((eco or "").strip().upper())
+    if not match:
+        return None
+    return (ord(match.group(1)) - ord("A")) * 100 + int(match.group(2))
+
+def code_to_eco(code):
+    return f"{chr(ord('A') + code // 100)}{code % 100:02d}"
+
+def prefix_range(prefix):
+    """'B9' -> (190, 199), 'B' -> (100, 199), 'B01' -> (101, 101); raises ValueError otherwise"""
+    match = ECO_PREFIX_RE.match(prefix.strip().upper())
+    if not match:
+        raise ValueError(f"Invalid ECO code or prefix: '{prefix}'")
+    base = (ord(match.group(1)) - ord("A")) * 100
+    digits = match.group(2)
+    if len(digits) == 2:
+        return base + int(digits), base + int(digits)
+    if len(digits) == 1:
+        return base + int(digits) * 10, base + int(digits) * 10 + 9
+    return base, base + 99
+
+def parse_eco_ranges(spec):
+    """
+    Merged (low, high) code ranges from a spec like 'B20-B99', 'C6,C7' or
+    'D06,D10-D69'. Each comma-separated part is a code, a prefix, or two of
+    them joined by '-'. Raises ValueError for anything else.
+    """
+    parts = spec if isinstance(spec, (list, tuple)) else spec.split(",")
+    ranges = []
+    for part in parts:
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            low, high = prefix_range(start)[0], prefix_range(end)[1]
+            if low > high:
+                raise ValueError(f"Empty ECO range: '{part}'")
+        else:
+            low, high = prefix_range(part)
+        ranges.append((low, high))
+    if not ranges:
+        raise ValueError("Empty ECO range")
+
+    merged = []
+    for low, high in sorted(ranges):
+        if merged and low <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], high))
+        else:
+            merged.append((low, high))
+    return merged
+
+# Fills eco_code for rows stored before the column existed, same mapping as eco_to_code
+ECO_CODE_BACKFILL = (
+    "UPDATE games SET eco_code = (unicode(upper(substr(eco, 1, 1))) - 65) * 100 + CAST(substr(eco, 2, 2) AS INTEGER) "
+    "WHERE upper(substr(eco, 1, 3)) GLOB '[A-E][0-9][0-9]'"
+)
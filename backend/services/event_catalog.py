@@ -0,0 +1,68 @@
+import threading
+
+from .search import fold_text
+
+# Catalog of distinct event names with their game counts.
+# The Database page's event list used to be a SELECT DISTINCT over all games.
+# The `events` table is updated with each import batch and before games are
+# deleted; prefix lookups are a range scan on its folded-name index, and the
+# full list is kept in memory until the catalog changes.
+
+CATALOG_TABLE = "events"
+
+_RECORD_FROM_GAMES = f"""
+    INSERT INTO {CATALOG_TABLE} (name, folded, games)
+    SELECT event, macbase_fold(event), COUNT(*) FROM games
+    WHERE id > ? AND event IS NOT NULL AND event != '' GROUP BY event
+    ON CONFLICT(name) DO UPDATE SET games = games + excluded.games
+"""
+
+_lock = threading.Lock()
+_cache = {"version": 0, "names": {}} # names: database URL -> (version, names)
+
+def invalidate_event_cache():
+    """Call after committing a change to the catalog"""
+    with _lock:
+        _cache["version"] += 1
+
+def record_events_after(conn, last_id):
+    """Count the events of games with id > last_id, i.e. the batch an import just inserted"""
+    conn.exec_driver_sql(_RECORD_FROM_GAMES, (last_id,))
+
+def forget_events(conn, where, params=()):
+    """Uncount the events of the games matching `where`; call before deleting them, in the same transaction"""
+    conn.exec_driver_sql(
+        f"UPDATE {CATALOG_TABLE} SET games = games - d.n "
+        f"FROM (SELECT event, COUNT(*) AS n FROM games WHERE {where} GROUP BY event) AS d "
+        f"WHERE {CATALOG_TABLE}.name = d.event",
+        params,
+    )
+    conn.exec_driver_sql(f"DELETE FROM {CATALOG_TABLE} WHERE games <= 0")
+
+def ensure_event_catalog(conn):
+    """Fill the catalog once if it's empty, e.g. for a database from before it existed"""
+    if conn.exec_driver_sql(f"SELECT 1 FROM {CATALOG_TABLE} LIMIT 1").first() is None:
+        record_events_after(conn, 0)
+
+def event_names(conn):
+    """Every event name, sorted; served from memory until invalidate_event_cache()"""
+    url = str(conn.engine.url)
+    with _lock:
+        version = _cache["version"]
+        cached = _cache["names"].get(url)
+        if cached and cached[0] == version:
+            return cached[1]
+    names = [r[0] for r in conn.exec_driver_sql(f"SELECT name FROM {CATALOG_TABLE} ORDER BY name")]
+    with _lock:
+        # Only keep the result if nothing changed while it was read
+        if _cache["version"] == version:
+            _cache["names"][url] = (version, names)
+    return names
+
+def events_with_prefix(conn, prefix, limit=20):
+    """Event names starting with `prefix`, ignoring case and diacritics, in folded order"""
+    folded = fold_text(prefix)
+    return [r[0] for r in conn.exec_driver_sql(
+        f"SELECT name FROM {CATALOG_TABLE} WHERE folded >= ? AND folded < ? ORDER BY folded LIMIT ?",
+        (folded, folded + "\U0010ffff", limit),
+    )]
@@ -0,0 +1,38 @@
+from sqlalchemy import func
+
+from .database import Game, IssueStat
+
+# Result counts for the Database page ("N games match").
+# A whole issue, upload or the whole database is one read of the issue_stats
+# counters. Other filters are counted by walking the matches newest first, as
+# the page query does, and stop after COUNT_EXACT_LIMIT; past that the count is
+# extrapolated from how much of the id range those matches took.
+
+COUNT_EXACT_LIMIT = 10000
+
+def counted_games(db, twic_issue=None, source=None):
+    """Games in a TWIC issue, a source, or the whole database, from issue_stats"""
+    query = db.query(func.coalesce(func.sum(IssueStat.games), 0))
+    if twic_issue:
+        query = query.filter(IssueStat.twic_issue == twic_issue)
+    if source:
+        query = query.filter(IssueStat.source == source)
+    return query.scalar()
+
+def capped_count(query, limit=COUNT_EXACT_LIMIT, total=None):
+    """
+    (count, exact) for a filtered query over Game. Past `limit` matches the
+    count is an estimate, at most `total` when given.
+    """
+    db = query.session
+    newest = query.with_entities(Game.id).order_by(Game.id.desc()).limit(limit + 1).subquery()
+    count, oldest = db.query(func.count(), func.min(newest.c.id)).select_from(newest).one()
+    if count <= limit:
+        return count, True
+
+    # The newest limit + 1 matches span ids oldest..last; assume the rest are spread alike
+    first, last = db.query(func.min(Game.id), func.max(Game.id)).one()
+    estimate = round(count * (last - first + 1) / (last - oldest + 1))
+    if total is not None:
+        estimate = min(estimate, total)
+    return max(estimate, count), False
@@ -0,0 +1,193 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Shared HTTP layer for everything that talks to theweekinchess.com.
+# One pooled keep-alive session, conditional GETs against an on-disk cache,
+# Range-resumable downloads and bounded retries with exponential backoff.
+# MACBASE_TWIC_URL points the app at another server (e.g. a local stand-in for tests).
+
+TWIC_SITE_URL = os.environ.get("MACBASE_TWIC_URL", "https://theweekinchess.com")
+HTTP_CACHE_DIR = Path.home() / ".macbase" / "cache" / "http"
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+STREAM_ERRORS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+
+class HttpClient:
+    def __init__(self, base_url=TWIC_SITE_URL, cache_dir=HTTP_CACHE_DIR, retries=3, backoff=0.5, pool_size=10):
+        self.base_url = base_url.rstrip("/")
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.retries = retries
+        self.backoff = backoff
+
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=("GET", "HEAD"),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def url(self, path):
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def _cache_paths(self, url):
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{key}.body", self.cache_dir / f"{key}.json"
+
+    def get_text(self, path, timeout=10, max_age=0):
+        """
+        GET a page through the disk cache. A cached copy younger than max_age
+        seconds is returned without touching the network; otherwise it is
+        revalidated with If-None-Match / If-Modified-Since and a 304 reuses it.
+        """
+        url = self.url(path)
+        body_path, meta_path = self._cache_paths(url)
+        meta = {}
+        if body_path.exists() and meta_path.exists():
+            try:
+                meta = json.loads(meta_path.read_text())
+            except ValueError:
+                meta = {}
+        if meta and max_age and time.time() - meta.get("fetched_at", 0) < max_age:
+            return body_path.read_text(encoding="utf-8")
+
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+        response = self.session.get(url, headers=headers, timeout=timeout)
+        if response.status_code == 304 and meta:
+            meta["fetched_at"] = time.time()
+            meta_path.write_text(json.dumps(meta))
+            return body_path.read_text(encoding="utf-8")
+        response.raise_for_status()
+
+        text = response.text
+        meta = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+        }
+        body_path.write_text(text, encoding="utf-8")
+        meta_path.write_text(json.dumps(meta))
+        return text
+
+    def download(self, path, dest=None, chunk_size=64 * 1024, timeout=30):
+        """
+        Return an iterator over the bytes of `path`, from the first byte on.
+
+        With dest, the body is saved to dest + '.part' and renamed to dest when
+        complete. A complete dest is read back from disk without any request; a
+        leftover .part is resumed with a Range request (guarded by If-Range) and
+        its bytes are replayed first. Dropped connections are resumed from the
+        last received byte, up to `retries` times with exponential backoff.
+
+        The first request is made before returning, so HTTP errors (404 for an
+        issue that doesn't exist yet) raise here rather than mid-iteration.
+        """
+        if dest and os.path.exists(dest):
+            return _read_file(dest, chunk_size)
+
+        url = self.url(path)
+        part = f"{dest}.part" if dest else None
+        validator_path = f"{dest}.validator" if dest else None
+        received = os.path.getsize(part) if part and os.path.exists(part) else 0
+        validator = None
+        if received and os.path.exists(validator_path):
+            with open(validator_path) as f:
+                validator = f.read().strip() or None
+
+        def request(offset, resume_validator):
+            headers = {}
+            if offset:
+                headers["Range"] = f"bytes={offset}-"
+                if resume_validator:
+                    headers["If-Range"] = resume_validator
+            response = self.session.get(url, headers=headers, stream=True, timeout=timeout)
+            response.raise_for_status()
+            return response
+
+        response = request(received, validator)
+        if received and response.status_code != 206:
+            # The server sent the whole file (it changed, or ignores Range): start over
+            received = 0
+        validator = response.headers.get("ETag") or response.headers.get("Last-Modified")
+        if validator_path and validator:
+            with open(validator_path, "w") as f:
+                f.write(validator)
+
+        def chunks(response):
+            nonlocal received
+            yielded = 0
+            if part and received:
+                for chunk in _read_file(part, chunk_size):
+                    yielded += len(chunk)
+                    yield chunk
+            out = open(part, "ab" if received else "wb") if part else None
+            attempt = 0
+            try:
+                while True:
+                    try:
+                        for chunk in response.iter_content(chunk_size=chunk_size):
+                            if not chunk:
+                                continue
+                            if out:
+                                out.write(chunk)
+                            received += len(chunk)
+                            yielded += len(chunk)
+                            yield chunk
+                        break
+                    except STREAM_ERRORS:
+                        response.close()
+                        attempt += 1
+                        if attempt > self.retries:
+                            raise
+                        time.sleep(self.backoff * (2 ** (attempt - 1)))
+                        response = request(received, validator)
+                        if response.status_code != 206:
+                            raise IOError(f"Server restarted {url} instead of resuming it")
+            finally:
+                response.close()
+                if out:
+                    out.close()
+
+            if part:
+                os.replace(part, dest)
+                if os.path.exists(validator_path):
+                    os.remove(validator_path)
+
+        return chunks(response)
+
+def _read_file(path, chunk_size):
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+_twic_client = None
+
+def get_twic_client():
+    """Process-wide client for the TWIC site, so every caller shares one connection pool"""
+    global _twic_client
+    if _twic_client is None:
+        _twic_client = HttpClient()
+    return _twic_client
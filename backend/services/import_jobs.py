@@ -0,0 +1,271 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from sqlalchemy import and_
+
+from .database import SessionLocal, ImportJob, init_db
+
+# Persistent import job queue.
+# Jobs live in the `import_jobs` table so queued work and history survive a restart,
+# and a bounded thread pool decides how many imports run at once.
+
+ACTIVE_STATES = ("queued", "processing")
+FINISHED_STATES = ("success", "error", "cancelled")
+
+# Minimum seconds between progress writes, so a fast import doesn't turn into a stream of UPDATEs
+PROGRESS_WRITE_INTERVAL = 0.5
+
+class ImportCancelled(Exception):
+    """Raised from a progress report once the job has been cancelled"""
+
+def job_to_dict(job):
+    started = datetime.fromisoformat(job.started_at) if job.started_at else None
+    finished = datetime.fromisoformat(job.finished_at) if job.finished_at else None
+    end = finished or (datetime.utcnow() if started else None)
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "twic_issue": job.twic_issue,
+        "source": job.source,
+        "status": job.status,
+        "progress": job.progress or "",
+        "message": job.message or "",
+        "games": job.games or 0,
+        "games_per_sec": round(job.games_per_sec, 1) if job.games_per_sec else None,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "elapsed_sec": round((end - started).total_seconds(), 1) if started else None,
+    }
+
+class JobContext:
+    """Handed to a runner: report progress and check for cancellation"""
+
+    def __init__(self, queue, job_id):
+        self._queue = queue
+        self.job_id = job_id
+        self.games = 0
+        self.games_per_sec = None
+        self._last_write = 0.0
+
+    def cancelled(self):
+        return self._queue.is_cancelled(self.job_id)
+
+    def report(self, progress, games=None, games_per_sec=None, force=False):
+        """Record progress; raises ImportCancelled if the job was cancelled meanwhile"""
+        if games is not None:
+            self.games = games
+        if games_per_sec is not None:
+            self.games_per_sec = games_per_sec
+        now = time.monotonic()
+        if force or now - self._last_write >= PROGRESS_WRITE_INTERVAL:
+            self._last_write = now
+            self._queue._update(self.job_id, progress=progress, games=self.games, games_per_sec=self.games_per_sec)
+        if self.cancelled():
+            raise ImportCancelled()
+
+class ImportJobQueue:
+    """
+    Bounded worker pool over the `import_jobs` table.
+
+    `runners` maps a job kind to a callable(job, ctx) returning (success, message).
+    A runner reports through ctx.report(), which raises ImportCancelled once the
+    job is cancelled so imports stop at the next batch.
+    """
+
+    def __init__(self, runners, max_workers=2, session_factory=SessionLocal):
+        self.runners = runners
+        self.max_workers = max_workers
+        self.session_factory = session_factory
+        self._executor = None
+        self._cancelled = set()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Create the worker pool and pick up jobs left over from the last run"""
+        with self._lock:
+            if self._executor is not None:
+                return
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="import-job")
+
+        db = self.session_factory()
+        try:
+            init_db(db.get_bind())
+            # Anything still 'processing' was interrupted by a quit or crash: run it again
+            interrupted = db.query(ImportJob).filter(ImportJob.status == "processing").all()
+            for job in interrupted:
+                if job.cancel_requested:
+                    job.status = "cancelled"
+                    job.progress = "Cancelled"
+                    job.finished_at = datetime.utcnow().isoformat()
+                else:
+                    job.status = "queued"
+                    job.progress = "Requeued after restart"
+            db.commit()
+            pending = [j.id for j in db.query(ImportJob).filter(ImportJob.status == "queued").order_by(ImportJob.id).all()]
+        finally:
+            db.close()
+
+        for job_id in pending:
+            self._executor.submit(self._run, job_id)
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def enqueue(self, kind, twic_issue=None, source=None, file_path=None):
+        """
+        Queue a job, unless an equivalent one is pending; returns (job, created).
+        Jobs for a TWIC issue are one at a time of any kind, so an import and a
+        delete of the same issue never overlap. Other jobs only join a queued
+        job of the same kind, source and file: one that is already running may
+        have passed the work asked for now.
+        """
+        db = self.session_factory()
+        try:
+            # Check and insert as one step, or two requests could both queue a job
+            with self._lock:
+                if twic_issue is not None:
+                    pending = and_(ImportJob.twic_issue == twic_issue, ImportJob.status.in_(ACTIVE_STATES))
+                else:
+                    same_source = ImportJob.source == source if source is not None else ImportJob.source.is_(None)
+                    same_file = ImportJob.file_path == file_path if file_path is not None else ImportJob.file_path.is_(None)
+                    pending = and_(ImportJob.kind == kind, ImportJob.twic_issue.is_(None), same_source, same_file,
+                                   ImportJob.status == "queued")
+                existing = db.query(ImportJob).filter(pending).first()
+                if existing:
+                    return job_to_dict(existing), False
+
+                job = ImportJob(
+                    kind=kind,
+                    twic_issue=twic_issue,
+                    source=source,
+                    file_path=file_path,
+                    status="queued",
+                    progress="Queued",
+                    created_at=datetime.utcnow().isoformat(),
+                )
+                db.add(job)
+                db.commit()
+                db.refresh(job)
+                result = job_to_dict(job)
+        finally:
+            db.close()
+
+        if self._executor is not None:
+            self._executor.submit(self._run, result["id"])
+        return result, True
+
+    def cancel(self, job_id):
+        """Cancel a queued job outright, or ask a running one to stop after its current batch"""
+        db = self.session_factory()
+        try:
+            job = db.query(ImportJob).filter(ImportJob.id == job_id).first()
+            if not job:
+                return None
+            if job.status in ACTIVE_STATES:
+                with self._lock:
+                    self._cancelled.add(job_id)
+                job.cancel_requested = 1
+                if job.status == "queued":
+                    job.status = "cancelled"
+                    job.progress = "Cancelled"
+                    job.finished_at = datetime.utcnow().isoformat()
+                db.commit()
+            return job_to_dict(job)
+        finally:
+            db.close()
+
+    def is_cancelled(self, job_id):
+        with self._lock:
+            return job_id in self._cancelled
+
+    def get(self, job_id):
+        db = self.session_factory()
+        try:
+            job = db.query(ImportJob).filter(ImportJob.id == job_id).first()
+            return job_to_dict(job) if job else None
+        finally:
+            db.close()
+
+    def latest_for_issue(self, twic_issue):
+        db = self.session_factory()
+        try:
+            job = db.query(ImportJob).filter(ImportJob.twic_issue == twic_issue).order_by(ImportJob.id.desc()).first()
+            return job_to_dict(job) if job else None
+        finally:
+            db.close()
+
+    def list(self, limit=50, status=None):
+        db = self.session_factory()
+        try:
+            query = db.query(ImportJob)
+            if status:
+                query = query.filter(ImportJob.status == status)
+            return [job_to_dict(j) for j in query.order_by(ImportJob.id.desc()).limit(limit).all()]
+        finally:
+            db.close()
+
+    def active_by_issue(self):
+        """{issue: {"status": "processing", "progress": ...}} for queued and running TWIC jobs"""
+        db = self.session_factory()
+        try:
+            jobs = db.query(ImportJob).filter(ImportJob.status.in_(ACTIVE_STATES), ImportJob.twic_issue.isnot(None)).all()
+            return {j.twic_issue: {"status": "processing", "progress": j.progress or "Queued"} for j in jobs}
+        finally:
+            db.close()
+
+    def _update(self, job_id, **fields):
+        db = self.session_factory()
+        try:
+            db.query(ImportJob).filter(ImportJob.id == job_id).update(fields, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def _run(self, job_id):
+        db = self.session_factory()
+        try:
+            job = db.query(ImportJob).filter(ImportJob.id == job_id).first()
+            if not job or job.status != "queued":
+                return
+            job.status = "processing"
+            job.progress = "Starting..."
+            job.started_at = datetime.utcnow().isoformat()
+            db.commit()
+            db.refresh(job)
+            db.expunge(job) # The runner gets a detached copy to read kind/issue from
+        finally:
+            db.close()
+
+        ctx = JobContext(self, job_id)
+        runner = self.runners.get(job.kind)
+        try:
+            if runner is None:
+                raise ValueError(f"No runner for job kind '{job.kind}'")
+            success, msg = runner(job, ctx)
+            if ctx.cancelled():
+                status, progress, msg = "cancelled", "Cancelled", f"Cancelled after {ctx.games} games"
+            else:
+                status, progress = ("success", "Completed") if success else ("error", "Failed")
+        except ImportCancelled:
+            status, progress, msg = "cancelled", "Cancelled", f"Cancelled after {ctx.games} games"
+        except Exception as e:
+            print(f"Import job {job_id} failed: {e}")
+            status, progress, msg = "error", "Error", str(e)
+
+        with self._lock:
+            self._cancelled.discard(job_id)
+        self._update(
+            job_id,
+            status=status,
+            progress=progress,
+            message=msg,
+            games=ctx.games,
+            games_per_sec=ctx.games_per_sec,
+            finished_at=datetime.utcnow().isoformat(),
+        )
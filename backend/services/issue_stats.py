@@ -0,0 +1,45 @@
+from datetime import datetime
+
+# Per-source game counters ('twic:<issue>', 'upload:<name>').
+# The dashboard and the TWIC issue list used to count the games table on every
+# load. issue_stats is updated by the writers in the same transaction as their
+# inserts and deletes, so those pages read one row per issue instead.
+# first_id / last_id bound the source's game ids; deleting single games
+# (dedupe) leaves them as bounds rather than exact ends.
+
+STATS_TABLE = "issue_stats"
+
+_UPSERT_FROM_GAMES = f"""
+    INSERT INTO {STATS_TABLE} (source, twic_issue, games, first_id, last_id, imported_at)
+    SELECT COALESCE(source, ''), MAX(twic_issue), COUNT(*), MIN(id), MAX(id), ?
+    FROM games WHERE id > ? GROUP BY COALESCE(source, '')
+    ON CONFLICT(source) DO UPDATE SET
+        games = games + excluded.games,
+        first_id = MIN(COALESCE(first_id, excluded.first_id), excluded.first_id),
+        last_id = MAX(COALESCE(last_id, excluded.last_id), excluded.last_id),
+        imported_at = excluded.imported_at
+"""
+
+def record_games_after(conn, last_id):
+    """Count the games with id > last_id, i.e. the batch an import just inserted"""
+    conn.exec_driver_sql(_UPSERT_FROM_GAMES, (datetime.utcnow().isoformat(), last_id))
+
+def forget_games(conn, game_ids):
+    """Uncount games that are about to be deleted (call before the DELETE, in the same transaction)"""
+    game_ids = list(game_ids)
+    for i in range(0, len(game_ids), 500):
+        chunk = game_ids[i:i + 500]
+        placeholders = ", ".join("?" * len(chunk))
+        conn.exec_driver_sql(
+            f"UPDATE {STATS_TABLE} SET games = games - d.n "
+            f"FROM (SELECT COALESCE(source, '') AS source, COUNT(*) AS n FROM games WHERE id IN ({placeholders}) "
+            "GROUP BY COALESCE(source, '')) AS d "
+            f"WHERE {STATS_TABLE}.source = d.source",
+            tuple(chunk),
+        )
+    conn.exec_driver_sql(f"DELETE FROM {STATS_TABLE} WHERE games <= 0")
+
+def ensure_issue_stats(conn):
+    """Count the stored games once if the table is empty, e.g. for a database from before it existed"""
+    if conn.exec_driver_sql(f"SELECT 1 FROM {STATS_TABLE} LIMIT 1").first() is None:
+        record_games_after(conn, 0)
@@ -0,0 +1,364 @@
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import and_, bindparam, or_, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .database import engine, Game, GamePosition, OpeningMove, import_write_lock, enable_incremental_vacuum
+from .pgn_scanner import content_hash, scan_games
+from .twic_service import existing_hashes
+from .players import PlayerCache
+from .positions import hash_games, add_move_stats, EXPLORER_COUNTERS
+from .issue_stats import forget_games
+from .pgn_store import pgn_body, pack_pgn, PGN_SOURCE_COLUMNS
+from .event_catalog import forget_events, invalidate_event_cache
+
+# Background maintenance over the games table, run as jobs through the import queue.
+
+MAINTENANCE_BATCH_SIZE = 5000
+
+# Games per transaction when deleting an issue; each one also undoes the games' index rows
+DELETE_BATCH_SIZE = 500
+
+# reclaim_space runs once this many pages (4KB each by default) are free, this many per step
+VACUUM_MIN_FREE_PAGES = 2048
+VACUUM_STEP_PAGES = 1024
+INCREMENTAL_VACUUM = 2 # PRAGMA auto_vacuum value
+
+# Games per position index batch, and per process pool task within a batch
+POSITION_BATCH_SIZE = 2000
+POSITION_TASK_SIZE = 200
+
+def _unhashed():
+    # content_hash is indexed, so this only walks the NULL entries
+    return and_(Game.content_hash.is_(None), Game.duplicate_checked.is_(None))
+
+def needs_dedupe(bind=None):
+    """True if some games predate content hashing"""
+    with (bind or engine).connect() as conn:
+        return conn.execute(select(Game.id).where(_unhashed()).limit(1)).first() is not None
+
+def dedupe_games(bind=None, report=None, batch_size=MAINTENANCE_BATCH_SIZE):
+    """
+    Backfill content_hash for games imported before it existed and delete the
+    duplicates this uncovers; the copy that got its hash first is kept.
+    Analyzed or annotated games are never deleted, a duplicate of that kind
+    keeps a NULL hash and is marked duplicate_checked so later runs skip it.
+    report(checked, removed) is called per batch.
+    Returns (checked, removed).
+    """
+    table = Game.__table__
+    checked = removed = 0
+    last_id = 0
+    while True:
+        with import_write_lock, (bind or engine).begin() as conn:
+            rows = conn.execute(
+                select(Game.id, Game.white, Game.black, Game.date, Game.round, Game.pgn, Game.pgn_z, Game.is_personal, Game.is_commented)
+                .where(_unhashed(), Game.id > last_id)
+                .order_by(Game.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+
+            hashed = {}
+            for row in rows:
+                headers = {"White": row.white, "Black": row.black, "Date": row.date, "Round": row.round}
+                hashed[row.id] = content_hash(headers, pgn_body(row.pgn, row.pgn_z))
+            stored = existing_hashes(conn, set(hashed.values()))
+
+            updates, doomed, kept = [], [], []
+            for row in rows:
+                digest = hashed[row.id]
+                if digest not in stored:
+                    stored.add(digest)
+                    updates.append({"game_id": row.id, "hash": digest})
+                elif not (row.is_personal or row.is_commented):
+                    doomed.append(row.id)
+                else:
+                    kept.append(row.id)
+
+            if updates:
+                conn.execute(
+                    table.update().where(table.c.id == bindparam("game_id")).values(content_hash=bindparam("hash")),
+                    updates,
+                )
+            if kept:
+                conn.execute(table.update().where(table.c.id.in_(kept)).values(duplicate_checked=1))
+            if doomed:
+                forget_games(conn, doomed)
+                for i in range(0, len(doomed), 500):
+                    chunk = doomed[i:i + 500]
+                    forget_events(conn, f"id IN ({', '.join('?' * len(chunk))})", tuple(chunk))
+                conn.execute(table.delete().where(table.c.id.in_(doomed)))
+
+        if doomed:
+            invalidate_event_cache()
+        checked += len(rows)
+        removed += len(doomed)
+        last_id = rows[-1].id
+        if report:
+            report(checked, removed)
+    return checked, removed
+
+def _unlinked_player():
+    return or_(
+        and_(Game.white_id.is_(None), Game.white.isnot(None), Game.white != ""),
+        and_(Game.black_id.is_(None), Game.black.isnot(None), Game.black != ""),
+    )
+
+def needs_player_link(bind=None):
+    """True if some games have player names but no players rows yet"""
+    with (bind or engine).connect() as conn:
+        return conn.execute(select(Game.id).where(_unlinked_player()).limit(1)).first() is not None
+
+def link_players(bind=None, report=None, batch_size=MAINTENANCE_BATCH_SIZE):
+    """
+    Fill white_id / black_id for games imported before the players table
+    existed, creating players as they are found. report(checked) is called
+    per batch. Returns the number of games linked.
+    """
+    table = Game.__table__
+    players = PlayerCache()
+    checked = 0
+    last_id = 0
+    while True:
+        with import_write_lock, (bind or engine).begin() as conn:
+            rows = conn.execute(
+                select(Game.id, Game.white, Game.black)
+                .where(_unlinked_player(), Game.id > last_id)
+                .order_by(Game.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+
+            linked = [{"game_id": r.id, "white": r.white, "black": r.black} for r in rows]
+            players.link_rows(conn, linked)
+            conn.execute(
+                table.update().where(table.c.id == bindparam("game_id"))
+                .values(white_id=bindparam("wid"), black_id=bindparam("bid")),
+                [{"game_id": r["game_id"], "wid": r["white_id"], "bid": r["black_id"]} for r in linked],
+            )
+
+        checked += len(rows)
+        last_id = rows[-1].id
+        if report:
+            report(checked)
+    return checked
+
+def _unreplayed():
+    # Matches the ix_games_unreplayed partial index
+    return or_(Game.position_count.is_(None), Game.moves.is_(None))
+
+def needs_position_index(bind=None):
+    """True if some games are not in the position index yet, or have no moves blob"""
+    with (bind or engine).connect() as conn:
+        return conn.execute(select(Game.id).where(_unreplayed()).limit(1)).first() is not None
+
+def index_positions(bind=None, report=None, batch_size=POSITION_BATCH_SIZE, workers=None):
+    """
+    Add games that aren't in the position index yet (games.position_count IS NULL) to
+    game_positions and the opening explorer counts, oldest first, and store the
+    games.moves blob of games without one. Moves are replayed in a process pool
+    (workers=None means one per CPU) outside the write lock, so imports
+    aren't held up. report(indexed) is called per batch. Returns the number
+    of games indexed.
+    """
+    workers = workers or os.cpu_count() or 1
+    table = Game.__table__
+    explorer = OpeningMove.__table__
+    upsert = sqlite_insert(explorer)
+    upsert = upsert.on_conflict_do_update(
+        index_elements=["hash", "move", "year", "elo_band"],
+        set_={name: explorer.c[name] + upsert.excluded[name] for name in EXPLORER_COUNTERS},
+    )
+    indexed = 0
+    last_id = 0
+    with ProcessPoolExecutor(max_workers=workers) if workers > 1 else _InlineExecutor() as executor:
+        while True:
+            with (bind or engine).connect() as conn:
+                rows = conn.execute(
+                    select(Game.id, Game.pgn, Game.pgn_z, Game.moves)
+                    .where(_unreplayed(), Game.id > last_id).order_by(Game.id).limit(batch_size)
+                ).all()
+            if not rows:
+                break
+
+            games = [(r.id, r.pgn, r.pgn_z, r.moves) for r in rows]
+            tasks = [games[i:i + POSITION_TASK_SIZE] for i in range(0, len(games), POSITION_TASK_SIZE)]
+            hashed = [item for result in executor.map(hash_games, tasks) for item in result]
+
+            with import_write_lock, (bind or engine).begin() as conn:
+                # Skip games deleted, edited or indexed by someone else while the batch was hashed.
+                # The explorer counts use the headers as they are now, like the triggers that undo them.
+                pending = {r.id: r for r in conn.execute(
+                    select(Game.id, Game.position_count, Game.moves, Game.result, Game.date, Game.white_elo, Game.black_elo)
+                    .where(Game.id.between(rows[0].id, rows[-1].id), _unreplayed())
+                )}
+                # A game replayed from its blob was edited if the blob is gone now
+                hashed = [(game_id, keys, moves, row.moves is None) for (game_id, keys, moves), row in zip(hashed, rows)
+                          if game_id in pending and (row.moves is None or pending[game_id].moves is not None)]
+                fresh = [(game_id, keys) for game_id, keys, _, _ in hashed if pending[game_id].position_count is None]
+                blobs = [{"game_id": game_id, "moves": moves} for game_id, _, moves, new in hashed if new]
+                positions = []
+                stats = {}
+                for game_id, keys in fresh:
+                    positions.extend({"hash": key, "game_id": game_id, "ply": ply, "move": move} for key, (ply, move) in keys.items())
+                    game = pending[game_id]
+                    add_move_stats(stats, keys, game.result, game.date, game.white_elo, game.black_elo)
+                if positions:
+                    # REPLACE: rows left from before the explorer existed get their moves
+                    conn.execute(GamePosition.__table__.insert().prefix_with("OR REPLACE"), positions)
+                if stats:
+                    conn.execute(upsert, [
+                        {"hash": key, "move": move, "year": year, "elo_band": band, **dict(zip(EXPLORER_COUNTERS, counters))}
+                        for (key, move, year, band), counters in stats.items()
+                    ])
+                if fresh:
+                    conn.execute(
+                        table.update().where(table.c.id == bindparam("game_id")).values(position_count=bindparam("n")),
+                        [{"game_id": game_id, "n": len(keys)} for game_id, keys in fresh],
+                    )
+                if blobs:
+                    conn.execute(table.update().where(table.c.id == bindparam("game_id")).values(moves=bindparam("moves")), blobs)
+
+            indexed += len(fresh)
+            last_id = rows[-1].id
+            if report:
+                report(indexed)
+    return indexed
+
+def needs_compaction(bind=None):
+    """True if some games still have their PGN stored uncompressed in games.pgn"""
+    with (bind or engine).connect() as conn:
+        return conn.execute(select(Game.id).where(Game.pgn.isnot(None)).limit(1)).first() is not None
+
+def compact_games(bind=None, report=None, batch_size=MAINTENANCE_BATCH_SIZE):
+    """
+    Move games stored before compressed storage from games.pgn to games.pgn_z,
+    dropping the headers the columns already hold. report(converted) is called
+    per batch. Returns the number of games converted. Freed pages are reused by
+    later imports; the file itself only shrinks when the database is vacuumed.
+    """
+    table = Game.__table__
+    columns = [table.c[name] for name in PGN_SOURCE_COLUMNS]
+    converted = 0
+    while True:
+        with import_write_lock, (bind or engine).begin() as conn:
+            rows = conn.execute(
+                select(Game.id, Game.pgn, *columns).where(Game.pgn.isnot(None)).order_by(Game.id).limit(batch_size)
+            ).all()
+            if not rows:
+                break
+
+            updates = []
+            for row in rows:
+                scanned = next(scan_games(io.BytesIO(row.pgn.encode("utf-8"))), None)
+                headers = scanned.headers if scanned else {}
+                updates.append({"game_id": row.id, "blob": pack_pgn(headers, row.pgn, row._mapping)})
+            conn.execute(
+                table.update().where(table.c.id == bindparam("game_id")).values(pgn_z=bindparam("blob"), pgn=None),
+                updates,
+            )
+
+        converted += len(rows)
+        if report:
+            report(converted)
+    return converted
+
+def delete_issue_games(issue_number, bind=None, report=None, batch_size=DELETE_BATCH_SIZE):
+    """
+    Delete the games of a TWIC issue, oldest first, one id range per
+    transaction: the write lock is let go between batches, so imports and
+    other jobs get their turn. issue_stats and the event catalog are updated
+    with each batch, the search and position indexes by their triggers.
+    report(deleted) is called per batch. Returns the number of games deleted.
+    """
+    deleted = 0
+    last_id = 0
+    while True:
+        with import_write_lock, (bind or engine).begin() as conn:
+            ids = conn.execute(
+                select(Game.id).where(Game.twic_issue == issue_number, Game.id > last_id).order_by(Game.id).limit(batch_size)
+            ).scalars().all()
+            if not ids:
+                break
+            where, params = "twic_issue = ? AND id BETWEEN ? AND ?", (issue_number, ids[0], ids[-1])
+            forget_games(conn, ids)
+            forget_events(conn, where, params)
+            conn.exec_driver_sql(f"DELETE FROM games WHERE {where}", params)
+        invalidate_event_cache()
+
+        deleted += len(ids)
+        last_id = ids[-1]
+        if report:
+            report(deleted)
+    return deleted
+
+def free_pages(bind=None):
+    with (bind or engine).connect() as conn:
+        return conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+
+def needs_vacuum(bind=None, min_free_pages=VACUUM_MIN_FREE_PAGES):
+    """True if enough pages are unused (e.g. after a large delete) to be worth giving back"""
+    return free_pages(bind) >= min_free_pages
+
+def _vacuum_step(conn, remaining, pages):
+    """
+    Free up to `pages` pages; returns the free pages left. Through sqlite3 each
+    run of PRAGMA incremental_vacuum frees a single page whatever its argument,
+    so the pragma is repeated on one cursor until enough pages are gone.
+    """
+    cursor = conn.connection.cursor()
+    try:
+        target = max(remaining - pages, 0)
+        while remaining > target:
+            cursor.execute("PRAGMA incremental_vacuum(1)")
+            left = cursor.execute("PRAGMA freelist_count").fetchone()[0]
+            if left >= remaining:
+                break
+            remaining = left
+        return remaining
+    finally:
+        cursor.close()
+
+def reclaim_space(bind=None, report=None, step_pages=VACUUM_STEP_PAGES):
+    """
+    Shrink the database file by its free pages, step_pages at a time under
+    the write lock. A database from before incremental vacuum is converted
+    first, by one full VACUUM. report(freed) is called per step. Returns the
+    number of pages freed.
+    """
+    bind = bind or engine
+    before = free_pages(bind)
+    with bind.connect() as conn:
+        if conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() != INCREMENTAL_VACUUM:
+            with import_write_lock:
+                enable_incremental_vacuum(conn)
+            conn.commit()
+        remaining = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+        while remaining:
+            with import_write_lock:
+                previous, remaining = remaining, _vacuum_step(conn, remaining, step_pages)
+                conn.commit()
+            if report:
+                report(max(before - remaining, 0))
+            if remaining >= previous:
+                break
+        # The shrink reaches the file when the WAL is written back
+        conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+    return before - remaining
+
+class _InlineExecutor:
+    """Stand-in for ProcessPoolExecutor when hashing in this process"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def map(self, fn, items):
+        return map(fn, items)
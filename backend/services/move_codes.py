@@ -0,0 +1,97 @@
+import io
+import sys
+from array import array
+
+import chess
+import chess.pgn
+
+# Binary mainlines: games.moves holds a game's mainline as 16-bit move codes,
+# so batch jobs can replay games with Board.push alone instead of parsing SAN
+# with chess.pgn.read_game, which is most of the cost of walking a game.
+# The codes are written once, by the positions job, from moves python-chess
+# has already checked; replaying them skips move generation entirely.
+#
+# Layout: an optional start position (0xFFFF, one length byte, the FEN in
+# ASCII) for games with a FEN tag, then one little-endian uint16 per ply.
+# A zero-length FEN marks a game without a usable start position (no game in
+# the text, or a broken FEN tag), which replays to no positions at all.
+
+# Never a valid code: the largest one is h8h8 promoting to a king
+_FEN_MARKER = b"\xff\xff"
+NO_GAME = _FEN_MARKER + b"\x00"
+
+def encode_move(move):
+    """Move as a small integer: from square, to square and promotion piece in 6+6+3 bits"""
+    return move.from_square | move.to_square << 6 | (move.promotion or 0) << 12
+
+def decode_move(code):
+    return chess.Move(code & 63, (code >> 6) & 63, (code >> 12) or None)
+
+class _MainlineEncoder(chess.pgn.BaseVisitor):
+    """Collects the mainline moves of a PGN game as codes, without building a game tree"""
+
+    def begin_game(self):
+        self.fen = None
+        self.codes = array("H")
+
+    def begin_variation(self):
+        return chess.pgn.SKIP
+
+    def visit_board(self, board):
+        if self.fen is None:
+            fen = board.fen()
+            self.fen = "" if fen == chess.STARTING_FEN else fen
+
+    def visit_move(self, board, move):
+        self.codes.append(encode_move(move))
+
+    def handle_error(self, error):
+        pass # Keep the moves up to the first illegal one (or none for a broken FEN header)
+
+    def result(self):
+        return NO_GAME if self.fen is None else pack_moves(self.codes, self.fen)
+
+def pack_moves(codes, fen=None):
+    """games.moves blob for move codes played from `fen` (None or '' for the standard start)"""
+    codes = array("H", codes)
+    if sys.byteorder == "big":
+        codes.byteswap()
+    head = _FEN_MARKER + bytes([len(fen)]) + fen.encode("ascii") if fen else b""
+    return head + codes.tobytes()
+
+def encode_mainline(pgn_text):
+    """games.moves blob for the mainline of a PGN game, up to its first illegal move"""
+    moves = chess.pgn.read_game(io.StringIO(pgn_text or ""), Visitor=_MainlineEncoder)
+    return NO_GAME if moves is None else moves
+
+def unpack_moves(blob):
+    """(start FEN, None for the standard one or '' for NO_GAME, array of move codes) from a games.moves blob"""
+    fen = None
+    if blob[:2] == _FEN_MARKER:
+        end = 3 + blob[2]
+        fen, blob = blob[3:end].decode("ascii"), blob[end:]
+    codes = array("H")
+    codes.frombytes(blob)
+    if sys.byteorder == "big":
+        codes.byteswap()
+    return fen, codes
+
+def replay(blob):
+    """
+    Yield (board, move) for each position of the mainline, the last one with
+    move None. The same Board is yielded each time with `move` not yet pushed;
+    copy it to keep a position.
+    """
+    fen, codes = unpack_moves(blob)
+    if fen == "":
+        return
+    board = chess.Board(fen) if fen else chess.Board()
+    for code in codes:
+        move = decode_move(code)
+        yield board, move
+        board.push(move)
+    yield board, None
+
+def mainline_fens(blob):
+    """FEN of every position of the mainline, the start position first"""
+    return [board.fen() for board, _ in replay(blob)]
@@ -0,0 +1,71 @@
+import base64
+import json
+
+from sqlalchemy import and_, or_
+
+from .database import Game
+
+# Keyset ("cursor") pagination for game lists.
+# OFFSET makes SQLite walk and discard every skipped row, so each "load more"
+# got slower. A cursor holds the sort value and id of the last row returned and
+# the next page starts with a WHERE on those, so page 500 costs the same as page 1.
+
+# sort name -> (column, descending); ties are broken by id in the same direction
+SORT_ORDERS = {
+    "newest": (Game.id, True),
+    "oldest": (Game.id, False),
+    "white_elo": (Game.white_elo, True),
+    "black_elo": (Game.black_elo, True),
+    "date": (Game.date_key, True), # Newest games first, undated ones last
+}
+DEFAULT_SORT = "newest"
+
+def encode_cursor(sort, value, game_id):
+    payload = json.dumps([sort, value, game_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor, sort):
+    """(value, id) from a cursor made for `sort`; raises ValueError if it's malformed or for another sort"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, value, game_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if cursor_sort != sort or not isinstance(game_id, int):
+        raise ValueError("Cursor does not match the sort order")
+    return value, game_id
+
+def _after(column, descending, value, game_id):
+    """Rows strictly after (value, id) in ORDER BY column, id. NULLs sort first ascending, last descending."""
+    if column is Game.id:
+        return Game.id < game_id if descending else Game.id > game_id
+    if value is None:
+        same = and_(column.is_(None), Game.id < game_id if descending else Game.id > game_id)
+        return same if descending else or_(same, column.isnot(None))
+    beyond = column < value if descending else column > value
+    tie = and_(column == value, Game.id < game_id if descending else Game.id > game_id)
+    if descending and column.nullable:
+        return or_(beyond, tie, column.is_(None))
+    return or_(beyond, tie) # Without an IS NULL branch this stays an index range (date_key)
+
+def paginate(query, sort=DEFAULT_SORT, cursor=None):
+    """Apply the sort order, and the keyset condition when continuing from `cursor`"""
+    if sort not in SORT_ORDERS:
+        raise ValueError(f"Unknown sort '{sort}', expected one of: {', '.join(SORT_ORDERS)}")
+    column, descending = SORT_ORDERS[sort]
+    if cursor:
+        value, game_id = decode_cursor(cursor, sort)
+        query = query.filter(_after(column, descending, value, game_id))
+    if column is Game.id:
+        return query.order_by(Game.id.desc() if descending else Game.id.asc())
+    if descending:
+        return query.order_by(column.desc(), Game.id.desc())
+    return query.order_by(column.asc(), Game.id.asc())
+
+def next_cursor(games, sort=DEFAULT_SORT, limit=None):
+    """Cursor for the page after `games`, or None when this page was the last"""
+    if not games or (limit is not None and len(games) < limit):
+        return None
+    column, _ = SORT_ORDERS[sort]
+    last = games[-1]
+    return encode_cursor(sort, getattr(last, column.key), last.id)
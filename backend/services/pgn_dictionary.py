@@ -0,0 +1,51 @@
+# Preset dictionary for compressed PGN storage (see pgn_store.py).
+# Deflate can back-reference these bytes from the first byte of every game, so
+# short games compress like the middle of a long file. The text is a few header
+# lines and mainlines from the bundled Tata Steel 2026 sample (tata_games.json).
+# Never edit a published version: stored games can only be decompressed with
+# the exact dictionary they were compressed with. Add PGN_DICTIONARY_V2 instead.
+
+PGN_DICTIONARY_V1 = (
+    b'[WhiteTitle "GM"]\n[BlackTitle "GM"]\n[WhiteTitle "IM"]\n[BlackTitle "FM"]\n[Variation "Najd'
+    b'orf"]\n[WhiteFideId "1503014"]\n[BlackFideId "24116068"]\n[EventDate "2026.01.17"]\n\x1e1. e4 c'
+    b'5 2. Nf3 d6 3. d4 cxd4 4. Nxd4 Nf6 5. Nc3 a6 6. Be3 e5 7. Nb3 Be6 8. f3 h5 9. Nd5 Nxd5 1'
+    b'0. exd5 Bf5 11. Be2 Be7 12. Qd2 Bh4+ 13. g3 Be7 14. O-O-O a5 15. Bd3 Bd7 16. Qe1 a4 17. '
+    b'Nd2 O-O 18. f4 Bg4 19. Be2 Bf5 20. Nc4 Nd7 21. Qb4 exf4 22. Bxf4 Nc5 23. Bxh5 a3 24. b3 '
+    b'Bg5 25. Ne3 Be4 26. Rhf1 Rc8 27. Kb1 Qf6 28. Qd4 Qh6 29. Bg4 f5 30. Bxg5 Qxg5 31. Be2 Rf'
+    b'e8 32. Bb5 Nxb3 33. axb3 Qxe3 34. Bc4 Rxc4 35. Qxc4 b5 36. Qb4 Rc8 37. Rc1 Bxc2+ 38. Rxc'
+    b'2 a2+ 39. Rxa2 Qd3+ 40. Kb2 Qe2+ 0-1\n\n1. c4 e6 2. g3 d5 3. Bg2 Nf6 4. Nf3 d4 5. d3 Bb4+ '
+    b'6. Bd2 a5 7. Na3 Bc5 8. O-O Nc6 9. Nc2 O-O 10. a3 a4 11. Re1 Qd6 12. Bg5 h6 13. Bxf6 gxf'
+    b'6 14. Nd2 Bb6 15. Nb4 Nb8 16. b3 axb3 17. Nxb3 Nd7 18. Nc2 f5 19. a4 c6 20. a5 Ba7 21. Q'
+    b'd2 Kh7 22. Qf4 Qxf4 23. gxf4 Bb8 24. Ncxd4 Bxf4 25. Reb1 Rg8 26. h3 Ra6 27. Kf1 Bd6 28. '
+    b'Nc2 e5 29. Ra4 Nc5 30. Nxc5 Bxc5 31. Nb4 Ra7 32. Ra2 Be6 33. a6 Bd6 34. Raa1 e4 35. dxe4'
+    b' Bxc4 36. axb7 Rxb7 37. Nd3 Rxb1+ 38. Rxb1 fxe4 39. Bxe4+ Kh8 40. Bxc6 Bh2 41. Bg2 Bxd3 '
+    b'42. exd3 Rd8 43. Be4 Be5 44. Rb5 Bd4 45. Rb7 Kg7 46. Kg2 Rd6 47. f4 Ra6 48. Rd7 Bc5 49. '
+    b'Kf3 Ra7 50. Rd5 Be7 51. Rf5 Bf6 52. Rb5 Bd4 53. Bd5 Re7 54. Kg4 Bf6 55. h4 Rd7 56. h5 Re'
+    b'7 57. Kf3 Bd4 58. Be4 Rd7 59. Bf5 Re7 60. Rd5 Bf6 61. Rd6 Re8 62. Rc6 Re7 63. Be4 Rd7 64'
+    b'. Rc4 Rd4 65. Rc7 Bd8 66. Rb7 Kf6 67. Rb5 Rd6 68. Rc5 Bb6 69. Rc8 Bd4 70. Rb8 Ba7 71. Rb'
+    b'5 Bd4 72. Bd5 Rd8 73. Ke4 Ba7 74. Bc4 Rd4+ 75. Kf3 Rd7 76. Ra5 Bd4 77. Ke4 Bg1 78. Rf5+ '
+    b'Kg7 79. Kf3 Bb6 80. Ke2 Re7+ 81. Kd2 Be3+ 82. Kc3 Rd7 83. Kb4 f6 84. Kc3 Rd6 85. Kc2 Rd4'
+    b' 86. Rb5 Rxf4 87. Rb7+ Kf8 88. Rf7+ Ke8 89. Rh7 Rh4 90. Bd5 Kd8 91. Bf3 Rh3 92. Bg4 Rh4 '
+    b'93. Bf3 1/2-1/2\n\n1. c4 e6 2. Nf3 d5 3. b3 d4 4. g3 Nc6 5. d3 Nf6 6. Bg2 Bb4+ 7. Bd2 a5 8'
+    b'. O-O O-O 9. Ne1 e5 10. Nc2 Bc5 11. Bg5 h6 12. Bxf6 Qxf6 13. a3 Qe7 14. Nd2 f5 15. Qb1 R'
+    b'a6 16. b4 axb4 17. Nb3 bxa3 18. Nxc5 Qxc5 19. Qb5 Qe7 20. Rfb1 e4 21. Qb3 exd3 22. Qxd3 '
+    b'f4 23. Be4 Qf6 24. Rxa3 fxg3 25. Qxg3 Rxa3 26. Nxa3 Ne5 27. Rb5 Ng4 28. f3 c6 29. Ra5 d3'
+    b' 30. Bxd3 Qa1+ 31. Kg2 Ne3+ 32. Kf2 Qd4 33. Qg6 Nxc4+ 34. Ke1 Nxa5 0-1\n\n1. e4 e5 2. Nf3 '
+    b'Nc6 3. Bc4 Bc5 4. d3 Nf6 5. Bg5 h6 6. Bh4 O-O 7. Nbd2 Be7 8. a4 d6 9. Bg3 Kh8 10. a5 Rb8'
+    b' 11. O-O Nh7 12. c3 g6 13. b4 a6 14. b5 axb5 15. Bxb5 Bd7 16. Qa4 f5 17. h3 f4 18. Bh2 R'
+    b'a8 19. a6 Qe8 20. Qc4 bxa6 21. Bxa6 g5 22. d4 h5 23. dxe5 dxe5 24. Bb5 Rxa1 25. Rxa1 Bf6'
+    b' 26. Ne1 g4 27. hxg4 hxg4 28. Nd3 Ne7 29. Bxd7 Qxd7 30. Nb3 Rg8 31. Kf1 g3 32. fxg3 fxg3'
+    b' 33. Bg1 Qg4 34. Nbc5 Ng5 35. Ke1 Qh5 36. Nd7 Qh1 37. Kf1 Bg7 38. Qc5 Ng6 39. Qe3 Qh4 40'
+    b'. Ra6 Nf4 41. N3xe5 Bxe5 42. Nxe5 Rf8 43. Qd4 Nfe6+ 44. Ke1 Qh1 45. Qe3 Rf2 0-1\n\n1. e4 c'
+    b'5 2. Nf3 Nc6 3. d4 cxd4 4. Nxd4 e5 5. Nb5 a6 6. Nd6+ Bxd6 7. Qxd6 Qf6 8. Qd1 Qg6 9. f3 d'
+    b'5 10. Qxd5 Be6 11. Qd2 Rd8 12. Qg5 Nb4 13. Na3 Ne7 14. Qxg6 hxg6 15. Bd2 Nec6 16. Bxb4 N'
+    b'xb4 17. c3 Nd3+ 18. Bxd3 Rxd3 19. Ke2 Rd6 20. b3 f5 21. exf5 gxf5 22. h3 b5 23. Rac1 f4 '
+    b'24. Rhd1 Ke7 25. Rxd6 Kxd6 26. c4 Rc8 27. Kd2 Rb8 28. Kc2 b4 29. Nb1 Bf5+ 30. Kb2 e4 31.'
+    b' Rd1+ Ke5 32. fxe4 Bxe4 33. Rd2 Ba8 34. Kc2 Be4+ 35. Kc1 Rb6 36. Re2 Kd4 37. Nd2 Ba8 38.'
+    b' Kc2 Rg6 39. Nf3+ Bxf3 40. gxf3 Kc5 41. Re5+ Kb6 42. Kd3 Rg3 43. Ke4 Rg2 44. Re6+ Kb7 45'
+    b'. Kd5 a5 46. Re7+ Ka6 47. c5 Rd2+ 48. Kc6 Rxa2 49. Re8 Ka7 50. Kb5 Kb7 51. Re7+ Kc8 52. '
+    b'c6 Kd8 53. Rd7+ Kc8 54. Rxg7 a4 55. Kb6 1-0\n\n1. d4 Nf6 2. c4 e6 3. g3 d5 4. Bg2 Be7 5. N'
+    b'f3 Ne4 6. O-O f5 7. b3 Nc6 8. Ba3 Bf6 9. e3 h5 10. Nfd2 h4 11. Nxe4 dxe4 12. Nc3 hxg3 13'
+    b'. fxg3 Nxd4 14. Nxe4 fxe4 15. Qg4 Kf7 16. exd4 Qxd4+ 17. Kh1 e5 18. Qe2 Be6 19. Bxe4 Rxh'
+    b'2+ 20. Kxh2 Rh8+ 21. Kg2 Bh3+ 22. Kf3 1-0\n\n'
+)
@@ -0,0 +1,112 @@
+import hashlib
+import re
+from collections import namedtuple
+
+# Header-only PGN scanner used by the importer.
+# Instead of building a python-chess GameNode tree for every game (a board per ply)
+# and printing it back out, we read the tag pairs line by line and slice the raw
+# game text straight out of the file by byte offset. The stored PGN is the source text.
+
+TAG_RE = re.compile(rb'^\s*\[\s*([A-Za-z0-9_+#=:-]+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+UTF8_BOM = b"\xef\xbb\xbf"
+
+# headers: dict of tag -> value, pgn: raw game text, start/end: byte offsets in the stream
+ScannedGame = namedtuple("ScannedGame", ["headers", "pgn", "start", "end"])
+
+def _unescape(value):
+    return value.replace(b'\\"', b'"').replace(b"\\\\", b"\\").decode("utf-8", errors="replace")
+
+def scan_games(stream, start=0, end=None):
+    """
+    Yield a ScannedGame for every game in a binary stream.
+
+    `start` is the byte offset the stream is currently positioned at, so yielded
+    offsets are absolute. If `end` is given, scanning stops at the first game that
+    starts at or after that offset (used to split a file into chunks).
+    """
+    offset = start
+    game_start = None
+    lines = []
+    headers = {}
+    in_movetext = False
+    headers_done = False
+    comment_depth = 0
+
+    def finish(at):
+        text = b"".join(lines).strip().decode("utf-8", errors="replace")
+        return ScannedGame(headers, text, game_start, at)
+
+    for line in iter(stream.readline, b""):
+        if offset == 0 and line.startswith(UTF8_BOM):
+            line_body = line[len(UTF8_BOM):]
+        else:
+            line_body = line
+        stripped = line_body.strip()
+
+        tag = TAG_RE.match(line_body) if comment_depth == 0 and stripped.startswith(b"[") else None
+
+        # A tag pair after the movetext (or after a finished header block) opens the next game
+        if tag and (in_movetext or headers_done) and game_start is not None:
+            yield finish(offset)
+            game_start = None
+            lines = []
+            headers = {}
+            in_movetext = False
+            headers_done = False
+
+        if game_start is None:
+            if not stripped or stripped.startswith(b"%"):
+                offset += len(line)
+                continue
+            if end is not None and offset >= end:
+                return
+            game_start = offset
+
+        if tag:
+            headers[tag.group(1).decode("ascii")] = _unescape(tag.group(2))
+        elif stripped:
+            in_movetext = True
+            comment_depth = max(0, comment_depth + stripped.count(b"{") - stripped.count(b"}"))
+        elif headers:
+            headers_done = True
+
+        lines.append(line_body)
+        offset += len(line)
+
+    if game_start is not None:
+        yield finish(offset)
+
+# --- Duplicate detection ---
+# The same game shows up in several TWIC issues (late results get republished) and
+# in personal imports, often with different annotations. The content hash covers
+# the players, date, round and the bare mainline, so those copies collide.
+
+COMMENT_RE = re.compile(r"\{[^}]*\}|;[^\n]*")
+INNERMOST_VARIATION_RE = re.compile(r"\([^()]*\)")
+NOISE_RE = re.compile(r"\$\d+|\d+\.(?:\.\.)?|[!?]+|(?:1-0|0-1|1/2-1/2|\*)\s*$")
+HEADER_LINE_RE = re.compile(r"^\s*\[.*\]\s*$", re.MULTILINE)
+
+def bare_movetext(pgn_text):
+    """Mainline moves only: no headers, comments, variations, NAGs, move numbers or result"""
+    text = HEADER_LINE_RE.sub(" ", pgn_text)
+    text = COMMENT_RE.sub(" ", text)
+    while True:
+        text, n = INNERMOST_VARIATION_RE.subn(" ", text)
+        if not n:
+            break
+    text = NOISE_RE.sub(" ", text)
+    return " ".join(text.split())
+
+def content_hash(headers, pgn_text):
+    """Stable 128-bit hex digest identifying a game regardless of annotations"""
+    def norm(value):
+        return " ".join((value or "").split()).lower()
+
+    key = "\x1f".join([
+        norm(headers.get("White")),
+        norm(headers.get("Black")),
+        norm(headers.get("Date")),
+        norm(headers.get("Round")),
+        bare_movetext(pgn_text),
+    ])
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
@@ -0,0 +1,115 @@
+import re
+import sqlite3
+import zlib
+
+from .pgn_dictionary import PGN_DICTIONARY_V1
+from .pgn_scanner import bare_movetext
+
+# Compressed PGN storage.
+# games.pgn used to hold the whole game text, headers included, which was most
+# of the database file. games.pgn_z holds only what the other columns don't:
+# the header tags that aren't stored as columns, and the movetext, deflated
+# with a preset dictionary. The full PGN is put back together from the columns
+# when one game is opened. games.pgn stays for rows written before this, until
+# the compaction job converts them.
+
+# Header tags rebuilt from `games` columns, in the order they are written back
+PGN_COLUMN_TAGS = [
+    ("Event", "event"), ("Site", "site"), ("Date", "date"), ("Round", "round"),
+    ("White", "white"), ("Black", "black"), ("Result", "result"),
+    ("WhiteElo", "white_elo"), ("BlackElo", "black_elo"), ("ECO", "eco"), ("Opening", "opening"),
+]
+
+# Columns game_pgn needs besides pgn / pgn_z
+PGN_SOURCE_COLUMNS = [column for _, column in PGN_COLUMN_TAGS]
+
+# First byte of every blob: which dictionary and window it was compressed with
+FORMAT_V1 = 1
+_WBITS = 12 # 4KB window: cheap to set up per game, and the dictionary fits in it
+_DICTIONARIES = {FORMAT_V1: PGN_DICTIONARY_V1}
+
+# Between the leftover header tags and the movetext inside a blob
+_SEPARATOR = "\x1e"
+
+FEN_TAG_RE = re.compile(r'^\s*\[FEN "([^"]*)"\]', re.MULTILINE)
+
+def _tag_line(tag, value):
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+    return f'[{tag} "{escaped}"]\n'
+
+def _column_value(value):
+    return None if value is None or value == "" else str(value)
+
+def split_movetext(pgn_text):
+    """The movetext of a PGN game: everything after the tag pair lines"""
+    lines = (pgn_text or "").split("\n")
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if stripped and not stripped.startswith("["):
+            return "\n".join(lines[i:]).strip()
+    return ""
+
+def pack_pgn(headers, pgn_text, row):
+    """
+    Compressed blob for a game: headers whose value the `row` columns (a dict)
+    don't reproduce exactly, then the movetext.
+    """
+    columns = dict(PGN_COLUMN_TAGS)
+    extra = "".join(
+        _tag_line(tag, value) for tag, value in headers.items()
+        if tag not in columns or _column_value(row.get(columns[tag])) != value
+    )
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -_WBITS, 8, zlib.Z_DEFAULT_STRATEGY, _DICTIONARIES[FORMAT_V1])
+    data = (extra + _SEPARATOR + split_movetext(pgn_text)).encode("utf-8")
+    return bytes([FORMAT_V1]) + compressor.compress(data) + compressor.flush()
+
+def unpack_pgn(blob):
+    """(leftover header lines, movetext) from a pack_pgn blob"""
+    decompressor = zlib.decompressobj(-_WBITS, _DICTIONARIES[blob[0]])
+    text = (decompressor.decompress(blob[1:]) + decompressor.flush()).decode("utf-8")
+    extra, _, movetext = text.partition(_SEPARATOR)
+    return extra, movetext
+
+def pgn_body(pgn, pgn_z):
+    """
+    Enough of a stored game to replay or hash its moves: the leftover headers
+    (FEN / SetUp live there) and the movetext, from either storage format
+    """
+    if pgn_z is not None:
+        extra, movetext = unpack_pgn(pgn_z)
+        return f"{extra}\n{movetext}" if extra else movetext
+    return pgn or ""
+
+def game_pgn(row):
+    """Full PGN text of a game row (ORM object or Row with pgn, pgn_z and PGN_SOURCE_COLUMNS)"""
+    if row.pgn_z is None:
+        return row.pgn
+    extra, movetext = unpack_pgn(row.pgn_z)
+    overridden = {line[1:].split(" ", 1)[0] for line in extra.splitlines()}
+    lines = []
+    for tag, column in PGN_COLUMN_TAGS:
+        value = _column_value(getattr(row, column))
+        if value is not None and tag not in overridden:
+            lines.append(_tag_line(tag, value))
+    return "".join(lines) + extra + "\n" + movetext
+
+def pgn_moves_key(pgn, pgn_z):
+    """
+    SQL function macbase_pgn_moves(): the FEN tag and bare mainline of a stored
+    game, i.e. what the position index depends on, in either storage format.
+    Lets the triggers tell a game with new moves from one that was only
+    annotated or converted to pgn_z.
+    """
+    if pgn_z is not None:
+        extra, movetext = unpack_pgn(pgn_z)
+    elif pgn is not None:
+        extra, movetext = pgn, split_movetext(pgn)
+    else:
+        return None
+    fen = FEN_TAG_RE.search(extra)
+    return (fen.group(1) if fen else "") + _SEPARATOR + bare_movetext(movetext)
+
+def register_pgn_functions(dbapi_connection, connection_record=None):
+    """SQLAlchemy 'connect' listener for macbase_pgn_moves(), used by the position index triggers"""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.create_function("macbase_pgn_moves", 2, pgn_moves_key, deterministic=True)
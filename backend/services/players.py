@@ -0,0 +1,74 @@
+import re
+import sys
+
+from sqlalchemy import and_, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .database import Player
+from .search import fold_text
+
+# Player identities. Games keep the names as printed in the PGN, and also point
+# at a `players` row through white_id / black_id, so player filters and
+# aggregates compare small integers instead of repeated strings.
+
+# SQLite caps bound parameters per statement; stay well below it for IN (...) lookups
+SQL_IN_CHUNK = 500
+
+def normalize_player_name(name):
+    """Matching key for a player name: folded case and accents, uniform spacing around commas"""
+    folded = " ".join(fold_text(name or "").split())
+    return re.sub(r"\s*,\s*", ",", folded)
+
+def name_prefix_filter(column, key):
+    """Prefix match on a normalized name column as a range, so it runs on the column's index"""
+    if ord(key[-1]) == sys.maxunicode:
+        return column.startswith(key, autoescape=True)
+    return and_(column >= key, column < key[:-1] + chr(ord(key[-1]) + 1))
+
+class PlayerCache:
+    """
+    normalized name -> players.id for one import. Loaded once from the
+    database; names not seen before are inserted a batch at a time.
+    """
+
+    def __init__(self):
+        self._ids = None
+
+    def load(self, conn):
+        self._ids = dict(conn.execute(select(Player.normalized, Player.id)).all())
+
+    def link_rows(self, conn, rows):
+        """
+        Set white_id / black_id on game row dicts, creating missing players.
+        Rows may carry white_fide_id / black_fide_id, which are used for new
+        players and removed from the row.
+        """
+        if self._ids is None:
+            self.load(conn)
+
+        new = {}
+        for row in rows:
+            for side in ("white", "black"):
+                fide_id = row.pop(f"{side}_fide_id", None)
+                key = normalize_player_name(row.get(side))
+                if key and key not in self._ids and key not in new:
+                    new[key] = {"name": row[side], "normalized": key, "fide_id": fide_id}
+        if new:
+            self._create(conn, new)
+
+        for row in rows:
+            for side in ("white", "black"):
+                row[f"{side}_id"] = self._ids.get(normalize_player_name(row.get(side)))
+
+    def _create(self, conn, new):
+        stmt = sqlite_insert(Player.__table__).on_conflict_do_nothing(index_elements=["normalized"])
+        conn.execute(stmt, list(new.values()))
+        keys = list(new)
+        for i in range(0, len(keys), SQL_IN_CHUNK):
+            chunk = keys[i:i + SQL_IN_CHUNK]
+            self._ids.update(conn.execute(
+                select(Player.normalized, Player.id).where(Player.normalized.in_(chunk))
+            ).all())
+
+def fide_id(value):
+    return int(value) if value and value.isdigit() else None
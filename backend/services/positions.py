@@ -0,0 +1,245 @@
+import chess
+import chess.polyglot
+
+from .move_codes import decode_move, encode_mainline, encode_move, replay
+from .pgn_store import pgn_body
+
+_RANDOM = chess.polyglot.POLYGLOT_RANDOM_ARRAY
+
+# Position index: "which games reached this position".
+# game_positions holds one row per position in a game's mainline, keyed by its
+# 64-bit polyglot Zobrist hash. It is a WITHOUT ROWID table clustered on
+# (hash, game_id), so a lookup is one index range scan that already comes out
+# in game id order, and a page of results never touches the rest of the table.
+# Replaying moves is far slower than the header-only import scan, so games are
+# indexed by a background job after each import (and once for older databases)
+# instead of inline; games.position_count is NULL until a game has been indexed.
+#
+# The same pass feeds the opening explorer: opening_moves holds, per position,
+# move, year and 100-point Elo band, how many games played it and how they
+# ended. Explorer queries read one hash prefix of that table and never replay
+# games. Each game counts once per position, with the move it first played there.
+#
+# The job also stores each game's mainline in games.moves (see move_codes.py),
+# so games indexed again, e.g. after a result edit, are replayed from that.
+
+POSITIONS_TABLE = "game_positions"
+EXPLORER_TABLE = "opening_moves"
+
+# Counters in opening_moves, summed over years and Elo bands by explorer_moves
+EXPLORER_COUNTERS = ("games", "white_wins", "draws", "black_wins", "elo_sum", "elo_games")
+
+# SQL twins of explorer_year / elo_band / the mover's Elo, for triggers on `games`
+_YEAR_SQL = "CASE WHEN substr(old.date, 1, 4) GLOB '[0-9][0-9][0-9][0-9]' THEN CAST(substr(old.date, 1, 4) AS INTEGER) ELSE 0 END"
+_BAND_SQL = "(COALESCE((old.white_elo + old.black_elo) / 2, old.white_elo, old.black_elo, 0) / 100) * 100"
+_MOVER_ELO_SQL = "(CASE WHEN p.ply % 2 = 0 THEN old.white_elo ELSE old.black_elo END)"
+
+# Take an indexed game (`old`) back out of the explorer counts and the position index
+_UNINDEX_GAME_SQL = f"""
+        UPDATE {EXPLORER_TABLE} SET
+            games = games - 1,
+            white_wins = white_wins - (old.result IS '1-0'),
+            draws = draws - (old.result IS '1/2-1/2'),
+            black_wins = black_wins - (old.result IS '0-1'),
+            elo_sum = elo_sum - COALESCE({_MOVER_ELO_SQL}, 0),
+            elo_games = elo_games - ({_MOVER_ELO_SQL} IS NOT NULL)
+        FROM {POSITIONS_TABLE} AS p
+        WHERE old.position_count IS NOT NULL AND p.game_id = old.id AND p.move IS NOT NULL
+            AND {EXPLORER_TABLE}.hash = p.hash AND {EXPLORER_TABLE}.move = p.move
+            AND {EXPLORER_TABLE}.year = {_YEAR_SQL} AND {EXPLORER_TABLE}.elo_band = {_BAND_SQL};
+        DELETE FROM {EXPLORER_TABLE} WHERE games <= 0
+            AND hash IN (SELECT hash FROM {POSITIONS_TABLE} WHERE game_id = old.id);
+        DELETE FROM {POSITIONS_TABLE} WHERE game_id = old.id;"""
+
+POSITION_INDEX_DDL = [
+    f"""CREATE TRIGGER game_positions_delete AFTER DELETE ON games BEGIN{_UNINDEX_GAME_SQL}
+    END""",
+    # A game whose moves or explorer fields change is indexed again by the next positions job.
+    # Annotating a game or converting it to compressed storage doesn't change its moves.
+    f"""CREATE TRIGGER game_positions_update AFTER UPDATE OF pgn, pgn_z, result, date, white_elo, black_elo ON games
+        WHEN old.position_count IS NOT NULL AND (
+            macbase_pgn_moves(old.pgn, old.pgn_z) IS NOT macbase_pgn_moves(new.pgn, new.pgn_z) OR old.result IS NOT new.result
+            OR old.date IS NOT new.date OR old.white_elo IS NOT new.white_elo OR old.black_elo IS NOT new.black_elo)
+        BEGIN{_UNINDEX_GAME_SQL}
+        UPDATE games SET position_count = NULL WHERE id = new.id;
+    END""",
+    # Moves blobs are only written by the positions job; an edited game gets a new one there
+    """CREATE TRIGGER game_moves_update AFTER UPDATE OF pgn, pgn_z ON games
+        WHEN old.moves IS NOT NULL AND macbase_pgn_moves(old.pgn, old.pgn_z) IS NOT macbase_pgn_moves(new.pgn, new.pgn_z)
+        BEGIN
+        UPDATE games SET moves = NULL WHERE id = new.id;
+    END""",
+]
+
+POSITION_TRIGGERS = ("game_positions_delete", "game_positions_update", "game_moves_update")
+
+def position_index_current(conn):
+    """True if the database has the triggers exactly as defined here (SQLite keeps their CREATE text)"""
+    stored = dict(conn.exec_driver_sql("SELECT name, sql FROM sqlite_master WHERE type = 'trigger'").all())
+    return all(stored.get(name) == ddl for name, ddl in zip(POSITION_TRIGGERS, POSITION_INDEX_DDL))
+
+def ensure_position_index(conn):
+    """
+    (Re)create the triggers, so databases pick up changes to their definition.
+    Run it in one transaction: games must never be written without them.
+    """
+    for name in POSITION_TRIGGERS:
+        conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+    for ddl in POSITION_INDEX_DDL:
+        conn.exec_driver_sql(ddl)
+
+def position_key(board):
+    """Zobrist hash of a board as a signed 64-bit integer, which is what SQLite stores"""
+    key = chess.polyglot.zobrist_hash(board)
+    return key - (1 << 64) if key >= (1 << 63) else key
+
+def fen_key(fen):
+    """position_key for a FEN string; raises ValueError if the FEN is invalid"""
+    return position_key(chess.Board(fen))
+
+# Polyglot key index of each piece bitboard from _piece_masks: black pawns, white pawns, black knights, ...
+_PIECE_BASES = [64 * kind for kind in range(12)]
+
+def _piece_masks(board):
+    black, white = board.occupied_co
+    return (
+        board.pawns & black, board.pawns & white, board.knights & black, board.knights & white,
+        board.bishops & black, board.bishops & white, board.rooks & black, board.rooks & white,
+        board.queens & black, board.queens & white, board.kings & black, board.kings & white,
+    )
+
+def _state_key(board):
+    """The castling, en passant and turn part of the polyglot hash"""
+    key = 0
+    rights = board.castling_rights
+    if rights & chess.BB_H1:
+        key ^= _RANDOM[768]
+    if rights & chess.BB_A1:
+        key ^= _RANDOM[769]
+    if rights & chess.BB_H8:
+        key ^= _RANDOM[770]
+    if rights & chess.BB_A8:
+        key ^= _RANDOM[771]
+    ep = board.ep_square
+    # Only counted when a pawn could capture there, legal or not
+    if ep is not None and board.pawns & board.occupied_co[board.turn] & chess.BB_PAWN_ATTACKS[not board.turn][ep]:
+        key ^= _RANDOM[772 + (ep & 7)]
+    if board.turn:
+        key ^= _RANDOM[780]
+    return key
+
+def move_positions(moves):
+    """
+    position_hashes for a games.moves blob. Keys are updated per move from the
+    pieces that changed instead of hashing every board from scratch, which
+    with replay() makes this several times faster than going through the PGN.
+    """
+    positions = {}
+    masks = None
+    for board, move in replay(moves):
+        if masks is None:
+            board.castling_rights = board.clean_castling_rights() # As zobrist_hash sees them
+            masks = _piece_masks(board)
+            pieces = 0
+            for base, mask in zip(_PIECE_BASES, masks):
+                for square in chess.scan_forward(mask):
+                    pieces ^= _RANDOM[base + square]
+        else:
+            changed = _piece_masks(board)
+            for base, old, new in zip(_PIECE_BASES, masks, changed):
+                if old != new:
+                    for square in chess.scan_forward(old ^ new):
+                        pieces ^= _RANDOM[base + square]
+            masks = changed
+        key = pieces ^ _state_key(board)
+        key = key - (1 << 64) if key >= (1 << 63) else key
+        if key not in positions:
+            positions[key] = [board.ply(), None if move is None else encode_move(move)]
+    return positions
+
+def position_hashes(pgn_text):
+    """
+    {key: [ply, move]} for every position in the mainline of a PGN game: the ply
+    it was first reached at and the encoded move played from there (None at the end)
+    """
+    return move_positions(encode_mainline(pgn_text))
+
+def hash_games(games):
+    """
+    Process pool entry point: [(game_id, {key: [ply, move]}, moves)] for
+    [(game_id, pgn, pgn_z, moves)]. Games without a moves blob yet get one
+    from their PGN; the others are replayed from it.
+    """
+    hashed = []
+    for game_id, pgn, pgn_z, moves in games:
+        if moves is None:
+            moves = encode_mainline(pgn_body(pgn, pgn_z))
+        hashed.append((game_id, move_positions(moves), moves))
+    return hashed
+
+def explorer_year(date):
+    """Year of a PGN date like '2024.01.??', 0 if unknown"""
+    year = (date or "")[:4]
+    return int(year) if len(year) == 4 and all(c in "0123456789" for c in year) else 0
+
+def elo_band(white_elo, black_elo):
+    """Average Elo of the game (or the one known), rounded down to 100; 0 without ratings"""
+    if white_elo is not None and black_elo is not None:
+        average = (white_elo + black_elo) // 2
+    else:
+        average = white_elo if white_elo is not None else (black_elo or 0)
+    return average // 100 * 100
+
+def add_move_stats(stats, positions, result, date, white_elo, black_elo):
+    """Add one game to stats: (hash, move, year, elo_band) -> counters in EXPLORER_COUNTERS order"""
+    year, band = explorer_year(date), elo_band(white_elo, black_elo)
+    outcome = (result == "1-0", result == "1/2-1/2", result == "0-1")
+    for key, (ply, move) in positions.items():
+        if move is None:
+            continue
+        mover_elo = white_elo if ply % 2 == 0 else black_elo
+        counters = stats.get((key, move, year, band))
+        if counters is None:
+            counters = stats[(key, move, year, band)] = [0, 0, 0, 0, 0, 0]
+        counters[0] += 1
+        counters[1] += outcome[0]
+        counters[2] += outcome[1]
+        counters[3] += outcome[2]
+        if mover_elo is not None:
+            counters[4] += mover_elo
+            counters[5] += 1
+
+def position_game_ids(conn, key, before_id=None, limit=50):
+    """(game_id, ply) of games that reached position `key`, newest first, ids below before_id"""
+    sql = f"SELECT game_id, ply FROM {POSITIONS_TABLE} WHERE hash = ?"
+    params = [key]
+    if before_id is not None:
+        sql += " AND game_id < ?"
+        params.append(before_id)
+    sql += " ORDER BY game_id DESC LIMIT ?"
+    params.append(limit)
+    return conn.exec_driver_sql(sql, tuple(params)).all()
+
+def explorer_moves(conn, key, min_elo=None, max_elo=None, from_year=None, to_year=None):
+    """
+    Counters summed per move for position `key`, most played first. Elo filters
+    work on 100-point bands of the game's average Elo: min_elo keeps bands from
+    min_elo rounded down, max_elo keeps bands starting below it.
+    """
+    sums = ", ".join(f"SUM({name}) AS {name}" for name in EXPLORER_COUNTERS)
+    sql = f"SELECT move, {sums} FROM {EXPLORER_TABLE} WHERE hash = ?"
+    params = [key]
+    if min_elo:
+        sql += " AND elo_band >= ?"
+        params.append(min_elo // 100 * 100)
+    if max_elo:
+        sql += " AND elo_band < ?"
+        params.append(max_elo)
+    if from_year:
+        sql += " AND year >= ?"
+        params.append(from_year)
+    if to_year:
+        sql += " AND year BETWEEN 1 AND ?"
+        params.append(to_year)
+    sql += " GROUP BY move HAVING SUM(games) > 0 ORDER BY SUM(games) DESC"
+    return conn.exec_driver_sql(sql, tuple(params)).all()
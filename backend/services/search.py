@@ -0,0 +1,109 @@
+import sqlite3
+import unicodedata
+from functools import lru_cache
+
+from sqlalchemy import Integer, text
+
+# Trigram full-text side index over player and event names.
+# `ilike('%x%')` can't use the B-tree indexes on white/black/event, so every
+# name search scanned the whole games table. games_fts is an FTS5 table with
+# the trigram tokenizer, holding case- and diacritic-folded copies of those
+# columns; triggers on `games` keep it in sync for every writer (bulk imports,
+# ORM updates, deletes, dedupe).
+
+FTS_TABLE = "games_fts"
+
+# Trigrams need at least 3 characters; shorter searches fall back to LIKE
+MIN_TRIGRAM_QUERY = 3
+
+# Letters NFKD doesn't split into base letter + accent
+_FOLD_EXTRA = str.maketrans({
+    "ø": "o", "Ø": "o", "ł": "l", "Ł": "l", "đ": "d", "Đ": "d", "ð": "d",
+    "ß": "ss", "æ": "ae", "Æ": "ae", "œ": "oe", "Œ": "oe", "ı": "i", "þ": "th",
+})
+
+@lru_cache(maxsize=65536) # Called from the insert trigger; player and event names repeat a lot
+def fold_text(value):
+    """Lowercase and strip diacritics: 'Ľubomír Ftáčnik' -> 'lubomir ftacnik'"""
+    if not value:
+        return ""
+    if value.isascii():
+        return value.lower()
+    decomposed = unicodedata.normalize("NFKD", value.translate(_FOLD_EXTRA))
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+def register_sqlite_functions(dbapi_connection, connection_record=None):
+    """
+    SQLAlchemy 'connect' listener for the functions the search triggers call:
+    macbase_fold() and a per-connection switch for the insert trigger, which
+    bulk imports turn off to index each batch with one INSERT ... SELECT.
+    """
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    state = {"sync": 1}
+
+    def set_sync(value):
+        state["sync"] = value
+        return value
+
+    dbapi_connection.create_function("macbase_fold", 1, fold_text, deterministic=True)
+    dbapi_connection.create_function("macbase_fts_sync", 0, lambda: state["sync"])
+    dbapi_connection.create_function("macbase_set_fts_sync", 1, set_sync)
+
+SEARCH_INDEX_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(white, black, event, tokenize='trigram')",
+    f"""CREATE TRIGGER IF NOT EXISTS games_fts_insert AFTER INSERT ON games WHEN macbase_fts_sync() BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, white, black, event)
+        VALUES (new.id, macbase_fold(new.white), macbase_fold(new.black), macbase_fold(new.event));
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS games_fts_delete AFTER DELETE ON games BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS games_fts_update AFTER UPDATE OF white, black, event ON games BEGIN
+        UPDATE {FTS_TABLE} SET white = macbase_fold(new.white), black = macbase_fold(new.black),
+            event = macbase_fold(new.event)
+        WHERE rowid = new.id;
+    END""",
+]
+
+def ensure_search_index(conn):
+    """Create the FTS table and triggers; the first time, index the games already stored"""
+    exists = conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)
+    ).first()
+    for ddl in SEARCH_INDEX_DDL:
+        conn.exec_driver_sql(ddl)
+    if not exists:
+        index_games_after(conn, 0)
+
+def set_trigger_sync(conn, enabled):
+    """Turn the insert trigger on or off for this connection only"""
+    conn.exec_driver_sql(f"SELECT macbase_set_fts_sync({1 if enabled else 0})")
+
+def max_game_id(conn):
+    return conn.exec_driver_sql("SELECT COALESCE(MAX(id), 0) FROM games").scalar()
+
+def index_games_after(conn, last_id):
+    """Index games with id > last_id in one statement; used per batch while the trigger is off"""
+    conn.exec_driver_sql(
+        f"INSERT INTO {FTS_TABLE}(rowid, white, black, event) "
+        "SELECT id, macbase_fold(white), macbase_fold(black), macbase_fold(event) FROM games WHERE id > ?",
+        (last_id,),
+    )
+
+def fts_phrase(folded):
+    """FTS5 string literal, i.e. a substring search with the trigram tokenizer"""
+    return '"' + folded.replace('"', '""') + '"'
+
+def name_search_ids(columns, term):
+    """
+    SELECT of game ids whose `columns` (white/black/event) contain `term`,
+    ignoring case and diacritics. None when the term is too short for trigrams.
+    """
+    folded = fold_text(term).strip()
+    if len(folded) < MIN_TRIGRAM_QUERY:
+        return None
+    param = "fts_" + "_".join(columns) # Distinct per filter so two searches can share a query
+    return text(
+        f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :{param}"
+    ).bindparams(**{param: "{" + " ".join(columns) + "} : " + fts_phrase(folded)}).columns(rowid=Integer)
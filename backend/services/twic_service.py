@@ -1,38 +1,180 @@
 import requests
-import zipfile
 import io
 import os
+import queue
 import re
+import shutil
+import threading
+import time
 import chess.pgn
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from sqlalchemy.orm import Session
-from .database import SessionLocal, Game, init_db
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from .database import engine, Game, ImportCheckpoint, init_db, bulk_import_connection, import_write_lock
+from .pgn_scanner import scan_games, content_hash
+from .zip_stream import ZipMemberReader
+from .uploads import open_pgn_stream
+from .search import max_game_id, index_games_after
+from .issue_stats import record_games_after
+from .event_catalog import record_events_after, invalidate_event_cache
+from .players import PlayerCache, fide_id
+from .eco import eco_to_code
+from .dates import date_key
+from .pgn_store import pack_pgn
+from .http_client import get_twic_client
 
 
 from pathlib import Path
 
-TWIC_BASE_URL = "https://theweekinchess.com/zips/"
+TWIC_ZIP_PATH = "/zips/"
+
+# Rows per INSERT transaction during bulk import. Larger batches amortize the
+# commit cost; 5000 keeps peak memory for a batch of PGN text around a few MB.
+IMPORT_BATCH_SIZE = 5000
+
+# Parallel imports hand each worker process a slice of the file this big
+PARALLEL_CHUNK_BYTES = 4 * 1024 * 1024
+
+# SQLite caps bound parameters per statement; stay well below it for IN (...) lookups
+SQL_IN_CHUNK = 500
+
+ImportResult = namedtuple("ImportResult", ["count", "duplicates", "games_per_sec"])
+
+# Streaming import: HTTP read size, and how many chunks the download may run ahead of the parser
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+DOWNLOAD_QUEUE_CHUNKS = 256
+
+def _parse_elo(value):
+    return int(value) if value and value.isdigit() else None
+
+def game_row(headers, pgn_text, issue_number, source=None):
+    """Map PGN headers to a `games` row dict for Core inserts; source defaults to 'twic:<issue>'"""
+    row = {
+        "event": headers.get("Event", "?"),
+        "site": headers.get("Site", "?"),
+        "date": headers.get("Date", "????.??.??"),
+        "round": headers.get("Round", "?"),
+        "white": headers.get("White", "?"),
+        "black": headers.get("Black", "?"),
+        "result": headers.get("Result", "*"),
+        "eco": headers.get("ECO", ""),
+        "eco_code": eco_to_code(headers.get("ECO")),
+        "opening": headers.get("Opening", None),  # Opening name from PGN header
+        "white_elo": _parse_elo(headers.get("WhiteElo", "")),
+        "black_elo": _parse_elo(headers.get("BlackElo", "")),
+        "pgn": None,
+        "twic_issue": issue_number,
+        "source": source or twic_checkpoint_key(issue_number),
+        "is_commented": 0,
+        "is_personal": 0,
+        "content_hash": content_hash(headers, pgn_text),
+        # Consumed by PlayerCache.link_rows, not stored on the game
+        "white_fide_id": fide_id(headers.get("WhiteFideId")),
+        "black_fide_id": fide_id(headers.get("BlackFideId")),
+    }
+    row["date_key"], row["date_precision"] = date_key(row["date"])
+    # Only what the columns above don't hold is kept, compressed
+    row["pgn_z"] = pack_pgn(headers, pgn_text, row)
+    return row
+
+def twic_checkpoint_key(issue_number):
+    return f"twic:{issue_number}"
+
+def file_checkpoint_key(path):
+    """Checkpoint key for an uploaded file: its saved path, unique per upload unlike the source tag"""
+    return f"file:{path}"
+
+def scan_rows(pgn_path, issue_number, start=0, end=None, fast_scan=True, source=None):
+    """Yield (row, end_offset) for the games starting in [start, end) of a PGN file"""
+    with open(pgn_path, "rb") as pgn_file:
+        pgn_file.seek(start)
+        for scanned in scan_games(pgn_file, start=start, end=end):
+            if fast_scan:
+                headers, pgn_text = scanned.headers, scanned.pgn
+            else:
+                game_node = chess.pgn.read_game(io.StringIO(scanned.pgn))
+                if game_node is None:
+                    continue
+                headers, pgn_text = game_node.headers, str(game_node)
+            yield game_row(headers, pgn_text, issue_number, source), scanned.end
+
+def existing_hashes(conn, hashes):
+    """The subset of `hashes` already stored in the games table"""
+    found = set()
+    hashes = list(hashes)
+    for i in range(0, len(hashes), SQL_IN_CHUNK):
+        chunk = hashes[i:i + SQL_IN_CHUNK]
+        rows = conn.execute(select(Game.content_hash).where(Game.content_hash.in_(chunk)))
+        found.update(r[0] for r in rows)
+    return found
+
+def stream_rows(stream, issue_number, skip_to=0, source=None):
+    """
+    Yield (row, end_offset) from a binary PGN stream (fast scan only, the stream
+    is not seekable). Games ending at or before skip_to are read past without
+    building rows, which is how a streamed import resumes from a checkpoint.
+    """
+    for scanned in scan_games(stream):
+        if scanned.end <= skip_to:
+            continue
+        yield game_row(scanned.headers, scanned.pgn, issue_number, source), scanned.end
+
+def import_summary(result, resumed_games=0):
+    summary = f"{result.count} games"
+    if result.duplicates:
+        summary += f" ({result.duplicates} duplicates skipped)"
+    summary += f" at {result.games_per_sec:.0f} games/sec"
+    if resumed_games:
+        summary += f", resumed after game {resumed_games}"
+    return summary
+
+def parse_chunk(pgn_path, issue_number, start, end, fast_scan=True, source=None):
+    """Process pool entry point: parse one byte range of a PGN file into (row, end_offset) pairs"""
+    return list(scan_rows(pgn_path, issue_number, start, end, fast_scan, source))
+
+def split_pgn(pgn_path, chunk_bytes=None, start=0):
+    """
+    Split a PGN file from `start` on into (start, end) byte ranges of roughly
+    chunk_bytes, each starting on an `[Event ` line so no game straddles two chunks.
+    """
+    chunk_bytes = chunk_bytes or PARALLEL_CHUNK_BYTES
+    size = os.path.getsize(pgn_path)
+    bounds = [start]
+    with open(pgn_path, "rb") as pgn_file:
+        target = start + chunk_bytes
+        while target < size:
+            pgn_file.seek(target)
+            pgn_file.readline() # Skip the partial line we landed in
+            while True:
+                pos = pgn_file.tell()
+                line = pgn_file.readline()
+                if not line or line.startswith(b"[Event "):
+                    break
+            if not line:
+                break
+            bounds.append(pos)
+            target = pos + chunk_bytes
+    if size > start:
+        bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
 
 class TWICService:
-    def __init__(self, download_dir=None, db_dir=None):
+    def __init__(self, download_dir=None, db_dir=None, bind=None, http=None):
         user_base = Path.home() / ".macbase"
         self.download_dir = download_dir if download_dir else str(user_base / "data" / "downloads")
         self.db_dir = db_dir if db_dir else str(user_base / "data" / "db")
+        self.bind = bind # Engine to import into, defaults to the app database
+        self.http = http or get_twic_client()
         os.makedirs(self.download_dir, exist_ok=True)
         os.makedirs(self.db_dir, exist_ok=True)
 
     def get_latest_issue_number(self):
         try:
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-            }
-            response = requests.get("https://theweekinchess.com/twic", headers=headers, timeout=10)
-            if response.status_code != 200:
-                print(f"Failed to fetch TWIC page: {response.status_code}")
-                return None
-                
+            html = self.http.get_text("/twic", timeout=10)
             # Naive scrape: find first link like "twic1578.html"
-            match = re.search(r'twic(\d+)\.html', response.text)
+            match = re.search(r'twic(\d+)\.html', html)
             if match:
                 return int(match.group(1))
             return None
@@ -40,85 +182,289 @@ class TWICService:
             print(f"Error checking latest TWIC: {e}")
             return None
 
-    def download_twic(self, issue_number: int, progress_callback=None):
-        # File format is usually twic<number>g.zip
+    def stream_import(self, issue_number, progress_callback=None, keep_zip=True, batch_size=IMPORT_BATCH_SIZE, workers=1):
+        """
+        Download, decompress and import a TWIC issue.
+
+        With one worker the zip member is inflated and parsed while the
+        response is still arriving, so nothing is extracted to disk. With
+        keep_zip the compressed archive is saved to download_dir as it streams
+        in; a complete copy is re-imported from disk, and a partial one is
+        resumed with a Range request.
+
+        workers > 1 (None = one per CPU) splits the PGN across processes like
+        parse_pgn, which needs the whole file: the archive is downloaded (and
+        always kept) first, its PGN extracted next to it for the import and
+        removed afterwards.
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
         filename = f"twic{issue_number}g.zip"
-        url = f"{TWIC_BASE_URL}{filename}"
-        
-        print(f"Downloading {url}...")
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        }
-        
+        print(f"Streaming {self.http.url(TWIC_ZIP_PATH + filename)}...")
+        zip_path = os.path.join(self.download_dir, filename) if keep_zip or workers > 1 else None
+
         try:
-            response = requests.get(url, headers=headers, stream=True, timeout=30)
-            
-            if response.status_code == 200:
-                total_size = int(response.headers.get('content-length', 0))
-                zip_path = os.path.join(self.download_dir, filename)
-                
-                downloaded = 0
-                with open(zip_path, "wb") as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
-                            downloaded += len(chunk)
-                            if progress_callback and total_size > 0:
-                                percent = int((downloaded / total_size) * 100)
-                                progress_callback(f"Downloading... {percent}%")
-                
-                # Unzip
-                with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                    zip_ref.extractall(self.download_dir)
-                
-                return True, f"Downloaded and extracted {filename}"
-            else:
-                return False, f"Failed to download {filename}: Status {response.status_code}"
+            source = self.http.download(TWIC_ZIP_PATH + filename, zip_path, chunk_size=DOWNLOAD_CHUNK_SIZE)
+            if workers > 1:
+                for _ in source:
+                    pass # Saved to zip_path as it arrives
+        except requests.HTTPError as e:
+            return False, f"Failed to download {filename}: Status {e.response.status_code}"
         except Exception as e:
             return False, f"Download error: {str(e)}"
 
-    def parse_pgn(self, pgn_path, issue_number, progress_callback=None):
-        session = SessionLocal()
-        init_db() # Ensure tables exist
-        
-        count = 0
+        if workers > 1:
+            return self.import_zip_file(zip_path, issue_number, progress_callback, batch_size, workers)
+        chunks = self._read_ahead(source)
+        return self.import_zip_stream(chunks, issue_number, progress_callback, batch_size)
+
+    def import_zip_file(self, zip_path, issue_number, progress_callback=None, batch_size=IMPORT_BATCH_SIZE, workers=None):
+        """Extract the PGN of a downloaded TWIC archive and import it with parse_pgn in `workers` processes"""
+        pgn_path = os.path.join(self.download_dir, f"twic{issue_number}.pgn")
         try:
-            with open(pgn_path, encoding="utf-8", errors="replace") as pgn_file:
-                while True:
-                    game_node = chess.pgn.read_game(pgn_file)
-                    if game_node is None:
-                        break
-                    
-                    headers = game_node.headers
-                    
-                    game_db = Game(
-                        event=headers.get("Event", "?"),
-                        site=headers.get("Site", "?"),
-                        date=headers.get("Date", "????.??.??"),
-                        round=headers.get("Round", "?"),
-                        white=headers.get("White", "?"),
-                        black=headers.get("Black", "?"),
-                        result=headers.get("Result", "*"),
-                        eco=headers.get("ECO", ""),
-                        opening=headers.get("Opening", None),  # Extract Opening from PGN header
-                        white_elo=int(headers.get("WhiteElo", 0)) if headers.get("WhiteElo", "").isdigit() else None,
-                        black_elo=int(headers.get("BlackElo", 0)) if headers.get("BlackElo", "").isdigit() else None,
-                        pgn=str(game_node), # Stores full PGN including moves
-                        twic_issue=issue_number,
-                        is_commented=0
-                    )
-                    session.add(game_db)
-                    count += 1
-                    
-                    if count % 100 == 0:
-                        session.commit()
-                        if progress_callback:
-                            progress_callback(count)
-            
-            session.commit()
-            return True, f"Imported {count} games from {pgn_path}"
+            with open_pgn_stream(zip_path) as pgn_stream, open(pgn_path, "wb") as pgn_file:
+                shutil.copyfileobj(pgn_stream, pgn_file, DOWNLOAD_CHUNK_SIZE)
+            # The checkpoint counts decompressed bytes either way, so a streamed import resumes here too
+            return self.parse_pgn(pgn_path, issue_number, progress_callback, batch_size, workers=workers)
         except Exception as e:
-            session.rollback()
-            return False, f"Error parsing PGN: {str(e)}"
+            return False, f"Error importing TWIC {issue_number}: {str(e)}"
+        finally:
+            if os.path.exists(pgn_path):
+                os.remove(pgn_path)
+
+    def import_zip_stream(self, chunks, issue_number, progress_callback=None, batch_size=IMPORT_BATCH_SIZE, resume=True):
+        """
+        Import the .pgn member of a zip archive arriving as an iterable of byte chunks.
+        With resume, games before the issue's checkpoint are skipped.
+        """
+        chunks = iter(chunks)
+        try:
+            pgn_stream = io.BufferedReader(ZipMemberReader(chunks), buffer_size=1024 * 1024)
+            result, resumed_games = self.import_pgn_stream(pgn_stream, issue_number, progress_callback, batch_size, resume)
+            for _ in chunks:
+                pass # Read the central directory too, so the saved archive is complete
+            return True, f"Imported {import_summary(result, resumed_games)} from {pgn_stream.raw.name}"
+        except Exception as e:
+            return False, f"Error importing TWIC {issue_number}: {str(e)}"
+        finally:
+            if hasattr(chunks, "close"):
+                chunks.close()
+
+    def import_pgn_stream(self, pgn_stream, issue_number=None, progress_callback=None, batch_size=IMPORT_BATCH_SIZE,
+                          resume=True, source=None, checkpoint_key=None):
+        """
+        Import games from a forward-only binary PGN stream; returns (ImportResult, resumed_games).
+        The checkpoint is keyed by checkpoint_key, else source (or the TWIC issue), and counts
+        decompressed bytes.
+        """
+        init_db(self.bind) # Ensure tables exist
+        key = checkpoint_key or source or twic_checkpoint_key(issue_number)
+        offset, resumed_games = self.get_checkpoint(key) if resume else (0, 0)
+        rows = stream_rows(pgn_stream, issue_number, skip_to=offset, source=source)
+        result = self._bulk_insert(rows, progress_callback, batch_size, checkpoint=(key, resumed_games))
+        return result, resumed_games
+
+    def import_file(self, path, source, progress_callback=None, batch_size=IMPORT_BATCH_SIZE, workers=1, resume=True):
+        """
+        Import an uploaded .pgn, .zip or .gz file, tagging its games with `source`.
+        Plain PGN goes through parse_pgn (seekable, so it can run in parallel);
+        compressed files are decompressed as they are parsed. The checkpoint is
+        keyed by the file (file_checkpoint_key), since several files can share a source.
+        """
+        key = file_checkpoint_key(path)
+        if not path.lower().endswith((".zip", ".gz")):
+            return self.parse_pgn(path, None, progress_callback, batch_size, workers=workers, resume=resume, source=source,
+                                  checkpoint_key=key)
+        try:
+            with open_pgn_stream(path) as pgn_stream:
+                result, resumed_games = self.import_pgn_stream(pgn_stream, None, progress_callback, batch_size, resume, source,
+                                                               checkpoint_key=key)
+            return True, f"Imported {import_summary(result, resumed_games)} from {os.path.basename(path)}"
+        except Exception as e:
+            return False, f"Error importing {os.path.basename(path)}: {str(e)}"
+
+    def _read_ahead(self, source):
+        """
+        Pull chunks from `source` on a background thread and yield them, so the
+        network keeps receiving while the caller inflates and inserts.
+        """
+        chunk_queue = queue.Queue(maxsize=DOWNLOAD_QUEUE_CHUNKS)
+        stop = threading.Event()
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    chunk_queue.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def pump():
+            try:
+                for chunk in source:
+                    if not put(chunk):
+                        return
+                put(None)
+            except Exception as e:
+                put(e)
+            finally:
+                if hasattr(source, "close"):
+                    source.close()
+
+        thread = threading.Thread(target=pump, daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = chunk_queue.get()
+                if item is None:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
         finally:
-            session.close()
+            stop.set()
+
+    def parse_pgn(self, pgn_path, issue_number, progress_callback=None, batch_size=IMPORT_BATCH_SIZE,
+                  fast_scan=True, workers=1, resume=True, source=None, checkpoint_key=None):
+        """
+        Bulk-import a PGN file. Rows are inserted with Core executemany in
+        batches of `batch_size`, one transaction per batch, on a connection
+        using IMPORT_PRAGMAS. progress_callback(count, games_per_sec) is
+        called after every committed batch.
+
+        With fast_scan (the default) only the tag pairs are parsed and the
+        game text is stored exactly as it appears in the file. fast_scan=False
+        runs every game through chess.pgn.read_game and stores the re-printed
+        PGN instead.
+
+        workers > 1 (None = one per CPU) splits the file at `[Event ` lines and
+        parses the chunks in a process pool. This process stays the only
+        SQLite writer and consumes chunk results in file order, so progress
+        and row order match a serial import.
+
+        Every batch commits a checkpoint (byte offset + game count) for the
+        issue in the same transaction. With resume, an interrupted import
+        seeks past what was already committed instead of starting over.
+
+        source tags the rows and keys the checkpoint for files that aren't a
+        TWIC issue (issue_number is None then); checkpoint_key overrides the key.
+        """
+        init_db(self.bind) # Ensure tables exist
+        if workers is None:
+            workers = os.cpu_count() or 1
+        key = checkpoint_key or source or twic_checkpoint_key(issue_number)
+        offset, resumed_games = self.get_checkpoint(key) if resume else (0, 0)
+        checkpoint = (key, resumed_games)
+
+        chunks = split_pgn(pgn_path, start=offset) if workers > 1 else []
+        try:
+            if len(chunks) > 1:
+                with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+                    rows = self._parallel_rows(executor, pgn_path, issue_number, chunks, fast_scan, workers, source)
+                    result = self._bulk_insert(rows, progress_callback, batch_size, checkpoint)
+            else:
+                rows = scan_rows(pgn_path, issue_number, start=offset, fast_scan=fast_scan, source=source)
+                result = self._bulk_insert(rows, progress_callback, batch_size, checkpoint)
+            return True, f"Imported {import_summary(result, resumed_games)} from {pgn_path}"
+        except Exception as e:
+            return False, f"Error parsing PGN: {str(e)}"
+
+    def get_checkpoint(self, key):
+        """(byte_offset, games) to resume an unfinished import from, (0, 0) otherwise"""
+        with (self.bind or engine).connect() as conn:
+            row = conn.execute(
+                select(ImportCheckpoint.byte_offset, ImportCheckpoint.games, ImportCheckpoint.completed)
+                .where(ImportCheckpoint.source == key)
+            ).first()
+        if not row or row.completed:
+            return 0, 0
+        return row.byte_offset, row.games
+
+    def clear_checkpoint(self, key):
+        with (self.bind or engine).begin() as conn:
+            conn.execute(ImportCheckpoint.__table__.delete().where(ImportCheckpoint.source == key))
+
+    def _parallel_rows(self, executor, pgn_path, issue_number, chunks, fast_scan, workers, source=None):
+        """Yield rows chunk by chunk in file order while up to 2x workers chunks parse ahead"""
+        pending = deque()
+        chunks = iter(chunks)
+        for start, end in chunks:
+            pending.append(executor.submit(parse_chunk, pgn_path, issue_number, start, end, fast_scan, source))
+            if len(pending) >= workers * 2:
+                break
+        while pending:
+            rows = pending.popleft().result()
+            next_chunk = next(chunks, None)
+            if next_chunk:
+                pending.append(executor.submit(parse_chunk, pgn_path, issue_number, *next_chunk, fast_scan, source))
+            yield from rows
+
+    def _bulk_insert(self, rows, progress_callback=None, batch_size=IMPORT_BATCH_SIZE, checkpoint=None):
+        """
+        Insert an iterable of (row, end_offset) in batches. Games whose
+        content_hash is already stored, or repeated within the import, are
+        skipped. checkpoint=(key, games_before) records the byte offset and
+        game count reached with every batch; the key is marked completed at
+        the end. Returns an ImportResult.
+        """
+        insert_stmt = Game.__table__.insert()
+        count = 0
+        duplicates = 0
+        started = time.perf_counter()
+        key, games_read = checkpoint if checkpoint else (None, 0)
+        offset = 0
+
+        def rate():
+            elapsed = time.perf_counter() - started
+            return count / elapsed if elapsed > 0 else 0.0
+
+        def save_checkpoint(conn, completed=0):
+            values = {
+                "source": key,
+                "byte_offset": offset,
+                "games": games_read,
+                "completed": completed,
+                "updated_at": datetime.utcnow().isoformat(),
+            }
+            stmt = sqlite_insert(ImportCheckpoint.__table__).values(**values)
+            conn.execute(stmt.on_conflict_do_update(index_elements=["source"], set_=values))
+
+        players = PlayerCache()
+        with bulk_import_connection(self.bind) as conn:
+            batch = {}
+
+            def flush(completed=0):
+                nonlocal count, duplicates
+                with import_write_lock:
+                    stored = existing_hashes(conn, batch.keys())
+                    fresh = [row for h, row in batch.items() if h not in stored]
+                    if fresh:
+                        players.link_rows(conn, fresh)
+                        last_id = max_game_id(conn)
+                        conn.execute(insert_stmt, fresh)
+                        index_games_after(conn, last_id) # The insert trigger is off on this connection
+                        record_games_after(conn, last_id)
+                        record_events_after(conn, last_id)
+                    if key:
+                        save_checkpoint(conn, completed)
+                    conn.commit()
+                if fresh:
+                    invalidate_event_cache()
+                count += len(fresh)
+                duplicates += len(batch) - len(fresh)
+                if batch and progress_callback:
+                    progress_callback(count, rate())
+                batch.clear()
+
+            for row, offset in rows:
+                games_read += 1
+                if row["content_hash"] in batch:
+                    duplicates += 1
+                    continue
+                batch[row["content_hash"]] = row
+                if len(batch) >= batch_size:
+                    flush()
+            flush(completed=1)
+
+        return ImportResult(count, duplicates, rate())
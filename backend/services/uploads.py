@@ -0,0 +1,163 @@
+import gzip
+import io
+import os
+import re
+import uuid
+from collections import namedtuple
+
+try:
+    from python_multipart import MultipartParser
+    from python_multipart.multipart import parse_options_header
+except ImportError: # python-multipart < 0.0.13 only ships the `multipart` package
+    from multipart import MultipartParser
+    from multipart.multipart import parse_options_header
+
+from starlette.concurrency import run_in_threadpool
+
+from .zip_stream import ZipMemberReader
+
+# Streaming upload of local PGN collections (.pgn, .zip or gzip-compressed PGN).
+# The multipart body is parsed as it arrives and the file part is written straight
+# to the uploads directory, still compressed, so a multi-GB upload never sits in
+# memory or in a spooled temp file. The import itself runs as a queued job.
+
+UPLOAD_SUFFIXES = (".pgn", ".zip", ".gz")
+UPLOAD_FILE_FIELD = "file"
+UPLOAD_READ_SIZE = 1024 * 1024
+
+# path: where the file part was saved, filename: client file name, fields: other form fields
+ReceivedUpload = namedtuple("ReceivedUpload", ["path", "filename", "fields"])
+
+def safe_filename(filename):
+    name = os.path.basename(filename or "").strip()
+    name = re.sub(r"[^A-Za-z0-9._ -]+", "_", name)
+    return name or "upload.pgn"
+
+def upload_source_tag(filename):
+    """Default `source` for games from an uploaded file, e.g. 'upload:my_games'"""
+    name = safe_filename(filename)
+    for suffix in (".gz", ".zip", ".pgn"):
+        if name.lower().endswith(suffix):
+            name = name[:-len(suffix)]
+    return f"upload:{name}"
+
+class _UploadSink:
+    """python-multipart callbacks: the file part goes to disk, small fields are kept in memory"""
+
+    def __init__(self, upload_dir):
+        self.upload_dir = upload_dir
+        self.fields = {}
+        self.path = None
+        self.filename = None
+        self._headers = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._name = None
+        self._value = None
+        self._file = None
+
+    def callbacks(self):
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": lambda data, start, end: self._add_header(field=data[start:end]),
+            "on_header_value": lambda data, start, end: self._add_header(value=data[start:end]),
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self):
+        self._headers = {}
+        self._name = None
+        self._value = None
+
+    def _add_header(self, field=b"", value=b""):
+        self._header_field += field
+        self._header_value += value
+
+    def on_header_end(self):
+        self._headers[self._header_field.decode("latin-1").lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get("content-disposition", b""))
+        self._name = options.get(b"name", b"").decode("utf-8", errors="replace")
+        filename = options.get(b"filename")
+        if self._name == UPLOAD_FILE_FIELD and filename is not None:
+            if self.path:
+                raise ValueError("Only one file can be uploaded per request")
+            self.filename = safe_filename(filename.decode("utf-8", errors="replace"))
+            if not self.filename.lower().endswith(UPLOAD_SUFFIXES):
+                raise ValueError(f"Unsupported file type: {self.filename} (expected .pgn, .zip or .gz)")
+            # Prefixed so two uploads of the same file name never share a path
+            self.path = os.path.join(self.upload_dir, f"{uuid.uuid4().hex[:8]}-{self.filename}")
+            self._file = open(f"{self.path}.part", "wb")
+        else:
+            self._value = bytearray()
+
+    def on_part_data(self, data, start, end):
+        if self._file:
+            self._file.write(data[start:end])
+        elif self._value is not None:
+            if len(self._value) + end - start > 64 * 1024:
+                raise ValueError(f"Form field '{self._name}' is too large")
+            self._value += data[start:end]
+
+    def on_part_end(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+            os.replace(f"{self.path}.part", self.path)
+        elif self._value is not None:
+            self.fields[self._name] = self._value.decode("utf-8", errors="replace")
+
+    def abort(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+            os.remove(f"{self.path}.part")
+
+async def receive_upload(request, upload_dir):
+    """
+    Parse a multipart/form-data request body as it streams in. The part named
+    'file' is written to upload_dir; raises ValueError for a malformed request
+    or an unsupported file type.
+    """
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in options:
+        raise ValueError("Expected a multipart/form-data upload")
+
+    os.makedirs(upload_dir, exist_ok=True)
+    sink = _UploadSink(upload_dir)
+    parser = MultipartParser(options[b"boundary"], sink.callbacks())
+    try:
+        async for chunk in request.stream():
+            if chunk:
+                # File writes block, keep them off the event loop
+                await run_in_threadpool(parser.write, chunk)
+        parser.finalize()
+    except Exception:
+        sink.abort()
+        raise
+    if not sink.path:
+        raise ValueError(f"No '{UPLOAD_FILE_FIELD}' part in the upload")
+    return ReceivedUpload(sink.path, sink.filename, sink.fields)
+
+def _file_chunks(path, chunk_size=UPLOAD_READ_SIZE):
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+def open_pgn_stream(path):
+    """Binary PGN stream for an uploaded .pgn, .zip or gzip file, decompressed on the fly"""
+    lower = path.lower()
+    if lower.endswith(".zip"):
+        return io.BufferedReader(ZipMemberReader(_file_chunks(path)), buffer_size=UPLOAD_READ_SIZE)
+    if lower.endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
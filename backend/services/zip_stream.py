@@ -0,0 +1,126 @@
+import io
+import struct
+import zlib
+
+# Forward-only zip reader. zipfile.ZipFile needs a seekable file because it starts
+# from the central directory at the end of the archive; this walks the local file
+# headers instead, so a member can be inflated while the archive is still downloading.
+
+LOCAL_HEADER_SIG = b"PK\x03\x04"
+DATA_DESCRIPTOR_SIG = b"PK\x07\x08"
+LOCAL_HEADER = struct.Struct("<4sHHHHHIIIHH")
+
+STORED = 0
+DEFLATED = 8
+FLAG_DATA_DESCRIPTOR = 0x08
+
+class ZipMemberReader(io.RawIOBase):
+    """
+    Readable binary stream over the first zip member whose name ends with `suffix`,
+    decompressed on the fly from an iterable of raw archive chunks.
+    """
+
+    def __init__(self, chunks, suffix=".pgn"):
+        self._chunks = iter(chunks)
+        self._suffix = suffix.lower()
+        self._raw = bytearray() # Compressed bytes received but not consumed yet
+        self._out = bytearray() # Decompressed bytes not handed out yet
+        self._member = None
+        self._eof = False
+        self.name = None
+
+    def readable(self):
+        return True
+
+    def _pull(self):
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            return False
+        self._raw += chunk
+        return True
+
+    def _take(self, size):
+        while len(self._raw) < size:
+            if not self._pull():
+                raise ValueError("Truncated zip archive")
+        data = bytes(self._raw[:size])
+        del self._raw[:size]
+        return data
+
+    def _skip_member(self, header):
+        _, _, flags, method, _, _, _, comp_size, _, _, _ = header
+        if method == DEFLATED:
+            inflater = zlib.decompressobj(-zlib.MAX_WBITS)
+            while not inflater.eof:
+                if not self._raw and not self._pull():
+                    raise ValueError("Truncated zip archive")
+                inflater.decompress(bytes(self._raw))
+                self._raw = bytearray(inflater.unused_data)
+        elif flags & FLAG_DATA_DESCRIPTOR:
+            raise ValueError("Cannot skip a stored zip member of unknown size")
+        else:
+            self._take(comp_size)
+        if flags & FLAG_DATA_DESCRIPTOR:
+            sig = self._take(4)
+            self._take(12 if sig == DATA_DESCRIPTOR_SIG else 8)
+
+    def _open_member(self):
+        while True:
+            header = LOCAL_HEADER.unpack(self._take(LOCAL_HEADER.size))
+            sig, _, flags, method, _, _, crc, comp_size, _, name_len, extra_len = header
+            if sig != LOCAL_HEADER_SIG:
+                raise ValueError(f"No {self._suffix} file found in zip archive")
+            name = self._take(name_len).decode("utf-8", errors="replace")
+            self._take(extra_len)
+
+            if not name.lower().endswith(self._suffix):
+                self._skip_member(header)
+                continue
+            if method not in (STORED, DEFLATED):
+                raise ValueError(f"Unsupported zip compression method {method} for {name}")
+            if method == STORED and flags & FLAG_DATA_DESCRIPTOR:
+                raise ValueError(f"Cannot stream stored zip member {name} of unknown size")
+
+            self.name = name
+            self._member = {
+                "method": method,
+                "inflater": zlib.decompressobj(-zlib.MAX_WBITS) if method == DEFLATED else None,
+                "remaining": comp_size,
+                "crc": None if flags & FLAG_DATA_DESCRIPTOR else crc,
+                "running_crc": 0,
+            }
+            return
+
+    def _fill(self):
+        """Decompress at least one more piece of the member, or mark EOF"""
+        if self._member is None:
+            self._open_member()
+        member = self._member
+
+        if not self._raw and not self._pull():
+            raise ValueError("Truncated zip archive")
+
+        if member["method"] == DEFLATED:
+            data = member["inflater"].decompress(bytes(self._raw))
+            self._raw = bytearray(member["inflater"].unused_data)
+            finished = member["inflater"].eof
+        else:
+            data = bytes(self._raw[:member["remaining"]])
+            del self._raw[:member["remaining"]]
+            member["remaining"] -= len(data)
+            finished = member["remaining"] == 0
+
+        member["running_crc"] = zlib.crc32(data, member["running_crc"])
+        self._out += data
+        if finished:
+            if member["crc"] is not None and member["crc"] != member["running_crc"]:
+                raise ValueError(f"CRC mismatch in {self.name}")
+            self._eof = True
+
+    def readinto(self, buffer):
+        while not self._out and not self._eof:
+            self._fill()
+        size = min(len(buffer), len(self._out))
+        buffer[:size] = self._out[:size]
+        del self._out[:size]
+        return size
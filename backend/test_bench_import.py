@@ -0,0 +1,28 @@
+import io
+
+import chess.pgn
+
+from bench_import import generate_pgn, run_single
+from services.pgn_scanner import content_hash, scan_games
+
+
+def test_generate_pgn_makes_distinct_valid_games(tmp_path):
+    path = tmp_path / "bench.pgn"
+    generate_pgn(str(path), 300)
+
+    with open(path, "rb") as f:
+        games = list(scan_games(f))
+    assert len(games) == 300
+    assert len({content_hash(g.headers, g.pgn) for g in games}) == 300
+    # The shortened movetext is still legal chess
+    game = chess.pgn.read_game(io.StringIO(games[0].pgn))
+    assert not game.errors and game.end().ply() > 0
+
+
+def test_run_single_reports_metrics():
+    result = run_single(200, workers=1, fast_scan=True, batch_size=50, seed=1)
+
+    assert result["games"] == 200
+    assert result["games_per_sec"] > 0
+    assert result["peak_rss_mb"] > 0 and result["db_mb"] > 0
+    assert "200 games" in result["message"]
@@ -0,0 +1,26 @@
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import OperationalError
+
+from services.database import init_db, set_query_only
+
+
+def test_readers_see_last_commit_during_a_write(tmp_path):
+    url = f"sqlite:///{tmp_path}/wal.db"
+    writer = create_engine(url)
+    init_db(writer)
+    # A short busy timeout: with rollback journaling this read would fail on the writer's lock
+    reader = create_engine(url, connect_args={"timeout": 0.1})
+    event.listen(reader, "connect", set_query_only)
+
+    with writer.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        conn.execute(text("INSERT INTO games (white, black) VALUES ('A', 'B')"))
+        conn.commit()
+
+        conn.execute(text("INSERT INTO games (white, black) VALUES ('C', 'D')"))  # Not committed yet, holds the write lock
+        with reader.connect() as read:
+            assert read.execute(text("SELECT white FROM games")).scalars().all() == ["A"]
+            with pytest.raises(OperationalError):
+                read.execute(text("DELETE FROM games"))
+        conn.commit()
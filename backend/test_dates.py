@@ -0,0 +1,55 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from services.database import Game, init_db
+from services.dates import DATE_DAY, DATE_KEY_BACKFILL, DATE_MONTH, DATE_PRECISION_BACKFILL, DATE_UNKNOWN, DATE_YEAR, date_key
+from services.pagination import next_cursor, paginate
+
+DATES = [
+    "2024.03.15", "2024.03.??", "2024.??.??", "2024.??.15", "2024.13.01", "2024.02.32", "2024",
+    "????.??.??", "????.03.15", "", None, "0000.00.00", "0000.03.15", "0000.03.??", "0000.??.15",
+    "1999.12.31", "2024-03-15", "2024.3.15",
+]
+
+
+def test_date_key():
+    assert date_key("2024.03.15") == (20240315, DATE_DAY)
+    assert date_key("2024.03.??") == (20240300, DATE_MONTH)
+    assert date_key("2024.??.15") == (20240000, DATE_YEAR)
+    assert date_key("2024.13.01") == (20240000, DATE_YEAR)
+    assert date_key("????.03.15") == (0, DATE_UNKNOWN)
+    assert date_key(None) == (0, DATE_UNKNOWN)
+
+
+@pytest.mark.parametrize("date", DATES)
+def test_backfill_matches_date_key(tmp_path, date):
+    engine = create_engine(f"sqlite:///{tmp_path}/dates.db")
+    init_db(engine)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO games (date) VALUES (:date)"), {"date": date})
+        conn.exec_driver_sql(DATE_KEY_BACKFILL)
+        conn.exec_driver_sql(DATE_PRECISION_BACKFILL)
+        row = conn.execute(text("SELECT date_key, date_precision FROM games")).one()
+    assert tuple(row) == date_key(date)
+
+
+def test_date_sort_pages(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/dates.db")
+    init_db(engine)
+    with Session(engine) as db:
+        for i, date in enumerate(DATES * 3):
+            key, precision = date_key(date)
+            db.add(Game(white=f"P{i}", date=date, date_key=key, date_precision=precision))
+        db.commit()
+
+        seen, cursor = [], None
+        while True:
+            page = paginate(db.query(Game), "date", cursor).limit(4).all()
+            seen += [(g.date_key, g.id) for g in page]
+            cursor = next_cursor(page, "date", 4)
+            if not cursor:
+                break
+    assert seen == sorted(seen, reverse=True)
+    assert len(seen) == len(DATES) * 3
+    assert seen[0][0] == 20240315 and seen[-1][0] == 0
@@ -0,0 +1,53 @@
+import os
+
+from sqlalchemy import create_engine, text
+
+from services.event_catalog import event_names
+from services.maintenance import delete_issue_games, index_positions, needs_vacuum, reclaim_space
+from services.twic_service import TWICService
+
+GAME = '[Event "E{e}"]\n[White "White{n}"]\n[Black "Black{n}"]\n[Result "1-0"]\n\n1. e4 e5 2. Nf3 Nc6 3. Bb5 a6 {pad} 1-0\n\n'
+
+
+def test_delete_in_batches_then_reclaim_space(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/delete.db")
+    service = TWICService(download_dir=str(tmp_path), db_dir=str(tmp_path), bind=engine)
+    for issue, events in ((1, "AB"), (2, "BC")):
+        path = tmp_path / f"twic{issue}.pgn"
+        # Comments make the games big enough to leave free pages behind
+        path.write_text("".join(GAME.format(e=events[n % 2], n=f"{issue}_{n}", pad="{" + "x" * 2000 + "}") for n in range(300)))
+        assert service.parse_pgn(str(path), issue)[0]
+    index_positions(engine, workers=1)
+
+    progress = []
+    assert delete_issue_games(1, bind=engine, report=progress.append, batch_size=128) == 300
+    assert progress == [128, 256, 300]
+
+    with engine.connect() as conn:
+        def count(sql):
+            return conn.exec_driver_sql(sql).scalar()
+        assert count("SELECT count(*) FROM games") == 300
+        assert conn.exec_driver_sql("SELECT source, games FROM issue_stats").all() == [("twic:2", 300)]
+        assert conn.exec_driver_sql("SELECT name, games FROM events ORDER BY name").all() == [("EB", 150), ("EC", 150)]
+        assert event_names(conn) == ["EB", "EC"]
+        assert count("SELECT count(*) FROM games_fts WHERE games_fts MATCH '\"white1_\"'") == 0
+        assert count("SELECT count(*) FROM game_positions WHERE game_id NOT IN (SELECT id FROM games)") == 0
+        assert count("SELECT SUM(games) FROM opening_moves WHERE move IS NOT NULL AND hash = "
+                     "(SELECT hash FROM game_positions WHERE ply = 0 LIMIT 1)") == 300
+
+    def pages():
+        with engine.connect() as conn:
+            return conn.exec_driver_sql("PRAGMA page_count").scalar()
+
+    before = pages()
+    assert needs_vacuum(engine, min_free_pages=10)
+    steps = []
+    freed = reclaim_space(engine, report=steps.append, step_pages=50)
+    assert freed > 10
+    # One report per 50 pages, not per page
+    assert len(steps) == -(-freed // 50)
+    assert steps[-1] == freed
+    assert not needs_vacuum(engine, min_free_pages=1)
+    assert pages() == before - freed
+    # Checkpointed, so the file itself is that size now
+    assert os.path.getsize(tmp_path / "delete.db") == pages() * 4096
@@ -0,0 +1,37 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+from services.database import init_db
+from services.eco import code_to_eco, eco_to_code, parse_eco_ranges
+
+
+def test_eco_to_code():
+    assert eco_to_code("A00") == 0
+    assert eco_to_code("b90") == 190
+    assert eco_to_code("E99") == 499
+    assert eco_to_code("") is None
+    assert eco_to_code("F00") is None
+    assert code_to_eco(190) == "B90"
+
+
+def test_parse_eco_ranges_merges_prefixes():
+    assert parse_eco_ranges("B20-B99") == [(120, 199)]
+    assert parse_eco_ranges(["B20", "B21", "B2", "B3", "B4", "B5", "B6", "B7", "B8", "B9"]) == [(120, 199)]
+    assert parse_eco_ranges("D06,D1-D6") == [(306, 306), (310, 369)]
+    assert parse_eco_ranges("C") == [(200, 299)]
+    for bad in ("Sicilian", "B99-B20", ""):
+        with pytest.raises(ValueError):
+            parse_eco_ranges(bad)
+
+
+def test_init_db_backfills_eco_code(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/old.db")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE games (id INTEGER PRIMARY KEY, eco VARCHAR)"))
+        conn.execute(text("INSERT INTO games (eco) VALUES ('B90'), ('e12'), (''), (NULL), ('?')"))
+
+    init_db(engine)
+
+    with engine.connect() as conn:
+        codes = [r[0] for r in conn.execute(text("SELECT eco_code FROM games ORDER BY id"))]
+    assert codes == [190, 412, None, None, None]
@@ -0,0 +1,49 @@
+from sqlalchemy import create_engine, text
+
+from services.event_catalog import event_names, events_with_prefix
+from services.maintenance import dedupe_games
+from services.twic_service import TWICService
+
+GAME = '[Event "{event}"]\n[White "W{n}"]\n[Black "B{n}"]\n[Result "1-0"]\n\n1. e4 1-0\n\n'
+EVENTS = ["Tata Steel Masters", "Tata Steel Challengers", "Norway Chess", "Tata Steel Masters", "Ōsaka Open"]
+
+
+def catalog(engine):
+    with engine.connect() as conn:
+        return dict(conn.execute(text("SELECT name, games FROM events")).all())
+
+
+def test_catalog_follows_imports_and_deletes(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/events.db")
+    service = TWICService(download_dir=str(tmp_path), db_dir=str(tmp_path), bind=engine)
+    path = tmp_path / "a.pgn"
+    path.write_text("".join(GAME.format(event=e, n=n) for n, e in enumerate(EVENTS)))
+    assert service.parse_pgn(str(path), 1, batch_size=2)[0]
+
+    assert catalog(engine) == {"Tata Steel Masters": 2, "Tata Steel Challengers": 1, "Norway Chess": 1, "Ōsaka Open": 1}
+    with engine.connect() as conn:
+        assert event_names(conn) == sorted(set(EVENTS))
+        assert events_with_prefix(conn, "tata steel m") == ["Tata Steel Masters"]
+        assert events_with_prefix(conn, "TATA", limit=1) == ["Tata Steel Challengers"]
+        assert events_with_prefix(conn, "osaka") == ["Ōsaka Open"]
+
+    # A second import of the same issue adds nothing, a new one refreshes the cached list
+    assert service.parse_pgn(str(path), 1)[0]
+    path.write_text(GAME.format(event="Norway Chess", n=99) + GAME.format(event="Sinquefield Cup", n=98))
+    assert service.parse_pgn(str(path), 2)[0]
+    with engine.connect() as conn:
+        assert "Sinquefield Cup" in event_names(conn)
+    assert catalog(engine)["Norway Chess"] == 2
+
+
+def test_dedupe_uncounts_events(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/events.db")
+    service = TWICService(download_dir=str(tmp_path), db_dir=str(tmp_path), bind=engine)
+    path = tmp_path / "a.pgn"
+    path.write_text(GAME.format(event="Open", n=1) + GAME.format(event="Open", n=2))
+    assert service.parse_pgn(str(path), 1)[0]
+    with engine.begin() as conn:
+        # Make them two copies of one game from before content hashing
+        conn.execute(text("UPDATE games SET content_hash = NULL, white = 'W1', black = 'B1'"))
+    assert dedupe_games(engine) == (2, 1)
+    assert catalog(engine) == {"Open": 1}
@@ -0,0 +1,31 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from services.database import Game, init_db
+from services.game_counts import capped_count, counted_games
+from services.issue_stats import record_games_after
+
+
+def test_capped_count_and_counters(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/counts.db")
+    init_db(engine)
+    with Session(engine) as db:
+        db.add_all([
+            Game(white=f"P{i}", black="Q", white_elo=2000 + i % 10 * 100, twic_issue=1 + i % 2, source=f"twic:{1 + i % 2}")
+            for i in range(1000)
+        ])
+        db.commit()
+        record_games_after(db.connection(), 0)
+        db.commit()
+
+        assert counted_games(db) == 1000
+        assert counted_games(db, twic_issue=2) == 500
+        assert counted_games(db, source="twic:1") == 500
+
+        strong = db.query(Game.id).filter(Game.white_elo >= 2800)
+        assert capped_count(strong, limit=500) == (200, True)
+        # 500 of 1000 games match, spread evenly over the ids
+        count, exact = capped_count(db.query(Game.id).filter(Game.twic_issue == 1), limit=100)
+        assert not exact
+        assert 450 <= count <= 550
+        assert capped_count(db.query(Game.id), limit=100, total=1000) == (1000, False)
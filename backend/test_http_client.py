@@ -0,0 +1,149 @@
+import io
+import os
+import threading
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from sqlalchemy import create_engine, func, select
+
+from services.database import Base, Game
+from services.http_client import HttpClient
+from services.twic_service import TWICService
+
+PGN = b"".join(
+    b'[Event "Test"]\n[White "Player %d"]\n[Black "Opponent"]\n[Result "1-0"]\n\n1. e4 e5 2. Nf3 Nc6 1-0\n\n' % i
+    for i in range(2000)
+)
+
+
+def make_zip():
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_STORED) as zf:
+        zf.writestr("twic9999.pgn", PGN)
+    return buf.getvalue()
+
+
+class TWICStandIn(BaseHTTPRequestHandler):
+    """Serves fixed files with ETag revalidation and single-range requests, and logs what it saw"""
+
+    files = {}
+    log = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        body, etag = self.files.get(self.path, (None, None))
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        status = 200
+        if self.headers.get("If-None-Match") == etag:
+            status = 304
+        elif self.headers.get("Range") and self.headers.get("If-Range", etag) == etag:
+            start = int(self.headers["Range"].split("=")[1].rstrip("-"))
+            body = body[start:]
+            status = 206
+        self.log.append((self.path, status, self.headers.get("Range")))
+
+        self.send_response(status)
+        self.send_header("ETag", etag)
+        if status == 304:
+            self.end_headers()
+            return
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    TWICStandIn.files = {
+        "/twic": (b"<a href='twic9999.html'>TWIC 9999</a>", '"archive-v1"'),
+        "/zips/twic9999g.zip": (make_zip(), '"zip-v1"'),
+    }
+    TWICStandIn.log = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), TWICStandIn)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+
+@pytest.fixture
+def client(server, tmp_path):
+    return HttpClient(base_url=server, cache_dir=tmp_path / "cache", backoff=0)
+
+
+def test_get_text_revalidates_with_etag(client):
+    assert "twic9999" in client.get_text("/twic")
+    assert "twic9999" in client.get_text("/twic")
+
+    assert [status for _, status, _ in TWICStandIn.log] == [200, 304]
+
+
+def test_get_text_max_age_skips_request(client):
+    client.get_text("/twic")
+    client.get_text("/twic", max_age=3600)
+
+    assert len(TWICStandIn.log) == 1
+
+
+def test_download_resumes_partial_file_with_range(client, tmp_path):
+    archive = TWICStandIn.files["/zips/twic9999g.zip"][0]
+    dest = tmp_path / "twic9999g.zip"
+    (tmp_path / "twic9999g.zip.part").write_bytes(archive[:1000])
+    (tmp_path / "twic9999g.zip.validator").write_text('"zip-v1"')
+
+    data = b"".join(client.download("/zips/twic9999g.zip", str(dest)))
+
+    assert data == archive
+    assert dest.read_bytes() == archive
+    assert TWICStandIn.log == [("/zips/twic9999g.zip", 206, "bytes=1000-")]
+
+    # A complete archive is read back from disk
+    assert b"".join(client.download("/zips/twic9999g.zip", str(dest))) == archive
+    assert len(TWICStandIn.log) == 1
+
+
+def test_download_starts_over_when_file_changed(client, tmp_path):
+    archive = TWICStandIn.files["/zips/twic9999g.zip"][0]
+    dest = tmp_path / "twic9999g.zip"
+    (tmp_path / "twic9999g.zip.part").write_bytes(b"stale bytes")
+    (tmp_path / "twic9999g.zip.validator").write_text('"zip-v0"')
+
+    assert b"".join(client.download("/zips/twic9999g.zip", str(dest))) == archive
+    assert dest.read_bytes() == archive
+    assert TWICStandIn.log[0][1] == 200
+
+
+def test_stream_import_through_stand_in(client, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+    service = TWICService(download_dir=str(tmp_path / "dl"), db_dir=str(tmp_path / "db"), bind=engine, http=client)
+
+    success, msg = service.stream_import(9999)
+    assert success, msg
+    with engine.connect() as conn:
+        assert conn.execute(select(func.count(Game.id))).scalar() == 2000
+    assert (tmp_path / "dl" / "twic9999g.zip").exists()
+
+    success, msg = service.stream_import(1)
+    assert not success
+    assert "Status 404" in msg
+
+
+def test_stream_import_in_parallel(client, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+    service = TWICService(download_dir=str(tmp_path / "dl"), db_dir=str(tmp_path / "db"), bind=engine, http=client)
+
+    success, msg = service.stream_import(9999, keep_zip=False, batch_size=500, workers=2)
+    assert success, msg
+    with engine.connect() as conn:
+        assert conn.execute(select(func.count(Game.id))).scalar() == 2000
+    # The archive is kept, the extracted PGN is not
+    assert sorted(os.listdir(tmp_path / "dl")) == ["twic9999g.zip"]
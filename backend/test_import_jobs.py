@@ -0,0 +1,130 @@
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from services.database import ImportJob, init_db
+from services.import_jobs import ImportJobQueue
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/jobs.db", connect_args={"check_same_thread": False})
+    init_db(engine)
+    return sessionmaker(bind=engine)
+
+
+def wait_for(queue, job_id, states=("success", "error", "cancelled"), timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in states:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} stuck in {queue.get(job_id)['status']}")
+
+
+def test_jobs_run_and_record_throughput(session_factory):
+    def runner(job, ctx):
+        ctx.report("Importing...", games=1000, games_per_sec=500.0, force=True)
+        return True, f"Imported TWIC {job.twic_issue}"
+
+    queue = ImportJobQueue({"twic": runner}, session_factory=session_factory)
+    queue.start()
+    job, created = queue.enqueue("twic", twic_issue=1600)
+    done = wait_for(queue, job["id"])
+    queue.shutdown()
+
+    assert created
+    assert done["status"] == "success"
+    assert done["message"] == "Imported TWIC 1600"
+    assert done["games"] == 1000 and done["games_per_sec"] == 500.0
+    assert done["elapsed_sec"] is not None
+
+
+def test_enqueue_same_issue_twice_returns_active_job(session_factory):
+    queue = ImportJobQueue({"twic": lambda job, ctx: (True, "")}, session_factory=session_factory)
+    first, _ = queue.enqueue("twic", twic_issue=1600)
+    second, created = queue.enqueue("twic", twic_issue=1600)
+    assert not created and second["id"] == first["id"]
+
+
+def test_enqueue_other_kind_for_active_issue_returns_active_job(session_factory):
+    queue = ImportJobQueue({"twic": lambda job, ctx: (True, ""), "delete": lambda job, ctx: (True, "")}, session_factory=session_factory)
+    first, _ = queue.enqueue("twic", twic_issue=1600)
+    second, created = queue.enqueue("delete", twic_issue=1600)
+    assert not created and second["id"] == first["id"] and second["kind"] == "twic"
+    assert queue.enqueue("delete", twic_issue=1601)[1]
+
+
+def test_concurrent_enqueues_for_an_issue_create_one_job(session_factory):
+    queue = ImportJobQueue({}, session_factory=session_factory)
+    results = []
+    threads = [threading.Thread(target=lambda kind=kind: results.append(queue.enqueue(kind, twic_issue=1600)))
+               for kind in ("twic", "delete") * 4]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sum(created for _, created in results) == 1
+    assert len({job["id"] for job, _ in results}) == 1
+
+
+def test_running_job_does_not_absorb_new_work(session_factory):
+    started, release = threading.Event(), threading.Event()
+
+    def runner(job, ctx):
+        started.set()
+        release.wait(2)
+        return True, ""
+
+    queue = ImportJobQueue({"positions": runner}, max_workers=1, session_factory=session_factory)
+    queue.start()
+    first, _ = queue.enqueue("positions")
+    started.wait(2)
+    # The running job may be past the new games: queue another, and let later requests join that one
+    second, created = queue.enqueue("positions")
+    third, joined = queue.enqueue("positions")
+    release.set()
+    wait_for(queue, second["id"])
+    queue.shutdown()
+
+    assert created and second["id"] != first["id"]
+    assert not joined and third["id"] == second["id"]
+
+
+def test_cancel_running_job(session_factory):
+    started = threading.Event()
+
+    def runner(job, ctx):
+        started.set()
+        for n in range(1000):
+            ctx.report("Importing...", games=n)
+            time.sleep(0.01)
+        return True, "finished"
+
+    queue = ImportJobQueue({"twic": runner}, session_factory=session_factory)
+    queue.start()
+    job, _ = queue.enqueue("twic", twic_issue=1600)
+    started.wait(2)
+    queue.cancel(job["id"])
+    done = wait_for(queue, job["id"])
+    queue.shutdown()
+
+    assert done["status"] == "cancelled"
+
+
+def test_interrupted_jobs_are_requeued_on_start(session_factory):
+    db = session_factory()
+    db.add(ImportJob(kind="twic", twic_issue=1600, status="processing", created_at="2026-01-01T00:00:00"))
+    db.commit()
+    db.close()
+
+    queue = ImportJobQueue({"twic": lambda job, ctx: (True, "resumed")}, session_factory=session_factory)
+    queue.start()
+    done = wait_for(queue, queue.latest_for_issue(1600)["id"])
+    queue.shutdown()
+
+    assert done["status"] == "success" and done["message"] == "resumed"
@@ -0,0 +1,47 @@
+from sqlalchemy import create_engine, text
+
+from services.database import init_db
+from services.issue_stats import ensure_issue_stats
+from services.maintenance import dedupe_games, delete_issue_games
+from services.twic_service import TWICService
+
+GAME = '[Event "E{n}"]\n[White "W{n}"]\n[Black "B{n}"]\n[Result "1-0"]\n\n1. e4 1-0\n\n'
+
+
+def stats(engine):
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT source, twic_issue, games, first_id, last_id FROM issue_stats ORDER BY source")).all()
+
+
+def test_imports_and_deletes_keep_counts(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/stats.db")
+    service = TWICService(download_dir=str(tmp_path), db_dir=str(tmp_path), bind=engine)
+    first = tmp_path / "a.pgn"
+    first.write_text("".join(GAME.format(n=n) for n in range(5)))
+    second = tmp_path / "b.pgn"
+    second.write_text("".join(GAME.format(n=n) for n in range(3, 8)))
+
+    assert service.parse_pgn(str(first), 1, batch_size=2)[0]
+    assert service.import_file(str(second), "upload:b")[0]
+    # Games 3 and 4 were already imported with issue 1
+    assert stats(engine) == [("twic:1", 1, 5, 1, 5), ("upload:b", None, 3, 6, 8)]
+
+    assert delete_issue_games(1, bind=engine, batch_size=2) == 5
+    assert stats(engine) == [("upload:b", None, 3, 6, 8)]
+
+
+def test_dedupe_and_backfill(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/stats.db")
+    init_db(engine)
+    with engine.begin() as conn:
+        for n in (1, 1, 2):
+            conn.execute(text(
+                "INSERT INTO games (white, black, date, round, pgn, twic_issue, source, is_personal, is_commented) "
+                "VALUES ('W', 'B', '2024.01.01', :r, '1. e4 *', 7, 'twic:7', 0, 0)"
+            ), {"r": str(n)})
+        conn.execute(text("DELETE FROM issue_stats"))
+        ensure_issue_stats(conn)
+    assert stats(engine) == [("twic:7", 7, 3, 1, 3)]
+
+    assert dedupe_games(engine) == (3, 1)
+    assert stats(engine)[0][2] == 2
@@ -4,8 +4,8 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 import os
 
-from main import app, get_db
-from services.database import Base
+from main import app, get_db, get_read_db
+from services.database import init_db
 
 # Setup in-memory sqlite for testing
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -15,8 +15,8 @@ engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-# Create the tables
-Base.metadata.create_all(bind=engine)
+# Create the tables (and migrate a test.db left over from an older schema)
+init_db(engine)
 
 def override_get_db():
     try:
@@ -26,6 +26,7 @@ def override_get_db():
         db.close()
 
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_read_db] = override_get_db
 
 client = TestClient(app)
 
@@ -72,3 +73,126 @@ def test_parse_pgn_api():
     assert "e4" in data["moves"]
     assert "fens" in data
     assert len(data["fens"]) > 0
+
+def test_players_endpoints():
+    response = client.get("/api/players?q=carlsen")
+    assert response.status_code == 200
+    assert isinstance(response.json(), list)
+    assert client.get("/api/players/999999").status_code == 404
+
+def test_get_games_eco_range():
+    assert client.get("/api/games?eco_range=B20-B99").status_code == 200
+    assert client.get("/api/games?eco=" + '["B5", "B6"]').status_code == 200
+    assert client.get("/api/games?eco_range=Z00").status_code == 400
+
+def test_get_games_projection():
+    assert client.get("/api/games?fields=id,white,nope").status_code == 400
+    response = client.get("/api/games?fields=white,result&limit=5")
+    assert response.status_code == 200
+    for game in response.json():
+        assert set(game) == {"id", "white", "result"}
+    assert client.get("/api/games/999999").status_code == 404
+
+def test_count_games():
+    response = client.get("/api/games/count")
+    assert response.status_code == 200
+    assert response.json()["exact"] is True
+    response = client.get("/api/games/count?min_elo=2500&player=carlsen")
+    assert set(response.json()) == {"count", "exact"}
+    assert client.get("/api/games/count?eco_range=Z00").status_code == 400
+
+def test_get_twic_issues(monkeypatch):
+    import main
+    html = "<table>" + "".join(
+        f"<tr><td>{n}</td><td>2026-01-0{n % 10}</td><td></td><td></td><td></td><td>1,234</td></tr>" for n in (1620, 1621)
+    ) + "</table>"
+    monkeypatch.setattr(main.twic_service.http, "get_text", lambda path, timeout=None: html)
+    monkeypatch.setattr(main, "get_issue_events", lambda issue: ["Event"])
+    monkeypatch.setattr(main, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(main.import_jobs, "active_by_issue", lambda: {})
+    monkeypatch.setattr(main, "_twic_issues_cache", {"data": None, "fetched_at": None})
+
+    response = client.get("/api/twic-issues?limit=5")
+    assert response.status_code == 200
+    issues = response.json()
+    assert [i["issue"] for i in issues][:2] == [1621, 1620]
+    assert issues[0]["games"] == 1234 and issues[0]["imported"] is False
+
+def test_search_positions():
+    assert client.get("/api/positions/search?fen=not-a-fen").status_code == 400
+    response = client.get("/api/positions/search", params={"fen": "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1"})
+    assert response.status_code == 200
+    assert isinstance(response.json(), list)
+
+def test_opening_explorer():
+    assert client.get("/api/explorer?fen=not-a-fen").status_code == 400
+    response = client.get("/api/explorer", params={"fen": "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1", "min_elo": 2500})
+    assert response.status_code == 200
+    assert isinstance(response.json()["moves"], list)
+
+def test_get_stats():
+    response = client.get("/api/stats")
+    assert response.status_code == 200
+    assert isinstance(response.json()["total_games"], int)
+
+def test_get_events():
+    assert isinstance(client.get("/api/events").json(), list)
+    response = client.get("/api/events?prefix=tata&limit=5")
+    assert response.status_code == 200
+    assert len(response.json()) <= 5
+
+def test_upload_already_in_progress_removes_the_copy(monkeypatch, tmp_path):
+    import main
+    monkeypatch.setattr(main, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(main.import_jobs, "enqueue", lambda kind, **kw: ({"id": 7}, False))
+
+    response = client.post("/api/import/upload", files={"file": ("club.pgn", b"1. e4 e5 1-0\n", "application/octet-stream")})
+    assert response.status_code == 200
+    assert response.json()["status"] == "processing"
+    assert os.listdir(tmp_path) == []
+
+def test_annotating_a_game_keeps_it_indexed(monkeypatch, tmp_path):
+    import chess
+    import main
+    from services.maintenance import index_positions
+    from services.twic_service import TWICService
+
+    moves = "1. a4 h5 2. Ra3 Rh6 3. Rb3 Rb6"
+    path = tmp_path / "annotated.pgn"
+    path.write_text(f'[Event "Rook lift"]\n[White "Lift,A"]\n[Black "Lift,B"]\n[Result "*"]\n\n{moves} *\n\n')
+    assert TWICService(download_dir=str(tmp_path), db_dir=str(tmp_path), bind=engine).parse_pgn(str(path), 99999)[0]
+    index_positions(engine, workers=1)
+    board = chess.Board()
+    for san in ("a4", "h5", "Ra3", "Rh6", "Rb3", "Rb6"):
+        board.push_san(san)
+    found = client.get("/api/positions/search", params={"fen": board.fen()}).json()
+    game_id = found[0]["id"]
+
+    queued = []
+    monkeypatch.setattr(main.import_jobs, "enqueue", lambda kind, **kw: queued.append(kind))
+    annotated = f'[Event "Rook lift"]\n\n1. a4 {{Ambitious}} h5 $2 2. Ra3 (2. e4) Rh6 3. Rb3 Rb6 *'
+    assert client.put(f"/api/games/{game_id}", params={"pgn": annotated}).status_code == 200
+    found = client.get("/api/positions/search", params={"fen": board.fen()}).json()
+    assert game_id in [g["id"] for g in found]
+    assert queued == []
+
+    # Changed moves drop the game from the index until the queued job indexes it again
+    assert client.put(f"/api/games/{game_id}", params={"pgn": "1. a4 h5 2. Ra3 *"}).status_code == 200
+    assert queued == ["positions"]
+
+def test_failed_upload_removes_file_and_checkpoint(monkeypatch, tmp_path):
+    import main
+    from types import SimpleNamespace
+    from services.twic_service import file_checkpoint_key
+
+    path = tmp_path / "broken.pgn"
+    path.write_text("not a game")
+    cleared = []
+    monkeypatch.setattr(main.twic_service, "import_file", lambda *a, **kw: (False, "Error parsing PGN"))
+    monkeypatch.setattr(main.twic_service, "clear_checkpoint", cleared.append)
+    ctx = SimpleNamespace(report=lambda *a, **kw: None, cancelled=lambda: False)
+
+    job = SimpleNamespace(file_path=str(path), source="upload:broken")
+    assert main.run_upload_import(job, ctx) == (False, "Error parsing PGN")
+    assert not path.exists()
+    assert cleared == [file_checkpoint_key(str(path))]
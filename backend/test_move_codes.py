@@ -0,0 +1,76 @@
+import io
+import json
+
+import chess
+import chess.pgn
+from sqlalchemy import create_engine, text
+
+from services.maintenance import index_positions, needs_position_index
+from services.move_codes import NO_GAME, encode_mainline, mainline_fens, pack_moves, replay, unpack_moves
+from services.pgn_store import pack_pgn
+from services.positions import move_positions, position_key
+from services.twic_service import TWICService
+
+
+def ucis(blob):
+    return [move and move.uci() for _, move in replay(blob)]
+
+
+def test_encode_and_replay():
+    blob = encode_mainline("1. e4 (1. d4) e5 2. Nf3 Nc6 3. Bb5 a6 4. O-O b5 5. Bc4 *")
+    # Seven moves at two bytes each; the variation and everything from the illegal 4... b5 are left out
+    assert len(blob) == 14
+    assert ucis(blob) == ["e2e4", "e7e5", "g1f3", "b8c6", "f1b5", "a7a6", "e1g1", None]
+    assert mainline_fens(encode_mainline("*")) == [chess.STARTING_FEN]
+    assert encode_mainline("") == NO_GAME
+    assert list(replay(NO_GAME)) == []
+
+    fen = "8/8/8/8/8/8/4k3/K7 w - - 0 1"
+    blob = encode_mainline(f'[SetUp "1"]\n[FEN "{fen}"]\n\n1. Kb1 Kd2 *')
+    assert unpack_moves(blob)[0] == fen
+    assert mainline_fens(blob) == [fen, "8/8/8/8/8/8/4k3/1K6 b - - 1 1", "8/8/8/8/8/8/3k4/1K6 w - - 2 2"]
+    assert blob == pack_moves(unpack_moves(blob)[1], fen)
+
+
+def test_move_positions_match_zobrist_hash():
+    with open("tata_games.json") as f:
+        games = json.load(f)
+    for game in games:
+        pgn_game = chess.pgn.read_game(io.StringIO(game["pgn"]))
+        expected = {}
+        board = pgn_game.board()
+        for move in list(pgn_game.mainline_moves()) + [None]:
+            expected.setdefault(position_key(board), board.ply())
+            if move:
+                board.push(move)
+        positions = move_positions(encode_mainline(game["pgn"]))
+        assert {key: ply for key, (ply, _) in positions.items()} == expected
+
+
+def test_index_positions_stores_and_reuses_moves(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/moves.db")
+    path = tmp_path / "games.pgn"
+    path.write_text('[White "A"]\n[Black "B"]\n[Result "1-0"]\n\n1. e4 e5 2. Qh5 Nc6 1-0\n')
+    service = TWICService(download_dir=str(tmp_path), db_dir=str(tmp_path), bind=engine)
+    assert service.parse_pgn(str(path), 1)[0]
+    assert index_positions(engine, workers=1) == 1
+
+    def stored():
+        with engine.connect() as conn:
+            return conn.execute(text("SELECT moves, position_count FROM games WHERE id = 1")).first()
+
+    moves, count = stored()
+    assert ucis(moves) == ["e2e4", "e7e5", "d1h5", "b8c6", None]
+    assert count == 5
+
+    # A result edit is indexed again from the stored blob, a moves edit gets a new one
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE games SET result = '0-1' WHERE id = 1"))
+    assert stored() == (moves, None)
+    assert index_positions(engine, workers=1) == 1
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE games SET pgn_z = :z WHERE id = 1"), {"z": pack_pgn({}, "1. d4 *", {})})
+    assert stored() == (None, None)
+    assert needs_position_index(engine)
+    assert index_positions(engine, workers=1) == 1
+    assert ucis(stored()[0]) == ["d2d4", None]
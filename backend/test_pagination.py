@@ -0,0 +1,47 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from services.database import Game, init_db
+from services.pagination import SORT_ORDERS, decode_cursor, next_cursor, paginate
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/pages.db")
+    init_db(engine)
+    with Session(engine) as session:
+        # Repeated and missing Elos exercise the id tie-break and NULL ordering
+        session.add_all([
+            Game(white=f"P{i}", black="Q", white_elo=[None, 2500, 2600, 2500][i % 4], black_elo=2000 + i % 7)
+            for i in range(53)
+        ])
+        session.commit()
+        yield session
+
+
+@pytest.mark.parametrize("sort", list(SORT_ORDERS))
+def test_cursor_pages_match_a_single_ordered_query(db, sort):
+    expected = [g.id for g in paginate(db.query(Game), sort).all()]
+
+    seen, cursor = [], None
+    while True:
+        page = paginate(db.query(Game), sort, cursor).limit(10).all()
+        seen += [g.id for g in page]
+        cursor = next_cursor(page, sort, 10)
+        if not cursor:
+            break
+
+    assert seen == expected
+    assert len(seen) == 53
+
+
+def test_cursor_is_tied_to_its_sort(db):
+    page = paginate(db.query(Game), "white_elo").limit(10).all()
+    cursor = next_cursor(page, "white_elo", 10)
+
+    assert decode_cursor(cursor, "white_elo")[1] == page[-1].id
+    with pytest.raises(ValueError):
+        paginate(db.query(Game), "newest", cursor)
+    with pytest.raises(ValueError):
+        paginate(db.query(Game), "newest", "not-a-cursor")
@@ -0,0 +1,45 @@
+import io
+
+from services.pgn_scanner import scan_games
+
+PGN = (
+    b'[Event "Tata Steel Masters"]\n'
+    b'[White "Caruana,F"]\n'
+    b'[Black "Gukesh,D"]\n'
+    b'[Annotator "\\"Fritz\\""]\n'
+    b'\n'
+    b'1. e4 e5 2. Nf3 {a comment\n'
+    b'[that looks like a tag "but is not"]} Nc6 1-0\n'
+    b'\n'
+    b'[Event "No moves"]\n'
+    b'[White "A"]\n'
+    b'\n'
+    b'[Event "Third"]\n'
+    b'[White "S\xc3\xa1nchez,J"]\n'
+    b'\n'
+    b'1. d4 d5 1/2-1/2\n'
+)
+
+
+def test_scan_games_splits_and_reads_headers():
+    games = list(scan_games(io.BytesIO(PGN)))
+
+    assert [g.headers["Event"] for g in games] == ["Tata Steel Masters", "No moves", "Third"]
+    assert games[0].headers["Annotator"] == '"Fritz"'
+    assert games[2].headers["White"] == "Sánchez,J"
+    assert "Nc6 1-0" in games[0].pgn
+
+
+def test_scan_games_offsets_slice_source_text():
+    for game in scan_games(io.BytesIO(PGN)):
+        assert PGN[game.start:game.end].decode("utf-8").strip() == game.pgn
+
+
+def test_scan_games_stops_at_chunk_end():
+    games = list(scan_games(io.BytesIO(PGN)))
+    stream = io.BytesIO(PGN)
+    stream.seek(games[1].start)
+
+    chunk = list(scan_games(stream, start=games[1].start, end=games[2].start))
+
+    assert [g.headers["Event"] for g in chunk] == ["No moves"]
@@ -0,0 +1,62 @@
+from sqlalchemy import create_engine, text
+
+from services.database import init_db
+from services.maintenance import compact_games, index_positions, needs_compaction
+from services.pgn_store import game_pgn, pack_pgn, pgn_body, pgn_moves_key, unpack_pgn
+
+PGN = (
+    '[Event "Tata Steel Masters"]\n[Site "Wijk aan Zee NED"]\n[Date "2026.01.18"]\n[Round "2"]\n'
+    '[White "Carlsen,M"]\n[Black "Giri,A"]\n[Result "1/2-1/2"]\n[WhiteElo "2830"]\n[BlackElo "-"]\n'
+    '[WhiteTitle "GM"]\n[Annotator "A \\"quoted\\" name"]\n\n'
+    '1. e4 e5 2. Nf3 {A comment} Nc6 (2... d6) 3. Bb5 1/2-1/2'
+)
+ROW = {
+    "event": "Tata Steel Masters", "site": "Wijk aan Zee NED", "date": "2026.01.18", "round": "2",
+    "white": "Carlsen,M", "black": "Giri,A", "result": "1/2-1/2", "white_elo": 2830, "black_elo": None,
+    "eco": "", "opening": None,
+}
+HEADERS = {
+    "Event": "Tata Steel Masters", "Site": "Wijk aan Zee NED", "Date": "2026.01.18", "Round": "2",
+    "White": "Carlsen,M", "Black": "Giri,A", "Result": "1/2-1/2", "WhiteElo": "2830", "BlackElo": "-",
+    "WhiteTitle": "GM", "Annotator": 'A "quoted" name',
+}
+
+
+class Row:
+    def __init__(self, **values):
+        self.__dict__.update(values)
+
+
+def test_pack_keeps_only_headers_the_columns_dont_hold():
+    blob = pack_pgn(HEADERS, PGN, ROW)
+    extra, movetext = unpack_pgn(blob)
+    # BlackElo "-" isn't reproduced by the column, so it's kept as written
+    assert extra == '[BlackElo "-"]\n[WhiteTitle "GM"]\n[Annotator "A \\"quoted\\" name"]\n'
+    assert movetext == "1. e4 e5 2. Nf3 {A comment} Nc6 (2... d6) 3. Bb5 1/2-1/2"
+
+    rebuilt = game_pgn(Row(pgn=None, pgn_z=blob, **ROW))
+    assert rebuilt.splitlines()[:8] == PGN.splitlines()[:8]
+    assert sorted(rebuilt.splitlines()) == sorted(PGN.splitlines())
+    assert pgn_body(None, blob).endswith("\n" + movetext)
+    assert pgn_moves_key(PGN, None) == pgn_moves_key(None, blob)
+
+
+def test_compact_games_converts_old_rows_without_reindexing(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/compact.db")
+    init_db(engine)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO games (event, site, date, round, white, black, result, white_elo, black_elo, eco, pgn) "
+            "VALUES (:event, :site, :date, :round, :white, :black, :result, :white_elo, :black_elo, :eco, :pgn)"
+        ), {**ROW, "pgn": PGN})
+    index_positions(engine, workers=1)
+
+    assert needs_compaction(engine)
+    assert compact_games(engine) == 1
+    assert not needs_compaction(engine)
+    with engine.connect() as conn:
+        row = conn.execute(text("SELECT * FROM games")).first()
+    assert row.pgn is None
+    assert sorted(game_pgn(row).splitlines()) == sorted(PGN.splitlines())
+    # Same moves, so the position index entry stays
+    assert row.position_count is not None
@@ -0,0 +1,64 @@
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from services.database import Player, init_db
+from services.maintenance import link_players, needs_player_link
+from services.players import name_prefix_filter, normalize_player_name
+from services.twic_service import TWICService
+
+PGN = (
+    '[Event "A"]\n[White "Carlsen, Magnus"]\n[Black "Giri,Anish"]\n[WhiteFideId "1503014"]\n[Result "1-0"]\n\n1. e4 1-0\n\n'
+    '[Event "B"]\n[White "Giri, Anish"]\n[Black "Carlsen,Magnus"]\n[Result "0-1"]\n\n1. d4 0-1\n\n'
+    '[Event "C"]\n[White "Ftáčnik,Ľubomír"]\n[Black "Ftacnik,Lubomir"]\n[Result "1/2-1/2"]\n\n1. c4 1/2-1/2\n'
+)
+
+
+def test_normalize_player_name():
+    assert normalize_player_name("Carlsen, Magnus") == normalize_player_name("carlsen,magnus")
+    assert normalize_player_name("Ftáčnik,  Ľubomír") == "ftacnik,lubomir"
+    assert normalize_player_name("") == ""
+
+
+def test_import_links_games_to_players(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/players.db")
+    path = tmp_path / "games.pgn"
+    path.write_text(PGN)
+    service = TWICService(download_dir=str(tmp_path), db_dir=str(tmp_path), bind=engine)
+
+    assert service.parse_pgn(str(path), 1, batch_size=2)[0]
+
+    with engine.connect() as conn:
+        players = conn.execute(text("SELECT name, fide_id FROM players ORDER BY id")).all()
+        unlinked = conn.execute(text("SELECT count(*) FROM games WHERE white_id IS NULL OR black_id IS NULL")).scalar()
+        carlsen_games = conn.execute(text(
+            "SELECT count(*) FROM games g JOIN players p ON p.id IN (g.white_id, g.black_id) WHERE p.fide_id = 1503014"
+        )).scalar()
+    assert players == [("Carlsen, Magnus", 1503014), ("Giri,Anish", None), ("Ftáčnik,Ľubomír", None)]
+    assert unlinked == 0
+    assert carlsen_games == 2
+
+
+def test_link_players_backfills_old_games(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/old.db")
+    init_db(engine)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO games (white, black) VALUES ('Kasparov,G', 'Karpov,A'), ('Karpov, A', '')"))
+
+    assert needs_player_link(engine)
+    assert link_players(engine, batch_size=1) == 2
+    assert not needs_player_link(engine)
+    with engine.connect() as conn:
+        ids = conn.execute(text("SELECT white_id, black_id FROM games ORDER BY id")).all()
+    assert ids[0][1] == ids[1][0]  # Both spellings of Karpov are one player
+    assert ids[1][1] is None
+
+
+def test_name_prefix_filter(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/players.db")
+    init_db(engine)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO players (name, normalized) VALUES ('a', 'carlsen,magnus'), ('b', 'carlsen,m'), "
+                          "('c', 'carlsem'), ('d', 'carlseo'), ('e', 'giri,anish')"))
+    with Session(engine) as db:
+        names = [p.normalized for p in db.query(Player).filter(name_prefix_filter(Player.normalized, "carlsen")).order_by(Player.normalized)]
+    assert names == ["carlsen,m", "carlsen,magnus"]
@@ -0,0 +1,129 @@
+import chess
+from sqlalchemy import create_engine, text
+
+from services.database import init_db
+from services.maintenance import index_positions, needs_position_index
+from services.positions import (
+    decode_move, elo_band, encode_move, explorer_moves, explorer_year, fen_key, position_game_ids,
+    position_hashes, position_index_current, position_key,
+)
+from services.pgn_store import pack_pgn
+from services.twic_service import TWICService
+
+PGN = (
+    '[Event "A"]\n[Date "2020.01.01"]\n[White "W1"]\n[Black "B1"]\n[WhiteElo "2700"]\n[BlackElo "2600"]\n'
+    '[Result "1-0"]\n\n1. e4 e5 2. Nf3 Nc6 1-0\n\n'
+    '[Event "B"]\n[Date "2022.??.??"]\n[White "W2"]\n[Black "B2"]\n[WhiteElo "2300"]\n'
+    '[Result "0-1"]\n\n1. Nf3 Nc6 2. e4 (2. d4 d5) 2... e5 0-1\n\n'
+    '[Event "C"]\n[White "W3"]\n[Black "B3"]\n[Result "1/2-1/2"]\n\n1. d4 d5 1/2-1/2\n'
+)
+
+AFTER_NF3_NC6_E4_E5 = "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3"
+
+
+def test_position_hashes():
+    positions = position_hashes("1. e4 e5 2. Nf3 Nf6 3. Ng1 Ng8 4. Nf3 *")
+    assert positions[position_key(chess.Board())] == [0, encode_move(chess.Move.from_uci("e2e4"))]
+    # Plies 6 and 7 repeat plies 2 and 3, which keep the ply and move from the first time
+    assert sorted(ply for ply, _ in positions.values()) == [0, 1, 2, 3, 4, 5]
+    assert [move for ply, move in positions.values() if ply == 5] == [encode_move(chess.Move.from_uci("f6g8"))]
+    # Variations and moves after an illegal one are not indexed
+    assert len(position_hashes("1. e4 (1. d4 d5) e5 2. Ke3 Nc6 *")) == 3
+    assert position_hashes("") == {}
+
+
+def test_move_encoding_and_buckets():
+    for uci in ("e2e4", "a7a8q", "h2h1n", "e1g1"):
+        move = chess.Move.from_uci(uci)
+        assert decode_move(encode_move(move)) == move
+    assert explorer_year("2024.01.??") == 2024
+    assert explorer_year("????.??.??") == 0
+    assert elo_band(2700, 2651) == 2600
+    assert elo_band(None, 2399) == 2300
+    assert elo_band(None, None) == 0
+
+
+def test_fen_key_is_signed_64_bit():
+    key = fen_key(AFTER_NF3_NC6_E4_E5)
+    assert -(1 << 63) <= key < (1 << 63)
+    assert key == position_key(chess.Board(AFTER_NF3_NC6_E4_E5))
+
+
+def test_index_positions_and_search(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/positions.db")
+    path = tmp_path / "games.pgn"
+    path.write_text(PGN)
+    service = TWICService(download_dir=str(tmp_path), db_dir=str(tmp_path), bind=engine)
+    assert service.parse_pgn(str(path), 1)[0]
+
+    assert needs_position_index(engine)
+    assert index_positions(engine, batch_size=2, workers=1) == 3
+    assert not needs_position_index(engine)
+
+    with engine.connect() as conn:
+        # Reached by transposition in games A and B, at ply 4 in both
+        hits = position_game_ids(conn, fen_key(AFTER_NF3_NC6_E4_E5))
+        assert [(h.game_id, h.ply) for h in hits] == [(2, 4), (1, 4)]
+        assert [h.game_id for h in position_game_ids(conn, fen_key(AFTER_NF3_NC6_E4_E5), before_id=2)] == [1]
+        # 2. d4 d5 was only a variation in game B
+        board = chess.Board()
+        for move in ("Nf3", "Nc6", "d4", "d5"):
+            board.push_san(move)
+        assert position_game_ids(conn, position_key(board)) == []
+
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM games WHERE id = 1"))
+        assert conn.execute(text("SELECT count(*) FROM game_positions WHERE game_id = 1")).scalar() == 0
+        # Changing a game's moves takes it out of the index until the next run
+        conn.execute(text("UPDATE games SET pgn_z = :z WHERE id = 3"), {"z": pack_pgn({}, "1. c4 *", {})})
+        assert conn.execute(text("SELECT position_count FROM games WHERE id = 3")).scalar() is None
+    assert index_positions(engine, workers=1) == 1
+
+
+def test_opening_explorer_counts(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/explorer.db")
+    path = tmp_path / "games.pgn"
+    path.write_text(PGN)
+    service = TWICService(download_dir=str(tmp_path), db_dir=str(tmp_path), bind=engine)
+    assert service.parse_pgn(str(path), 1)[0]
+    index_positions(engine, workers=1)
+
+    def explore(fen, **filters):
+        with engine.connect() as conn:
+            rows = explorer_moves(conn, fen_key(fen), **filters)
+        return {decode_move(r.move).uci(): (r.games, r.white_wins, r.draws, r.black_wins, r.elo_sum, r.elo_games) for r in rows}
+
+    start = chess.STARTING_FEN
+    assert explore(start) == {
+        "e2e4": (1, 1, 0, 0, 2700, 1), "g1f3": (1, 0, 0, 1, 2300, 1), "d2d4": (1, 0, 1, 0, 0, 0),
+    }
+    # Reached in games A and B, where Black continued with 2... Nc6 and 2... e5
+    after_e4_e5_nf3 = "rnbqkbnr/pppp1ppp/8/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R b KQkq - 1 2"
+    assert explore(after_e4_e5_nf3) == {"b8c6": (1, 1, 0, 0, 2600, 1)}
+    assert explore(AFTER_NF3_NC6_E4_E5) == {} # Both games ended there
+    assert set(explore(start, min_elo=2600)) == {"e2e4"}
+    assert set(explore(start, max_elo=2600)) == {"g1f3", "d2d4"}
+    assert set(explore(start, from_year=2021)) == {"g1f3"}
+    assert set(explore(start, to_year=2021)) == {"e2e4"}
+
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM games WHERE twic_issue = 1 AND event = 'A'"))
+        conn.execute(text("UPDATE games SET result = '1-0' WHERE event = 'B'"))
+    assert explore(start) == {"d2d4": (1, 0, 1, 0, 0, 0)}
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM opening_moves WHERE games <= 0")).scalar() == 0
+    index_positions(engine, workers=1)
+    assert explore(start) == {"g1f3": (1, 1, 0, 0, 2300, 1), "d2d4": (1, 0, 1, 0, 0, 0)}
+
+
+def test_init_db_replaces_outdated_triggers(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/triggers.db")
+    init_db(engine)
+    with engine.begin() as conn:
+        assert position_index_current(conn)
+        conn.execute(text("DROP TRIGGER game_positions_update"))
+        conn.execute(text("CREATE TRIGGER game_positions_update AFTER UPDATE OF pgn ON games BEGIN SELECT 1; END"))
+        assert not position_index_current(conn)
+    init_db(engine)
+    with engine.connect() as conn:
+        assert position_index_current(conn)
@@ -0,0 +1,79 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from services.database import Game, init_db
+from services.search import fold_text, name_search_ids
+from services.twic_service import TWICService
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/search.db")
+    init_db(engine)
+    return engine
+
+
+def search(db, columns, term):
+    return sorted(g.white for g in db.query(Game).filter(Game.id.in_(name_search_ids(columns, term))))
+
+
+def test_fold_text():
+    assert fold_text("Ľubomír Ftáčnik") == "lubomir ftacnik"
+    assert fold_text("Sjugirov,Sanan") == "sjugirov,sanan"
+    assert fold_text("Østenstad,Berge") == "ostenstad,berge"
+
+
+def test_search_index_follows_inserts_updates_and_deletes(engine):
+    with Session(engine) as db:
+        db.add_all([
+            Game(white="Ftáčnik,Ľubomír", black="Carlsen,Magnus", event="Bundesliga"),
+            Game(white="Giri,Anish", black="So,Wesley", event="Tata Steel Masters"),
+        ])
+        db.commit()
+
+        assert search(db, ("white", "black"), "ftacnik") == ["Ftáčnik,Ľubomír"]
+        assert search(db, ("white", "black"), "CARLS") == ["Ftáčnik,Ľubomír"]
+        assert search(db, ("event",), "steel") == ["Giri,Anish"]
+
+        giri = db.query(Game).filter(Game.white == "Giri,Anish").one()
+        giri.white = "Gukesh,D"
+        db.commit()
+        assert search(db, ("white", "black"), "giri") == []
+        assert search(db, ("white", "black"), "gukesh") == ["Gukesh,D"]
+
+        db.query(Game).filter(Game.white == "Gukesh,D").delete()
+        db.commit()
+        assert search(db, ("event",), "steel") == []
+
+
+def test_bulk_import_indexes_games(engine, tmp_path):
+    path = tmp_path / "games.pgn"
+    path.write_text(
+        '[Event "Reykjavík Open"]\n[White "Ólafsson,Friðrik"]\n[Black "Hansen,Jón"]\n[Result "1-0"]\n\n1. e4 1-0\n\n'
+        '[Event "Club"]\n[White "Smith,John"]\n[Black "Doe,Jane"]\n[Result "0-1"]\n\n1. d4 0-1\n'
+    )
+    service = TWICService(download_dir=str(tmp_path), db_dir=str(tmp_path), bind=engine)
+    assert service.parse_pgn(str(path), 1, batch_size=1)[0]
+
+    with Session(engine) as db:
+        assert search(db, ("white", "black"), "olafsson") == ["Ólafsson,Friðrik"]
+        assert search(db, ("event",), "reykjavik") == ["Ólafsson,Friðrik"]
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM games_fts")).scalar() == 2
+
+
+def test_init_db_indexes_existing_games(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/old.db")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE games (id INTEGER PRIMARY KEY, white VARCHAR, black VARCHAR, event VARCHAR)"))
+        conn.execute(text("INSERT INTO games (white, black, event) VALUES ('Kasparov,Garry', 'Karpov,Anatoly', 'WCh')"))
+
+    init_db(engine)
+
+    with Session(engine) as db:
+        assert search(db, ("white", "black"), "karpov") == ["Kasparov,Garry"]
+
+
+def test_short_terms_are_left_to_like():
+    assert name_search_ids(("white",), "so") is None
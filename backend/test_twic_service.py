@@ -0,0 +1,258 @@
+import gzip
+import io
+import json
+import os
+import zipfile
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from services import twic_service
+from services.database import init_db
+from services.maintenance import dedupe_games, needs_dedupe
+from services.pgn_scanner import content_hash, scan_games
+from services.pgn_store import game_pgn, split_movetext
+from services.twic_service import TWICService, file_checkpoint_key, split_pgn
+
+TATA_GAMES = os.path.join(os.path.dirname(__file__), "tata_games.json")
+
+
+@pytest.fixture
+def sample_pgn(tmp_path):
+    with open(TATA_GAMES) as f:
+        games = json.load(f)
+    # One Tata game was republished in two TWIC issues; keep the fixture free of duplicates
+    unique = {}
+    for g in games:
+        unique.setdefault((g["white"], g["black"], g["round"]), g)
+    games = list(unique.values())
+    path = tmp_path / "twic9999.pgn"
+    path.write_text("\n\n".join(g["pgn"].strip() for g in games) + "\n")
+    return str(path), games
+
+
+@pytest.fixture
+def service(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/import.db")
+    return TWICService(download_dir=str(tmp_path / "dl"), db_dir=str(tmp_path / "db"), bind=engine)
+
+
+def test_parse_pgn_bulk_inserts_all_games(sample_pgn, service):
+    path, games = sample_pgn
+    updates = []
+
+    success, msg = service.parse_pgn(path, 9999, progress_callback=lambda n, rate: updates.append((n, rate)), batch_size=7)
+
+    assert success, msg
+    with service.bind.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM games WHERE twic_issue = 9999")).scalar() == len(games)
+        white, elo = conn.execute(text("SELECT white, white_elo FROM games ORDER BY id LIMIT 1")).one()
+    assert white == games[0]["white"]
+    assert elo == games[0]["white_elo"]
+    # One update per committed batch, ending at the full count
+    assert len(updates) == -(-len(games) // 7)
+    assert updates[-1][0] == len(games)
+    assert all(rate > 0 for _, rate in updates)
+
+
+def test_parse_pgn_restores_connection_pragmas(sample_pgn, service):
+    path, _ = sample_pgn
+    service.parse_pgn(path, 9999)
+    with service.bind.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1 # NORMAL, from CONNECTION_PRAGMAS
+
+
+def test_parse_pgn_stores_compressed_source_text(sample_pgn, service):
+    path, games = sample_pgn
+    service.parse_pgn(path, 9999)
+    with service.bind.connect() as conn:
+        row = conn.execute(text("SELECT * FROM games ORDER BY id LIMIT 1")).first()
+    assert row.pgn is None
+    assert len(row.pgn_z) * 2 < len(games[0]["pgn"])
+    stored = next(scan_games(io.BytesIO(game_pgn(row).encode())))
+    source = next(scan_games(io.BytesIO(games[0]["pgn"].encode())))
+    assert stored.headers == source.headers
+    assert split_movetext(stored.pgn) == split_movetext(source.pgn)
+
+
+def test_split_pgn_starts_chunks_on_event_lines(sample_pgn):
+    path, _ = sample_pgn
+    with open(path, "rb") as f:
+        data = f.read()
+
+    chunks = split_pgn(path, chunk_bytes=4096)
+
+    assert len(chunks) > 1
+    assert chunks[0][0] == 0 and chunks[-1][1] == len(data)
+    for start, end in chunks:
+        assert data[start:].startswith(b"[Event ")
+
+
+def test_parse_pgn_parallel_matches_serial(sample_pgn, service, monkeypatch):
+    path, games = sample_pgn
+    monkeypatch.setattr(twic_service, "PARALLEL_CHUNK_BYTES", 4096)
+    updates = []
+
+    success, msg = service.parse_pgn(path, 9999, progress_callback=lambda n, rate: updates.append(n), batch_size=10, workers=2)
+
+    assert success, msg
+    with service.bind.connect() as conn:
+        whites = [r[0] for r in conn.execute(text("SELECT white FROM games ORDER BY id"))]
+    assert whites == [g["white"] for g in games]
+    assert updates == sorted(updates) and updates[-1] == len(games)
+
+
+def test_import_zip_stream(sample_pgn, service):
+    path, games = sample_pgn
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.write(path, "twic9999.pgn")
+    data = buf.getvalue()
+
+    success, msg = service.import_zip_stream((data[i:i + 1000] for i in range(0, len(data), 1000)), 9999)
+
+    assert success, msg
+    with service.bind.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM games")).scalar() == len(games)
+
+
+def test_parse_pgn_skips_duplicates_across_imports(sample_pgn, service):
+    path, games = sample_pgn
+    service.parse_pgn(path, 9999)
+
+    success, msg = service.parse_pgn(path, 10000)
+
+    assert success and f"{len(games)} duplicates skipped" in msg
+    with service.bind.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM games")).scalar() == len(games)
+
+
+def test_parse_pgn_skips_republished_game(tmp_path, service):
+    with open(TATA_GAMES) as f:
+        games = json.load(f)
+    path = tmp_path / "tata.pgn"
+    path.write_text("\n\n".join(g["pgn"].strip() for g in games) + "\n")
+
+    success, msg = service.parse_pgn(str(path), 9999)
+
+    assert success and "(1 duplicates skipped)" in msg
+    with service.bind.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM games")).scalar() == len(games) - 1
+
+
+def test_content_hash_ignores_annotations():
+    headers = {"White": "Carlsen,M", "Black": "Caruana,F", "Date": "2026.01.20", "Round": "4"}
+    plain = "1. e4 e5 2. Nf3 Nc6 1-0"
+    annotated = "1. e4 {best by test} e5 (1... c5 2. Nf3) 2. Nf3! $1 Nc6 1-0"
+    assert content_hash(headers, plain) == content_hash(headers, annotated)
+    assert content_hash(headers, plain) != content_hash({**headers, "Round": "5"}, plain)
+
+
+def test_dedupe_games_backfills_hashes_and_removes_copies(sample_pgn, service):
+    path, games = sample_pgn
+    service.parse_pgn(path, 9999)
+    with service.bind.begin() as conn:
+        # Simulate a database from before hashing, with one game imported twice
+        conn.execute(text("UPDATE games SET content_hash = NULL"))
+        conn.execute(text("INSERT INTO games (white, black, date, round, pgn_z, twic_issue, is_personal, is_commented) "
+                          "SELECT white, black, date, round, pgn_z, 10000, 0, 0 FROM games WHERE id = 1"))
+
+    checked, removed = dedupe_games(bind=service.bind)
+
+    assert (checked, removed) == (len(games) + 1, 1)
+    assert not needs_dedupe(service.bind)
+
+
+def test_dedupe_games_checks_kept_duplicates_once(sample_pgn, service):
+    path, games = sample_pgn
+    service.parse_pgn(path, 9999)
+    with service.bind.begin() as conn:
+        # An annotated copy of a hashed game is kept, without a hash of its own
+        conn.execute(text("INSERT INTO games (white, black, date, round, pgn_z, twic_issue, is_personal, is_commented) "
+                          "SELECT white, black, date, round, pgn_z, 10000, 1, 0 FROM games WHERE id = 1"))
+
+    assert needs_dedupe(service.bind)
+    assert dedupe_games(bind=service.bind) == (1, 0)
+    assert not needs_dedupe(service.bind)
+    assert dedupe_games(bind=service.bind) == (0, 0)
+
+
+def test_init_db_adds_columns_to_existing_tables(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/old.db")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE games (id INTEGER PRIMARY KEY, white VARCHAR, pgn TEXT)"))
+
+    init_db(engine)
+
+    with engine.connect() as conn:
+        columns = {row[1] for row in conn.exec_driver_sql("PRAGMA table_info(games)")}
+        indexes = {row[1] for row in conn.exec_driver_sql("PRAGMA index_list(games)")}
+    assert "content_hash" in columns
+    assert "ix_games_content_hash" in indexes
+
+
+def test_parse_pgn_resumes_from_checkpoint(sample_pgn, service):
+    path, games = sample_pgn
+
+    def crash_after_two_batches(count, rate):
+        if count >= 20:
+            raise RuntimeError("app quit")
+
+    success, _ = service.parse_pgn(path, 9999, progress_callback=crash_after_two_batches, batch_size=10)
+    assert not success
+    offset, read = service.get_checkpoint("twic:9999")
+    assert read == 20 and offset > 0
+
+    with open(path, "rb") as f:
+        f.seek(offset)
+        resumed_at = f.read()
+    updates = []
+    success, msg = service.parse_pgn(path, 9999, progress_callback=lambda n, rate: updates.append(n), batch_size=10)
+
+    assert success and "resumed after game 20" in msg
+    assert updates[-1] == len(games) - 20  # Only the remainder was parsed and inserted
+    assert games[20]["pgn"].strip() in resumed_at.decode("utf-8")
+    assert service.get_checkpoint("twic:9999") == (0, 0)  # Completed
+    with service.bind.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM games")).scalar() == len(games)
+
+
+@pytest.mark.parametrize("suffix", [".pgn", ".pgn.gz", ".zip"])
+def test_import_file_tags_uploaded_games(sample_pgn, service, tmp_path, suffix):
+    path, games = sample_pgn
+    with open(path, "rb") as f:
+        data = f.read()
+    upload = tmp_path / f"my_games{suffix}"
+    if suffix == ".zip":
+        with zipfile.ZipFile(upload, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("my_games.pgn", data)
+    elif suffix == ".pgn.gz":
+        with gzip.open(upload, "wb") as f:
+            f.write(data)
+    else:
+        upload.write_bytes(data)
+
+    success, msg = service.import_file(str(upload), "upload:my_games")
+
+    assert success, msg
+    with service.bind.connect() as conn:
+        rows = conn.execute(text("SELECT source, twic_issue FROM games")).fetchall()
+    assert len(rows) == len(games)
+    assert set(rows) == {("upload:my_games", None)}
+    assert service.get_checkpoint(file_checkpoint_key(str(upload))) == (0, 0)  # Completed
+
+
+def test_import_file_checkpoint_is_per_file(sample_pgn, service, tmp_path):
+    path, games = sample_pgn
+    first, second = tmp_path / "a-my_games.pgn", tmp_path / "b-my_games.pgn"
+    for upload in (first, second):
+        upload.write_bytes(open(path, "rb").read())
+
+    def crash_after_one_batch(count, rate):
+        raise RuntimeError("interrupted")
+
+    assert not service.import_file(str(first), "upload:my_games", progress_callback=crash_after_one_batch, batch_size=10)[0]
+    assert service.get_checkpoint(file_checkpoint_key(str(first)))[1] == 10
+    # Same source tag, but a different file: starts from its first game
+    success, msg = service.import_file(str(second), "upload:my_games")
+    assert success and "resumed" not in msg
@@ -0,0 +1,53 @@
+import os
+
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+
+from services.uploads import receive_upload, upload_source_tag
+
+PGN = b'[Event "Club"]\n[White "A"]\n[Black "B"]\n[Result "1-0"]\n\n1. e4 e5 1-0\n\n' * 1000
+
+
+@pytest.fixture
+def client(tmp_path):
+    app = FastAPI()
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        try:
+            received = await receive_upload(request, str(tmp_path))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"path": received.path, "filename": received.filename, "fields": received.fields}
+
+    return TestClient(app)
+
+
+def test_receive_upload_streams_file_to_disk(client, tmp_path):
+    response = client.post(
+        "/upload",
+        data={"source": "upload:club"},
+        files={"file": ("../club games.pgn", PGN, "application/octet-stream")},
+    )
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["filename"] == "club games.pgn"
+    assert body["fields"] == {"source": "upload:club"}
+    assert os.path.dirname(body["path"]) == str(tmp_path)
+    with open(body["path"], "rb") as f:
+        assert f.read() == PGN
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".part")]
+
+
+def test_receive_upload_rejects_other_file_types(client, tmp_path):
+    response = client.post("/upload", files={"file": ("notes.txt", b"hello", "text/plain")})
+
+    assert response.status_code == 400
+    assert os.listdir(tmp_path) == []
+
+
+def test_upload_source_tag():
+    assert upload_source_tag("Mega 2024.pgn.gz") == "upload:Mega 2024"
+    assert upload_source_tag("twic.zip") == "upload:twic"
@@ -0,0 +1,42 @@
+import io
+import zipfile
+
+import pytest
+
+from services.zip_stream import ZipMemberReader
+
+PGN = b"".join(b'[Event "Game %d"]\n\n1. e4 e5 1-0\n\n' % i for i in range(500))
+
+
+def make_zip(*members, compression=zipfile.ZIP_DEFLATED):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=compression) as zf:
+        for name, data in members:
+            zf.writestr(name, data)
+    return buf.getvalue()
+
+
+def chunked(data, size=97):
+    return (data[i:i + size] for i in range(0, len(data), size))
+
+
+@pytest.mark.parametrize("compression", [zipfile.ZIP_DEFLATED, zipfile.ZIP_STORED])
+def test_reads_pgn_member_from_chunks(compression):
+    archive = make_zip(("readme.txt", b"hello" * 100), ("twic9999.pgn", PGN), compression=compression)
+
+    reader = ZipMemberReader(chunked(archive))
+
+    assert reader.read() == PGN
+    assert reader.name == "twic9999.pgn"
+
+
+def test_missing_pgn_member_raises():
+    archive = make_zip(("readme.txt", b"hello"))
+    with pytest.raises(ValueError):
+        ZipMemberReader(chunked(archive)).read()
+
+
+def test_truncated_archive_raises():
+    archive = make_zip(("twic9999.pgn", PGN))
+    with pytest.raises(ValueError):
+        ZipMemberReader(chunked(archive[:len(archive) // 2])).read()
@@ -68,7 +68,7 @@ const Dashboard = () => {
                     // Update the specific issue in the list with progress from backend
                     setTwicIssues(prev => prev.map(issue =>
                         issue.issue === parseInt(issueToFetch)
-                            ? { ...issue, processing: statusData.status === 'processing', progress: statusData.progress || 'Processing...' }
+                            ? { ...issue, processing: ['queued', 'processing'].includes(statusData.status), progress: statusData.progress || 'Processing...' }
                             : issue
                     ));
 
@@ -78,7 +78,7 @@ const Dashboard = () => {
                         setMessage(statusData.message);
                         fetchIssues(); // Refresh list to get final imported: true status
                         fetchStats();  // Refresh stats
-                    } else if (statusData.status === 'error') {
+                    } else if (statusData.status === 'error' || statusData.status === 'cancelled') {
                         clearInterval(pollInterval);
                         setStatus('error');
                         setMessage(statusData.message || 'Import failed');
@@ -107,10 +107,26 @@ const Dashboard = () => {
             });
 
             if (response.ok) {
-                setStatus('success');
-                setMessage(`Deleted TWIC ${issueNumber} games`);
-                fetchIssues();
-                fetchStats();
+                // Deletion runs as a background job, a batch at a time; follow it like an import
+                const data = await response.json();
+                setMessage(data.message);
+                const pollInterval = setInterval(async () => {
+                    try {
+                        const jobRes = await fetch(`http://localhost:8000/api/import-jobs/${data.job_id}`);
+                        const job = await jobRes.json();
+                        if (['queued', 'processing'].includes(job.status)) {
+                            setMessage(`Deleting TWIC ${issueNumber}: ${job.progress}`);
+                            return;
+                        }
+                        clearInterval(pollInterval);
+                        setStatus(job.status === 'success' ? 'success' : 'error');
+                        setMessage(job.message || `Deleted TWIC ${issueNumber} games`);
+                        fetchIssues();
+                        fetchStats();
+                    } catch (err) {
+                        console.error("Polling error:", err);
+                    }
+                }, 1000);
             } else {
                 const data = await response.json();
                 setStatus('error');
@@ -37,24 +37,25 @@ class ErrorBoundary extends React.Component {
 const Database = () => {
     const [games, setGames] = useState([]);
     const [loading, setLoading] = useState(true);
-    const [page, setPage] = useState(0);
+    const [nextCursor, setNextCursor] = useState(null); // Keyset cursor for "load more", from X-Next-Cursor
     const [hasMore, setHasMore] = useState(true);
+    const [total, setTotal] = useState(null); // { count, exact } from /api/games/count
     const [events, setEvents] = useState([]); // List of all events for dropdown
     const navigate = useNavigate();
 
     const OPENING_FAMILIES = [
-        { name: 'Sicilian Defense', range: ['B20', 'B21', 'B22', 'B23', 'B24', 'B25', 'B26', 'B27', 'B28', 'B29', 'B30', 'B31', 'B32', 'B33', 'B34', 'B35', 'B36', 'B37', 'B38', 'B39', 'B40', 'B41', 'B42', 'B43', 'B44', 'B45', 'B46', 'B47', 'B48', 'B49', 'B5', 'B6', 'B7', 'B8', 'B9'] },
-        { name: 'Caro-Kann Defense', range: ['B1'] },
-        { name: 'French Defense', range: ['C0'] },
-        { name: 'Ruy Lopez', range: ['C6', 'C7', 'C8', 'C9'] },
-        { name: 'Italian Game', range: ['C50', 'C51', 'C52', 'C53', 'C54'] },
-        { name: 'Queen\'s Gambit', range: ['D06', 'D1', 'D2', 'D3', 'D4', 'D5', 'D6'] },
-        { name: 'King\'s Indian', range: ['E6', 'E7', 'E8', 'E9'] },
-        { name: 'Nimzo-Indian', range: ['E2', 'E3', 'E4', 'E5'] },
-        { name: 'English Opening', range: ['A1', 'A2', 'A3'] },
-        { name: 'Grünfeld Defense', range: ['D7', 'D8', 'D9'] },
-        { name: 'Dutch Defense', range: ['A8', 'A9'] },
-        { name: 'Scandinavian Defense', range: ['B01'] },
+        { name: 'Sicilian Defense', range: 'B20-B99' },
+        { name: 'Caro-Kann Defense', range: 'B10-B19' },
+        { name: 'French Defense', range: 'C00-C09' },
+        { name: 'Ruy Lopez', range: 'C60-C99' },
+        { name: 'Italian Game', range: 'C50-C54' },
+        { name: 'Queen\'s Gambit', range: 'D06,D10-D69' },
+        { name: 'King\'s Indian', range: 'E60-E99' },
+        { name: 'Nimzo-Indian', range: 'E20-E59' },
+        { name: 'English Opening', range: 'A10-A39' },
+        { name: 'Grünfeld Defense', range: 'D70-D99' },
+        { name: 'Dutch Defense', range: 'A80-A99' },
+        { name: 'Scandinavian Defense', range: 'B01' },
         { code_list: ECO_CODES } // Marker for all individual codes
     ];
 
@@ -66,7 +67,8 @@ const Database = () => {
         eco: '',
         event: '',
         commented_only: false,
-        personal_only: false
+        personal_only: false,
+        sort: 'newest' // 'newest' = import order, 'date' = game date, newest first
     });
 
     // Fetch distinct events for dropdown
@@ -84,13 +86,26 @@ const Database = () => {
             .catch(err => console.error('Failed to fetch events', err));
     }, []);
 
+    // Total for the current filters; past the backend's exact limit it is an estimate
+    const fetchCount = (params) => {
+        const countParams = new URLSearchParams(params);
+        countParams.delete('limit');
+        countParams.delete('cursor');
+        countParams.delete('sort');
+        setTotal(null);
+        fetch(`http://localhost:8000/api/games/count?${countParams.toString()}`)
+            .then(res => res.json())
+            .then(data => setTotal(typeof data.count === 'number' ? data : null))
+            .catch(err => console.error('Failed to count games', err));
+    };
+
     const fetchGames = (isLoadMore = false) => {
         setLoading(true);
         const params = new URLSearchParams();
         params.append('limit', 100);
-        // If loading more, skip current length
-        const skip = isLoadMore ? (page + 1) * 100 : 0;
-        params.append('skip', skip);
+        params.append('sort', filters.sort);
+        // If loading more, continue after the last game we have
+        if (isLoadMore && nextCursor) params.append('cursor', nextCursor);
 
         if (filters.player) params.append('player', filters.player);
         if (filters.min_elo) params.append('min_elo', filters.min_elo);
@@ -99,27 +114,8 @@ const Database = () => {
             // Check if it's a family
             const fam = OPENING_FAMILIES.find(f => f.name === filters.eco);
             if (fam) {
-                // If it's a family with a range, we pass the range logic
-                // API might not support complex range in 'eco' param directly unless we updated backend.
-                // Assuming backend supports simple 'B90' or prefix.
-                // For a multi-range like B20-B99, we need backend support or client filtering.
-                // Let's assume for now we pass the prefix if it's simple, or we might need to update backend to support 'eco_range'.
-                // Actually, user asked for 'B90 to B99'.
-                // Ideally we send 'B9' if the range is contiguous.
-                // Let's try to map the family to a comma-separated list or a backend-supported format.
-                // Since this is frontend, let's just pass the FAMILY NAME if we update backend, OR
-                // construct a custom query parameter.
-
-                // Hack: Most families essentially share a prefix.
-                // Najdorf: B9...
-                // Sicilian: B...
-                // Ruy Lopez: C6, C7, C8, C9...
-
-                // Let's pass a new param `eco_family` if possible, or just hack it
-                // For now, let's pass a JSON string or special format if the backend accepts it.
-                // Or better: Let's assume the backend 'eco' param does exact match, so let's use a new param.
-                // Use 'eco' param which backend now parses as JSON list
-                params.append('eco', JSON.stringify(fam.range));
+                // Families are ECO ranges (e.g. 'B20-B99'), one index range scan on the backend
+                params.append('eco_range', fam.range);
             } else {
                 params.append('eco', filters.eco);
             }
@@ -128,10 +124,13 @@ const Database = () => {
         if (filters.twic_issue) params.append('twic_issue', filters.twic_issue);
         if (filters.commented_only) params.append('commented_only', 'true');
         if (filters.personal_only) params.append('personal_only', 'true');
+        if (!isLoadMore) fetchCount(params);
 
+        let cursor = null;
         fetch(`http://localhost:8000/api/games?${params.toString()}`)
             .then(res => {
                 if (!res.ok) throw new Error(`HTTP error! status: ${res.status}`);
+                cursor = res.headers.get('X-Next-Cursor');
                 return res.json();
             })
             .then(data => {
@@ -144,12 +143,11 @@ const Database = () => {
 
                 if (isLoadMore) {
                     setGames(prev => [...prev, ...data]);
-                    setPage(prev => prev + 1);
                 } else {
                     setGames(data);
-                    setPage(0);
                 }
-                setHasMore(data.length === 100);
+                setNextCursor(cursor);
+                setHasMore(Boolean(cursor));
                 setLoading(false);
             })
             .catch(err => {
@@ -163,11 +161,17 @@ const Database = () => {
         fetchGames();
     }, [filters.twic_issue]); // Load when twic_issue filter is set from URL
 
-    const handleRowClick = (game) => {
-        // Store in sessionStorage as backup for page reloads
-        sessionStorage.setItem('currentGame', JSON.stringify(game));
-        // Navigate to analysis with the game object state
-        navigate('/analysis', { state: { game } });
+    const handleRowClick = (summary) => {
+        // The list only carries headers; load the full game (with PGN) before opening it
+        fetch(`http://localhost:8000/api/games/${summary.id}`)
+            .then(res => res.json())
+            .then(game => {
+                // Store in sessionStorage as backup for page reloads
+                sessionStorage.setItem('currentGame', JSON.stringify(game));
+                // Navigate to analysis with the game object state
+                navigate('/analysis', { state: { game } });
+            })
+            .catch(err => console.error("Failed to load game", err));
     };
 
     const handleFilterChange = (e) => {
@@ -187,16 +191,22 @@ const Database = () => {
         setLoading(true);
         const params = new URLSearchParams();
         params.append('limit', 100);
-        params.append('skip', 0);
+        params.append('sort', filters.sort);
         if (filters.player) params.append('player', filters.player);
         if (filters.min_elo) params.append('min_elo', filters.min_elo);
         if (filters.max_elo) params.append('max_elo', filters.max_elo);
-        if (filters.eco) params.append('eco', filters.eco);
+        if (filters.eco) {
+            const fam = OPENING_FAMILIES.find(f => f.name === filters.eco);
+            params.append(fam ? 'eco_range' : 'eco', fam ? fam.range : filters.eco);
+        }
         if (value) params.append('event', value);  // Use new value directly
+        fetchCount(params);
 
+        let cursor = null;
         fetch(`http://localhost:8000/api/games?${params.toString()}`)
             .then(res => {
                 if (!res.ok) throw new Error(`HTTP error! status: ${res.status}`);
+                cursor = res.headers.get('X-Next-Cursor');
                 return res.json();
             })
             .then(data => {
@@ -207,8 +217,8 @@ const Database = () => {
                     return;
                 }
                 setGames(data);
-                setPage(0);
-                setHasMore(data.length === 100);
+                setNextCursor(cursor);
+                setHasMore(Boolean(cursor));
                 setLoading(false);
             })
             .catch(err => {
@@ -221,7 +231,7 @@ const Database = () => {
     // Auto-fetch when toggles change
     useEffect(() => {
         fetchGames();
-    }, [filters.commented_only, filters.personal_only]);
+    }, [filters.commented_only, filters.personal_only, filters.sort]);
 
     // Error Boundary Component
 
@@ -235,7 +245,9 @@ const Database = () => {
                         Intelligence Database
                     </h2>
                     <div style={{ fontSize: '11px', color: 'var(--text-muted)', fontWeight: '700', letterSpacing: '0.1em' }}>
-                        {games.length === 100 ? '100+ ' : games.length} RECORDS FOUND
+                        {total
+                            ? `${total.exact ? '' : '~'}${total.count.toLocaleString()} `
+                            : (games.length === 100 ? '100+ ' : games.length + ' ')}RECORDS FOUND
                     </div>
                 </div>
 
@@ -445,7 +457,7 @@ const Database = () => {
                             {(filters.player || filters.event || filters.twic_issue || filters.eco || filters.min_elo || filters.max_elo) && (
                                 <button
                                     onClick={() => {
-                                        setFilters({ player: '', min_elo: '', max_elo: '', eco: '', event: '', twic_issue: '', commented_only: false, personal_only: false });
+                                        setFilters({ player: '', min_elo: '', max_elo: '', eco: '', event: '', twic_issue: '', commented_only: false, personal_only: false, sort: filters.sort });
                                         window.history.replaceState({}, '', window.location.pathname);
                                         fetchGames();
                                     }}
@@ -481,7 +493,13 @@ const Database = () => {
                                     <th style={{ background: 'rgba(255, 255, 255, 0.05)', color: 'var(--text-primary)', width: '80px' }}>Res</th>
                                     <th style={{ background: 'rgba(255, 255, 255, 0.05)', color: 'var(--text-primary)', width: '100px' }}>ECO</th>
                                     <th style={{ background: 'rgba(255, 255, 255, 0.05)', color: 'var(--text-primary)', padding: '16px 24px' }}>Event</th>
-                                    <th style={{ background: 'rgba(255, 255, 255, 0.05)', color: 'var(--text-primary)', textAlign: 'right', padding: '16px 24px' }}>Date</th>
+                                    <th
+                                        onClick={() => setFilters(prev => ({ ...prev, sort: prev.sort === 'date' ? 'newest' : 'date' }))}
+                                        title={filters.sort === 'date' ? 'Sorted by date, click for import order' : 'Sort by date, newest first'}
+                                        style={{ background: 'rgba(255, 255, 255, 0.05)', color: filters.sort === 'date' ? 'var(--neon-lime)' : 'var(--text-primary)', textAlign: 'right', padding: '16px 24px', cursor: 'pointer', userSelect: 'none' }}
+                                    >
+                                        Date{filters.sort === 'date' ? ' ↓' : ''}
+                                    </th>
                                 </tr>
                             </thead>
                             <tbody className="divide-y divide-slate-700">